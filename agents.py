@@ -90,9 +90,11 @@ except Exception:
     # Fallback LLM stub (non-functional, prevents import errors)
     has_real_llm = False
 
-# Set up Django (required for DB model import)
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hackathon_core.settings')
-django.setup()
+# Set up Django (required for DB model import) unless the host process (api.py) already did
+from django.apps import apps
+if not apps.ready:
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hackathon_core.settings')
+    django.setup()
 from core_db.models import AgentLog
 
 # Configure a real or stub LLM
@@ -0,0 +1,207 @@
+"""Time-bucketed sensor aggregates computed in the database.
+
+`aggregate()` answers questions like "hourly max vibration for CT scanners
+over the last week" with one grouped SQL statement:
+
+  - the filtered rows and their bucket come from an ORM queryset, so the
+    machine / equipment-type / time filters hit the (machine_id, -timestamp)
+    index; equipment types become machine_id ranges per ID prefix (see
+    equipment.RuleSet.prefix_rules), which every backend can range-scan;
+  - buckets: `date_trunc` on Postgres for whole minutes/hours/days/weeks,
+    `date_bin` for other sizes (Postgres 14+), otherwise epoch arithmetic
+    (`strftime('%s')` on SQLite, UNIX_TIMESTAMP on MySQL). Buckets are
+    aligned to 1970-01-05, a Monday, so weekly buckets start on Mondays;
+  - min / max / avg / count are plain aggregates. Percentiles are
+    nearest-rank: `percentile_disc` on Postgres, ROW_NUMBER()/COUNT()
+    windows on SQLite and MySQL, which give the same values.
+
+Requires Django to be set up before import (see api.py).
+"""
+import re
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core.exceptions import EmptyResultSet
+from django.db import NotSupportedError, connection
+from django.db.models import DateTimeField, Func, Q
+
+import equipment
+from core_db.models import SensorReading
+
+CHANNELS = ('vibration', 'temperature')
+METRICS = ('min', 'max', 'avg', 'count')
+UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+TRUNC_UNITS = {60: 'minute', 3600: 'hour', 86400: 'day', 604800: 'week'}
+ORIGIN = 345600  # 1970-01-05T00:00:00Z, a Monday
+MAX_BUCKETS = 10000
+
+
+def parse_bucket(spec: str) -> int:
+    """Bucket size in seconds from e.g. '30s', '15m', '1h', '1d', '1w'."""
+    match = re.fullmatch(r'\s*(\d+)\s*([smhdw])\s*', spec or '')
+    if not match or int(match.group(1)) == 0:
+        raise ValueError(f"Invalid bucket {spec!r} (use e.g. 15m, 1h, 1d, 1w)")
+    return int(match.group(1)) * UNITS[match.group(2)]
+
+
+def parse_percentiles(spec: str) -> list:
+    """'50,95,99.9' -> [50.0, 95.0, 99.9] (0-100, one decimal)."""
+    out = []
+    for part in (spec or '').split(','):
+        if part.strip():
+            p = round(float(part), 1)
+            if not 0 <= p <= 100:
+                raise ValueError(f"Percentile {part!r} is outside 0-100")
+            out.append(p)
+    return sorted(set(out))
+
+
+class TimeBucket(Func):
+    """Start of the `seconds`-wide bucket holding a timestamp (datetime on Postgres, epoch seconds elsewhere)."""
+
+    output_field = DateTimeField()
+
+    def __init__(self, expression, seconds: int):
+        super().__init__(expression)
+        self.seconds = int(seconds)
+
+    def as_postgresql(self, compiler, connection, **extra):
+        unit = TRUNC_UNITS.get(self.seconds)
+        if unit:
+            template = f"date_trunc('{unit}', %(expressions)s)"
+        elif connection.pg_version >= 140000:
+            template = (f"date_bin(INTERVAL '{self.seconds} seconds', %(expressions)s, "
+                        f"TIMESTAMPTZ '1970-01-05 00:00:00+00')")
+        else:
+            template = (f"to_timestamp(floor((extract(epoch from %(expressions)s) - {ORIGIN}) / {self.seconds})"
+                        f" * {self.seconds} + {ORIGIN})")
+        return self.as_sql(compiler, connection, template=template, **extra)
+
+    def as_sqlite(self, compiler, connection, **extra):
+        template = (f"((CAST(strftime('%%%%s', %(expressions)s) AS INTEGER) - {ORIGIN}) / {self.seconds})"
+                    f" * {self.seconds} + {ORIGIN}")
+        return self.as_sql(compiler, connection, template=template, **extra)
+
+    def as_mysql(self, compiler, connection, **extra):
+        template = f"FLOOR((UNIX_TIMESTAMP(%(expressions)s) - {ORIGIN}) / {self.seconds}) * {self.seconds} + {ORIGIN}"
+        return self.as_sql(compiler, connection, template=template, **extra)
+
+    def as_sql(self, compiler, connection, template=None, **extra):
+        if template is None:
+            raise NotSupportedError(f"Time buckets are not implemented for {connection.vendor}")
+        return super().as_sql(compiler, connection, template=template, **extra)
+
+
+def _prefix_range(prefix: str) -> Q:
+    # [prefix, prefix with its last character bumped): an index range scan on every backend, unlike
+    # LIKE on Postgres without text_pattern_ops. IDs are stored upper-case, as the prefixes are.
+    return Q(machine_id__gte=prefix, machine_id__lt=prefix[:-1] + chr(ord(prefix[-1]) + 1))
+
+
+def equipment_type_q(equipment_type: str) -> Q:
+    """Q selecting the machines whose ID maps to `equipment_type`."""
+    rules = equipment.get_rules()
+    prefix_rules, unmatched = rules.prefix_rules(equipment_type)
+    q = Q(pk__in=[])
+    for prefix, excluded in prefix_rules:
+        inside = _prefix_range(prefix)
+        for other in excluded:
+            inside &= ~_prefix_range(other)
+        q |= inside
+    if unmatched:
+        no_prefix = Q()
+        for prefix in rules.prefixes:
+            no_prefix &= ~_prefix_range(prefix)
+        q |= no_prefix
+    return q
+
+
+def build_query(bucket_s: int, start, end, machine_ids=None, equipment_type: str = None,
+                channels=CHANNELS, metrics=METRICS, percentiles=(), per_machine: bool = False) -> tuple:
+    """(sql, params, column names) for the grouped aggregate; sql is None when no row can match."""
+    qs = SensorReading.objects.filter(timestamp__gte=start, timestamp__lt=end)
+    if machine_ids:
+        qs = qs.filter(machine_id__in=machine_ids)
+    if equipment_type:
+        qs = qs.filter(equipment_type_q(equipment_type))
+    group = ['bucket'] + (['machine_id'] if per_machine else [])
+    inner = qs.order_by().annotate(bucket=TimeBucket('timestamp', bucket_s)).values(*group, *channels)
+    try:
+        inner_sql, params = inner.query.get_compiler(using=qs.db).as_sql()
+    except EmptyResultSet:  # e.g. an equipment type no machine ID maps to
+        inner_sql, params = None, ()
+
+    q = connection.ops.quote_name
+    keys = ', '.join(q(g) for g in group)
+    columns, selects = list(group), [q(g) for g in group]
+    if 'count' in metrics:
+        columns.append('count')
+        selects.append('COUNT(*)')
+    for channel in channels:
+        for metric in ('min', 'max', 'avg'):
+            if metric in metrics:
+                columns.append(f"{channel}_{metric}")
+                selects.append(f"{metric.upper()}({q(channel)})")
+
+    windowed = percentiles and connection.vendor != 'postgresql'
+    for channel in channels:
+        for p in percentiles:
+            columns.append(f"{channel}_p{p:g}")
+            if not windowed:
+                selects.append(f"percentile_disc({p / 100!r}) WITHIN GROUP (ORDER BY {q(channel)})")
+            else:
+                # Nearest rank: the first value whose rank reaches p% of the group (integer math)
+                selects.append(f"MIN(CASE WHEN {q('rn_' + channel)} * 1000 >= {round(p * 10)} * {q('n_rows')} "
+                               f"THEN {q(channel)} END)")
+
+    source = f"({inner_sql}) {q('rows')}"
+    if windowed:
+        windows = ', '.join(
+            f"ROW_NUMBER() OVER (PARTITION BY {keys} ORDER BY {q(c)}) AS {q('rn_' + c)}" for c in channels)
+        source = (f"(SELECT {q('rows')}.*, {windows}, COUNT(*) OVER (PARTITION BY {keys}) AS {q('n_rows')} "
+                  f"FROM {source}) {q('ranked')}")
+    sql = f"SELECT {', '.join(selects)} FROM {source} GROUP BY {keys} ORDER BY {keys}"
+    return (sql if inner_sql else None), params, columns
+
+
+def _bucket_iso(value) -> str:
+    if isinstance(value, (int, float)):
+        value = datetime.fromtimestamp(int(value), tz=dt_timezone.utc)
+    elif isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=dt_timezone.utc)
+    return value.astimezone(dt_timezone.utc).isoformat()
+
+
+def aggregate(bucket: str = '1h', start=None, end=None, machine_ids=None, equipment_type: str = None,
+              channels=CHANNELS, metrics=METRICS, percentiles=(), per_machine: bool = False) -> dict:
+    """Bucketed aggregates of SensorReading over [start, end) (default: the last 7 days)."""
+    bucket_s = parse_bucket(bucket)
+    end = end or datetime.now(dt_timezone.utc)
+    start = start or end - timedelta(days=7)
+    if (end - start).total_seconds() / bucket_s > MAX_BUCKETS:
+        raise ValueError(f"More than {MAX_BUCKETS} buckets; use a larger bucket or a shorter range")
+    unknown = [c for c in channels if c not in CHANNELS] + [m for m in metrics if m not in METRICS]
+    if unknown:
+        raise ValueError(f"Unknown channel or metric: {', '.join(unknown)}")
+
+    sql, params, columns = build_query(bucket_s, start, end, machine_ids, equipment_type, channels, metrics,
+                                       percentiles, per_machine)
+    rows = []
+    if sql is not None:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+
+    data = {c: [row[i] for row in rows] for i, c in enumerate(columns)}
+    data['bucket'] = [_bucket_iso(v) for v in data['bucket']]
+    return {
+        'bucket': bucket,
+        'bucket_seconds': bucket_s,
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'equipmentType': equipment_type,
+        'machine_ids': list(machine_ids) if machine_ids else None,
+        'count': len(rows),
+        'data': data,
+    }
@@ -1,8 +1,9 @@
+import logging
 import os
 import sys
 import django
 from pathlib import Path
-from fastapi import FastAPI, BackgroundTasks
+from fastapi import FastAPI, BackgroundTasks, Header
 from pydantic import BaseModel
 
 # 1. SETUP DJANGO INSIDE FASTAPI
@@ -25,21 +26,56 @@ else:
     os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hackathon_core.settings')
 django.setup()
 
-from core_db.models import AgentLog, SensorReading
-from agents import praxis_crew
-import json
-import requests
+from core_db.models import AgentLog, SensorReading, MaintenanceSchedule
+from django.db import transaction
+from django.db.models import Count
 from fastapi import Query
-from typing import Optional
+from fastapi.responses import JSONResponse, PlainTextResponse
+from typing import List, Optional
 import pdm
-
-app = FastAPI()
+import hospital_network
+import inventory
+import equipment
+import forwarder
+import scheduling
+import fleet
+import downsample
+import multichannel
+import riskindex
+import ingest
+import metrics
+import outbox
+import sqlprofile
+import aggregates
+import serving
+
+app = FastAPI(lifespan=serving.lifespan)
+app.router.route_class = serving.DBRoute
+app.add_middleware(metrics.MetricsMiddleware)
+if sqlprofile.enabled():
+    # Opt-in: X-SQL-Profile header + N+1 warnings on the praxis.sql logger
+    app.add_middleware(sqlprofile.SQLProfileMiddleware)
+metrics.install_db_instrumentation()
+
+def _kickoff_agents():
+    # The agent stack (crewai, langchain, dotenv) is only imported on first dispatch
+    # so API startup and --reload cycles don't pay for it.
+    from agents import praxis_crew
+    return praxis_crew.kickoff()
+
+_run_crew = metrics.track_agent_run(_kickoff_agents)
 
 @app.post("/api/run_agent")
 async def run_agent(background_tasks: BackgroundTasks):
-    background_tasks.add_task(praxis_crew.kickoff)
+    _run_crew.dispatched()
+    background_tasks.add_task(_run_crew)
     return {"status": "Agents Dispatched! Check Django Admin."}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Prometheus text exposition of request, DB, ingest, agent and cache metrics."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 def read_root():
     return {"Hello": "PraxisGuard AI System is Online"}
@@ -47,37 +83,38 @@ def read_root():
 
 @app.post("/api/forward_to_n8n")
 async def forward_to_n8n():
-    """Read latest CSV row and forward JSON to configured N8N webhook URL (via env).
-    The webhook URL should be set in `N8N_WEBHOOK_URL` environment variable.
+    """Queue the latest CSV row for the N8N webhook (URL from `N8N_WEBHOOK_URL`).
+    Delivery is batched and pooled in the background (see forwarder.py), so
+    this returns without waiting on n8n.
     """
-    n8n_url = os.getenv('N8N_WEBHOOK_URL')
-    if not n8n_url:
+    fwd = forwarder.get_forwarder()
+    if fwd is None:
         return {"error": "N8N webhook not configured (set N8N_WEBHOOK_URL)."}
     try:
-        import pandas as _pd
         if not os.path.exists('live_sensor_stream.csv'):
             return {"error": "no_sensor_data"}
-        df = _pd.read_csv('live_sensor_stream.csv')
-        if df.empty:
+        latest = forwarder.latest_csv_row('live_sensor_stream.csv')
+        if latest is None:
             return {"error": "no_sensor_data"}
-        latest = df.tail(1).iloc[0].to_dict()
-        payload = {"event": "sensor_reading", "data": latest}
-        headers = {'Content-Type': 'application/json'}
-        resp = requests.post(n8n_url, data=json.dumps(payload), headers=headers, timeout=5)
-        return {"status": "forwarded", "n8n_status": resp.status_code, "n8n_text": resp.text}
+        if not fwd.submit(latest):
+            return {"error": "n8n forward queue full", "queue_depth": fwd.depth()}
+        return {"status": "queued", "queue_depth": fwd.depth(), "data": latest}
     except Exception as e:
         return {"error": str(e)}
 
 
 @app.get('/api/compute_pof')
-def compute_pof_endpoint(machine_id: str = Query(...), window: int = 5):
+def compute_pof_endpoint(machine_id: str = Query(...), window: int = 5, source: str = 'csv'):
     """Compute PoF for a given machine by reading recent CSV data.
 
     Query params:
       - machine_id: ID of machine (required)
       - window: how many recent rows to use
+      - source: 'csv' (default) or 'history' for the memory-mapped history store
     """
     try:
+        if source == 'history':
+            return pdm.compute_pof_from_history(machine_id, window=window)
         result = pdm.compute_pof_for_machine(machine_id, window=window)
         return result
     except Exception as e:
@@ -128,6 +165,126 @@ def get_sensor_readings(
         return {"error": str(e)}
 
 
+@app.get('/api/sensor-readings/{machine_id}/series')
+def get_sensor_series(
+    machine_id: str,
+    from_: Optional[str] = Query(default=None, alias='from'),
+    to: Optional[str] = None,
+    points: int = Query(default=1000, ge=3, le=10000),
+    method: str = 'lttb',
+):
+    """Downsampled readings of one machine for charting.
+
+    Query params:
+      - from / to: ISO timestamps bounding the range (optional, naive = UTC)
+      - points: target number of points per channel (default: 1000)
+      - method: 'lttb' (Largest-Triangle-Three-Buckets, default) or 'minmax'
+
+    `data` is column-oriented (timestamp, vibration, temperature); the rows
+    kept are the union of each channel's picks.
+    """
+    try:
+        import pandas as _pd
+        start = _pd.Timestamp(from_) if from_ else None
+        end = _pd.Timestamp(to) if to else None
+        if start is not None and start.tzinfo is None:
+            start = start.tz_localize('UTC')
+        if end is not None and end.tzinfo is None:
+            end = end.tz_localize('UTC')
+        return downsample.series(machine_id, start, end, points=points, method=method)
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@app.get('/api/sensor-readings/aggregate')
+def get_sensor_aggregates(
+    bucket: str = '1h',
+    from_: Optional[str] = Query(default=None, alias='from'),
+    to: Optional[str] = None,
+    machine_id: Optional[str] = None,
+    equipmentType: Optional[str] = None,
+    metric_set: str = Query(default='min,max,avg,count', alias='metrics'),
+    percentiles: Optional[str] = None,
+    channels: str = 'vibration,temperature',
+    per_machine: bool = False,
+):
+    """Time-bucketed aggregates computed by the database in one grouped query.
+
+    Query params:
+      - bucket: bucket size, e.g. 30s, 15m, 1h, 1d, 1w (default: 1h)
+      - from / to: ISO timestamps bounding the range (default: the last 7 days, naive = UTC)
+      - machine_id: comma-separated machine IDs (optional)
+      - equipmentType: only machines of this type (optional)
+      - metrics: comma-separated subset of min, max, avg, count
+      - percentiles: comma-separated percentiles 0-100, e.g. 50,95,99 (optional)
+      - channels: comma-separated subset of vibration, temperature
+      - per_machine: one row per bucket and machine instead of per bucket
+
+    `data` is column-oriented: bucket (start, ISO), machine_id when
+    per_machine, count, then <channel>_<metric> and <channel>_p<N>.
+    """
+    try:
+        import pandas as _pd
+        start = _pd.Timestamp(from_) if from_ else None
+        end = _pd.Timestamp(to) if to else None
+        if start is not None and start.tzinfo is None:
+            start = start.tz_localize('UTC')
+        if end is not None and end.tzinfo is None:
+            end = end.tz_localize('UTC')
+
+        def split(value):
+            return [p.strip() for p in (value or '').split(',') if p.strip()]
+
+        return aggregates.aggregate(
+            bucket, start, end,
+            machine_ids=split(machine_id),
+            equipment_type=equipmentType,
+            channels=split(channels),
+            metrics=split(metric_set),
+            percentiles=aggregates.parse_percentiles(percentiles),
+            per_machine=per_machine,
+        )
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@app.get('/api/device-readings/{machine_id}')
+def get_device_readings(
+    machine_id: str,
+    from_: Optional[str] = Query(default=None, alias='from'),
+    to: Optional[str] = None,
+    channels: Optional[str] = None,
+    limit: int = Query(default=1000, ge=1, le=100000),
+):
+    """Multi-channel readings of one machine with per-row PoF and error codes.
+
+    Query params:
+      - from / to: ISO timestamps bounding the range (optional)
+      - channels: comma-separated channel names (default: every reported channel)
+      - limit: newest rows to return (default: 1000)
+    """
+    try:
+        wanted = [c.strip() for c in channels.split(',') if c.strip()] if channels else None
+        frame = multichannel.load(machine_id, from_, to, wanted, limit=limit)
+        result = multichannel.evaluate(frame)
+        stamps = frame['timestamp'].astype('datetime64[us]').astype(str)
+        return {
+            'machine_id': machine_id,
+            'channels': frame['channels'],
+            'count': len(stamps),
+            'data': {
+                'timestamp': [f"{t}+00:00" for t in stamps],
+                # NaN (channel not reported) isn't valid JSON
+                **{c: [None if v != v else v for v in frame['values'][:, j].tolist()]
+                   for j, c in enumerate(frame['channels'])},
+                'pof': result['pof'].tolist(),
+                'codes': result['codes'],
+            },
+        }
+    except Exception as e:
+        return {"error": str(e)}
+
+
 @app.get('/api/sensor-readings/{reading_id}')
 def get_sensor_reading_by_id(reading_id: int):
     """Get a specific sensor reading by ID."""
@@ -216,22 +373,21 @@ def get_agent_log_by_id(log_id: int):
 def get_machines():
     """Get list of all unique machine IDs with their latest readings."""
     try:
-        # Get unique machine IDs
-        machine_ids = SensorReading.objects.values_list('machine_id', flat=True).distinct()
-        
+        # Reading counts and latest readings for the whole fleet in two queries
+        counts = dict(
+            SensorReading.objects.order_by().values('machine_id')
+            .annotate(total=Count('id')).values_list('machine_id', 'total')
+        )
         machines = []
-        for machine_id in machine_ids:
-            latest_reading = SensorReading.objects.filter(machine_id=machine_id).order_by('-timestamp').first()
-            reading_count = SensorReading.objects.filter(machine_id=machine_id).count()
-            
+        for machine_id, vibration, temperature, timestamp in fleet.latest_readings_qs().values_list(*fleet.LATEST_COLUMNS):
             machines.append({
                 'machine_id': machine_id,
-                'total_readings': reading_count,
+                'total_readings': counts.get(machine_id, 0),
                 'latest_reading': {
-                    'vibration': latest_reading.vibration,
-                    'temperature': latest_reading.temperature,
-                    'timestamp': latest_reading.timestamp.isoformat()
-                } if latest_reading else None
+                    'vibration': vibration,
+                    'temperature': temperature,
+                    'timestamp': timestamp.isoformat()
+                }
             })
         
         return {
@@ -242,6 +398,26 @@ def get_machines():
         return {"error": str(e)}
 
 
+@app.get('/api/risk/top')
+def get_risk_top(
+    k: int = Query(default=10, ge=1, le=1000),
+    equipmentType: Optional[str] = None,
+    location: Optional[str] = None,
+):
+    """The K machines with the highest PoF, from the incrementally updated risk index.
+
+    Query params:
+      - k: number of machines (default: 10)
+      - equipmentType: only this equipment type (e.g. "Ventilator")
+      - location: only this location (see data/machine_locations.json)
+    """
+    try:
+        data, matching = riskindex.top(k, equipmentType, location)
+        return {'k': k, 'matching': matching, 'count': len(data), 'data': data}
+    except Exception as e:
+        return {"error": str(e)}
+
+
 @app.get('/api/stats')
 def get_database_stats():
     """Get overall database statistics."""
@@ -267,6 +443,42 @@ def get_database_stats():
         return {"error": str(e)}
 
 
+class IngestBatch(BaseModel):
+    """Column-oriented batch of readings (all lists the same length)."""
+    machine_id: List[str]
+    vibration: List[float]
+    temperature: List[float]
+    timestamp: Optional[List[str]] = None
+    dedupe: bool = False
+
+
+@app.post('/api/ingest/readings')
+def ingest_readings(batch: IngestBatch):
+    """Bulk-insert a batch of sensor readings.
+
+    Timestamps are ISO strings (naive = UTC); omit them to stamp the batch with
+    the server time. Set `dedupe` to skip rows already stored for the same
+    (machine_id, timestamp).
+    """
+    n = len(batch.machine_id)
+    if len(batch.vibration) != n or len(batch.temperature) != n or (batch.timestamp and len(batch.timestamp) != n):
+        return {"error": "machine_id, vibration, temperature and timestamp must have the same length"}
+    try:
+        import pandas as _pd
+        df = _pd.DataFrame({
+            'machine_id': batch.machine_id,
+            'vibration': batch.vibration,
+            'temperature': batch.temperature,
+            'timestamp': batch.timestamp if batch.timestamp else [_pd.Timestamp.now(tz='UTC')] * n,
+        })
+        df, invalid = ingest.normalize_frame(df)
+        result = ingest.insert_readings(df, dedupe=batch.dedupe)
+        result['invalid'] = invalid
+        return result
+    except Exception as e:
+        return {"error": str(e)}
+
+
 # ============================================
 # N8N WORKFLOW ENDPOINTS
 # ============================================
@@ -277,6 +489,7 @@ class OrderPartsRequest(BaseModel):
     quantity: int = 1
     deviceId: str
     priority: str = "high"
+    idempotencyKey: Optional[str] = None
 
 class CrisisAlertRequest(BaseModel):
     deviceId: str
@@ -290,54 +503,38 @@ class CrisisAlertRequest(BaseModel):
 def get_iot_sensor_data():
     """
     IoT Sensor Data Endpoint for n8n workflow.
-    Returns latest sensor readings with calculated failure probability.
+    Returns latest sensor readings with per-equipment-type error codes.
     Used by: "Fetch IoT Sensor Data" node
     """
     try:
-        # Get unique machine IDs using a set
-        all_readings = SensorReading.objects.all()
-        machine_ids = list(set(r.machine_id for r in all_readings))
-        
+        latest = fleet.latest_readings()
+        if latest.empty:
+            return []
+
+        rules = equipment.get_rules()
+        machine_ids = latest['machine_id'].tolist()
+        equipment_types = [rules.equipment_type(m) for m in machine_ids]
+        # Error codes for the whole fleet in one vectorized pass
+        error_codes = rules.evaluate(equipment_types, {
+            'vibration': latest['vibration'].to_numpy(),
+            'temperature': latest['temperature'].to_numpy(),
+        })
+
         devices = []
-        for machine_id in machine_ids:
-            # Get latest reading for each machine
-            latest = SensorReading.objects.filter(machine_id=machine_id).order_by('-timestamp').first()
-            
-            if latest:
-                # Get error codes (simulated based on sensor values)
-                error_codes = []
-                if latest.vibration > 80:
-                    error_codes.append("VIB_HIGH")
-                if latest.vibration > 90:
-                    error_codes.append("VIB_CRITICAL")
-                if latest.temperature > 90:
-                    error_codes.append("TEMP_HIGH")
-                if latest.temperature > 100:
-                    error_codes.append("TEMP_CRITICAL")
-                
-                # Determine equipment type based on machine_id prefix
-                equipment_type = "MRI Scanner"  # Default
-                if "VEN" in machine_id:
-                    equipment_type = "Ventilator"
-                elif "XR" in machine_id:
-                    equipment_type = "X-Ray Machine"
-                elif "CT" in machine_id:
-                    equipment_type = "CT Scanner"
-                elif "US" in machine_id:
-                    equipment_type = "Ultrasound"
-                elif "MAC" in machine_id:
-                    equipment_type = "Patient Monitor"
-                
-                devices.append({
-                    "deviceId": machine_id,
-                    "equipmentType": equipment_type,
-                    "vibration": round(latest.vibration, 2),
-                    "temperature": round(latest.temperature, 2),
-                    "errorCodes": error_codes,
-                    "timestamp": latest.timestamp.isoformat(),
-                    "status": "operational" if len(error_codes) == 0 else "warning"
-                })
-        
+        for machine_id, equipment_type, vib, temp, ts, codes in zip(
+            machine_ids, equipment_types, latest['vibration'].tolist(), latest['temperature'].tolist(),
+            latest['timestamp'].tolist(), error_codes
+        ):
+            devices.append({
+                "deviceId": machine_id,
+                "equipmentType": equipment_type,
+                "vibration": round(vib, 2),
+                "temperature": round(temp, 2),
+                "errorCodes": codes,
+                "timestamp": ts.isoformat(),
+                "status": "operational" if len(codes) == 0 else "warning"
+            })
+
         return devices
     except Exception as e:
         return {"error": str(e)}
@@ -350,42 +547,16 @@ def check_inventory(deviceType: Optional[str] = None):
     Returns available parts for specified equipment type.
     Used by: "Check Inventory API Tool" node
     """
-    # Simulated inventory data - in production, this would query an inventory database
-    inventory = {
-        "MRI Scanner": [
-            {"partId": "MRI-COIL-001", "partName": "RF Coil", "quantity": 3, "minStock": 2, "status": "in_stock"},
-            {"partId": "MRI-COOL-001", "partName": "Cooling Pump", "quantity": 1, "minStock": 2, "status": "low_stock"},
-            {"partId": "MRI-MAG-001", "partName": "Gradient Magnet", "quantity": 2, "minStock": 1, "status": "in_stock"},
-        ],
-        "Ventilator": [
-            {"partId": "VEN-FLTR-001", "partName": "HEPA Filter", "quantity": 15, "minStock": 10, "status": "in_stock"},
-            {"partId": "VEN-TUBE-001", "partName": "Breathing Circuit", "quantity": 25, "minStock": 20, "status": "in_stock"},
-            {"partId": "VEN-VALV-001", "partName": "Exhalation Valve", "quantity": 5, "minStock": 5, "status": "low_stock"},
-        ],
-        "CT Scanner": [
-            {"partId": "CT-TUBE-001", "partName": "X-Ray Tube", "quantity": 1, "minStock": 1, "status": "low_stock"},
-            {"partId": "CT-DET-001", "partName": "Detector Array", "quantity": 2, "minStock": 1, "status": "in_stock"},
-        ],
-        "Patient Monitor": [
-            {"partId": "MON-SENS-001", "partName": "SpO2 Sensor", "quantity": 20, "minStock": 15, "status": "in_stock"},
-            {"partId": "MON-CABL-001", "partName": "ECG Cable", "quantity": 30, "minStock": 20, "status": "in_stock"},
-            {"partId": "MON-BATT-001", "partName": "Battery Pack", "quantity": 8, "minStock": 10, "status": "low_stock"},
-        ],
-        "X-Ray Machine": [
-            {"partId": "XR-TUBE-001", "partName": "X-Ray Tube", "quantity": 2, "minStock": 2, "status": "in_stock"},
-            {"partId": "XR-COLL-001", "partName": "Collimator", "quantity": 1, "minStock": 1, "status": "low_stock"},
-        ],
-        "Ultrasound": [
-            {"partId": "US-PROB-001", "partName": "Linear Probe", "quantity": 4, "minStock": 3, "status": "in_stock"},
-            {"partId": "US-PROB-002", "partName": "Curved Probe", "quantity": 3, "minStock": 2, "status": "in_stock"},
-        ]
-    }
-    
-    if deviceType and deviceType in inventory:
+    try:
+        result = inventory.get_inventory(deviceType)
+    except Exception as e:
+        return {"error": str(e)}
+
+    if deviceType and deviceType in result["inventory"]:
         return {
             "deviceType": deviceType,
-            "parts": inventory[deviceType],
-            "lastUpdated": "2025-11-29T10:00:00Z"
+            "parts": result["inventory"][deviceType],
+            "lastUpdated": result["lastUpdated"]
         }
     elif deviceType:
         return {
@@ -395,130 +566,92 @@ def check_inventory(deviceType: Optional[str] = None):
         }
     else:
         # Return all inventory
-        return {
-            "inventory": inventory,
-            "lastUpdated": "2025-11-29T10:00:00Z"
-        }
+        return result
 
 
 @app.post('/api/orders/parts')
-def order_parts(order: OrderPartsRequest):
+def order_parts(
+    order: OrderPartsRequest,
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key")
+):
     """
     Parts Ordering Endpoint for n8n workflow.
-    Creates an order for replacement parts.
+    Reserves stock for replacement parts and records the order.
     Used by: "Order Parts API Tool" node
+
+    Send an `Idempotency-Key` header (or `idempotencyKey` in the body) to make
+    retries safe: repeating a key returns the original order without reserving
+    stock again.
     """
-    import uuid
-    from datetime import datetime, timedelta
-    
-    # Simulated order processing
-    order_id = f"ORD-{uuid.uuid4().hex[:8].upper()}"
-    
-    # Estimate delivery based on priority
-    delivery_days = 1 if order.priority == "critical" else (2 if order.priority == "high" else 5)
-    estimated_delivery = (datetime.now() + timedelta(days=delivery_days)).isoformat()
-    
-    return {
-        "orderId": order_id,
-        "partId": order.partId,
-        "quantity": order.quantity,
-        "deviceId": order.deviceId,
-        "priority": order.priority,
-        "status": "confirmed",
-        "estimatedDelivery": estimated_delivery,
-        "message": f"Order {order_id} placed successfully. Estimated delivery: {delivery_days} day(s)."
-    }
+    key = idempotency_key or order.idempotencyKey
+    try:
+        placed, replayed = inventory.place_order(
+            order.partId, order.quantity, order.deviceId, order.priority, idempotency_key=key
+        )
+    except inventory.InsufficientStock as e:
+        return {
+            "partId": order.partId,
+            "quantity": order.quantity,
+            "deviceId": order.deviceId,
+            "status": "insufficient_stock",
+            "available": e.available,
+            "message": str(e)
+        }
+    except Exception as e:
+        return {"error": str(e)}
+
+    delivery_days = inventory.delivery_days_for(placed.priority)
+    result = inventory.order_to_dict(placed)
+    result["replayed"] = replayed
+    result["message"] = f"Order {placed.order_id} placed successfully. Estimated delivery: {delivery_days} day(s)."
+    return result
 
 
 @app.get('/api/hospital-network')
 def search_hospital_network(
     equipmentType: str = Query(...),
     location: str = Query(...),
-    status: str = Query(default="operational")
+    status: str = Query(default="operational"),
+    k: int = Query(default=10, ge=1, le=100),
+    lat: Optional[float] = None,
+    lon: Optional[float] = None,
+    maxDistanceKm: Optional[float] = None
 ):
     """
     Hospital Network Search Endpoint for n8n workflow.
-    Searches affiliated hospitals for available backup equipment.
+    Searches affiliated hospitals for available backup equipment, nearest first.
     Used by: "Search Hospital Network Tool" node
+
+    Query params:
+      - equipmentType / status: unit to look for (type is case-insensitive)
+      - location: known location name used as the search origin
+      - lat, lon: explicit search origin (overrides location)
+      - k: maximum number of hospitals to return (default: 10)
+      - maxDistanceKm: ignore hospitals further than this (optional)
     """
-    # Simulated hospital network data
-    hospital_network = [
-        {
-            "hospitalId": "HOSP-001",
-            "hospitalName": "City General Hospital",
-            "location": "Downtown",
-            "distance_km": 5.2,
-            "equipment": [
-                {"equipmentType": "MRI Scanner", "equipmentId": "MRI-CG-001", "status": "operational", "available": True},
-                {"equipmentType": "CT Scanner", "equipmentId": "CT-CG-001", "status": "operational", "available": True},
-                {"equipmentType": "Ventilator", "equipmentId": "VEN-CG-001", "status": "operational", "available": True},
-                {"equipmentType": "Patient Monitor", "equipmentId": "MON-CG-001", "status": "operational", "available": True},
-            ]
-        },
-        {
-            "hospitalId": "HOSP-002",
-            "hospitalName": "Regional Medical Center",
-            "location": "North District",
-            "distance_km": 12.8,
-            "equipment": [
-                {"equipmentType": "MRI Scanner", "equipmentId": "MRI-RM-001", "status": "operational", "available": True},
-                {"equipmentType": "Ventilator", "equipmentId": "VEN-RM-001", "status": "operational", "available": True},
-                {"equipmentType": "X-Ray Machine", "equipmentId": "XR-RM-001", "status": "maintenance", "available": False},
-                {"equipmentType": "Ultrasound", "equipmentId": "US-RM-001", "status": "operational", "available": True},
-            ]
-        },
-        {
-            "hospitalId": "HOSP-003",
-            "hospitalName": "University Medical Hospital",
-            "location": "West Campus",
-            "distance_km": 8.5,
-            "equipment": [
-                {"equipmentType": "MRI Scanner", "equipmentId": "MRI-UM-001", "status": "operational", "available": False},
-                {"equipmentType": "CT Scanner", "equipmentId": "CT-UM-001", "status": "operational", "available": True},
-                {"equipmentType": "Patient Monitor", "equipmentId": "MON-UM-001", "status": "operational", "available": True},
-            ]
-        },
-        {
-            "hospitalId": "HOSP-004",
-            "hospitalName": "St. Mary's Medical Center",
-            "location": "South District",
-            "distance_km": 15.3,
-            "equipment": [
-                {"equipmentType": "Ventilator", "equipmentId": "VEN-SM-001", "status": "operational", "available": True},
-                {"equipmentType": "Ventilator", "equipmentId": "VEN-SM-002", "status": "operational", "available": True},
-                {"equipmentType": "Patient Monitor", "equipmentId": "MON-SM-001", "status": "operational", "available": True},
-            ]
-        }
-    ]
-    
-    # Filter hospitals with matching available equipment
+    network = hospital_network.get_network()
+    origin_lat, origin_lon = network.resolve_origin(location, lat, lon)
+
     results = []
-    for hospital in hospital_network:
-        matching_equipment = [
-            eq for eq in hospital["equipment"]
-            if eq["equipmentType"].lower() == equipmentType.lower()
-            and eq["status"] == status
-            and eq["available"] == True
-        ]
-        
-        if matching_equipment:
-            results.append({
-                "hospitalId": hospital["hospitalId"],
-                "hospitalName": hospital["hospitalName"],
-                "location": hospital["location"],
-                "distance_km": hospital["distance_km"],
-                "availableEquipment": matching_equipment,
-                "estimatedTransportTime_min": int(hospital["distance_km"] * 3)  # ~3 min per km
-            })
-    
-    # Sort by distance
-    results.sort(key=lambda x: x["distance_km"])
-    
+    for distance_km, hospital, units in network.nearest(
+        equipmentType, origin_lat, origin_lon, k=k, status=status, max_km=maxDistanceKm
+    ):
+        results.append({
+            "hospitalId": hospital["hospitalId"],
+            "hospitalName": hospital["hospitalName"],
+            "location": hospital["location"],
+            "distance_km": round(distance_km, 1),
+            "availableEquipment": units,
+            "estimatedTransportTime_min": int(distance_km * 3)  # ~3 min per km
+        })
+
     return {
         "searchQuery": {
             "equipmentType": equipmentType,
             "location": location,
-            "status": status
+            "status": status,
+            "origin": {"lat": origin_lat, "lon": origin_lon},
+            "k": k
         },
         "resultsCount": len(results),
         "hospitals": results
@@ -536,19 +669,7 @@ def trigger_crisis_alert(alert: CrisisAlertRequest):
     from datetime import datetime
     
     alert_id = f"ALERT-{uuid.uuid4().hex[:8].upper()}"
-    
-    # Log the crisis alert
-    try:
-        AgentLog.objects.create(
-            machine_id=alert.deviceId,
-            status="CRISIS",
-            risk_score=1.0,
-            recommendation=f"CRITICAL FAILURE: {alert.equipmentType} at {alert.location}. Immediate backup required. Alert ID: {alert_id}"
-        )
-    except Exception as e:
-        pass  # Continue even if logging fails
-    
-    return {
+    response = {
         "alertId": alert_id,
         "deviceId": alert.deviceId,
         "equipmentType": alert.equipmentType,
@@ -558,40 +679,43 @@ def trigger_crisis_alert(alert: CrisisAlertRequest):
         "timestamp": datetime.now().isoformat(),
         "message": f"Crisis alert {alert_id} triggered. Contingency agent activated."
     }
+    
+    # Log the crisis alert and queue its webhook notification in one transaction;
+    # delivery happens in the outbox dispatcher, not in this request.
+    try:
+        with transaction.atomic():
+            AgentLog.objects.create(
+                machine_id=alert.deviceId,
+                status="CRISIS",
+                risk_score=1.0,
+                recommendation=f"CRITICAL FAILURE: {alert.equipmentType} at {alert.location}. Immediate backup required. Alert ID: {alert_id}"
+            )
+            event_id = outbox.publish('crisis_alert', dict(response, failureType=alert.failureType)).id
+    except Exception as e:
+        # Nothing was logged or queued, so the caller must not treat the alert as raised
+        logging.getLogger('praxis.alerts').exception("crisis alert %s for %s failed", alert_id, alert.deviceId)
+        return JSONResponse(status_code=503, content={"error": str(e), "alertId": alert_id})
+
+    response["outboxEventId"] = event_id
+    return response
 
 
 @app.get('/api/maintenance/schedule')
-def get_maintenance_schedule(deviceId: Optional[str] = None):
+def get_maintenance_schedule(deviceId: Optional[str] = None, includePast: bool = False):
     """
-    Get maintenance schedule for equipment.
+    Get maintenance schedule for equipment (upcoming entries unless includePast).
     """
-    from datetime import datetime, timedelta
-    
-    # Simulated maintenance schedule
-    schedule = [
-        {
-            "scheduleId": "MAINT-001",
-            "deviceId": "MAC-101",
-            "equipmentType": "Patient Monitor",
-            "scheduledDate": (datetime.now() + timedelta(days=3)).isoformat(),
-            "type": "preventive",
-            "status": "scheduled",
-            "estimatedDuration_hours": 2
-        },
-        {
-            "scheduleId": "MAINT-002",
-            "deviceId": "MRI-001",
-            "equipmentType": "MRI Scanner",
-            "scheduledDate": (datetime.now() + timedelta(days=7)).isoformat(),
-            "type": "preventive",
-            "status": "scheduled",
-            "estimatedDuration_hours": 4
-        }
-    ]
-    
-    if deviceId:
-        schedule = [s for s in schedule if s["deviceId"] == deviceId]
-    
+    try:
+        from django.utils import timezone
+        entries = MaintenanceSchedule.objects.select_related('technician').filter(status='scheduled')
+        if deviceId:
+            entries = entries.filter(device_id=deviceId)
+        if not includePast:
+            entries = entries.filter(end__gt=timezone.now())
+        schedule = [scheduling.schedule_to_dict(e) for e in entries]
+    except Exception as e:
+        return {"error": str(e)}
+
     return {
         "schedule": schedule,
         "count": len(schedule)
@@ -604,22 +728,61 @@ def create_maintenance_schedule(
     equipmentType: str,
     scheduledDate: str,
     maintenanceType: str = "preventive",
-    estimatedDuration: int = 2
+    estimatedDuration: int = 2,
+    technicianId: Optional[str] = None
 ):
     """
     Create a new maintenance schedule entry.
+
+    If the requested slot collides with the device's or technician's calendar,
+    the entry is booked at the earliest conflict-free slot after it instead.
     """
-    import uuid
-    
-    schedule_id = f"MAINT-{uuid.uuid4().hex[:8].upper()}"
-    
+    from datetime import timedelta
+    from django.utils import timezone
+    from django.utils.dateparse import parse_datetime
+
+    requested = parse_datetime(scheduledDate)
+    if requested is None:
+        return {"error": f"Invalid scheduledDate: {scheduledDate}"}
+    if timezone.is_naive(requested):
+        requested = timezone.make_aware(requested)
+    duration = timedelta(hours=estimatedDuration)
+
+    try:
+        entry = scheduling.book_slot(deviceId, equipmentType, duration, requested, technician_id=technicianId,
+                                     maintenance_type=maintenanceType)
+    except Exception as e:
+        return {"error": str(e)}
+
+    result = scheduling.schedule_to_dict(entry)
+    result["requestedDate"] = requested.isoformat()
+    result["rescheduled"] = entry.start != requested
+    result["message"] = f"Maintenance scheduled successfully. ID: {entry.schedule_id}"
+    return result
+
+
+@app.post('/api/maintenance/plan')
+def plan_maintenance(
+    minPof: float = Query(default=0.1, ge=0.0, le=1.0),
+    window: int = Query(default=10, ge=2, le=1000),
+    lookbackHours: int = Query(default=24, ge=1),
+    dryRun: bool = False
+):
+    """
+    Batch-schedule predictive maintenance for every device whose PoF is rising.
+
+    Query params:
+      - minPof: only devices whose latest PoF is at least this (default: 0.1)
+      - window: readings per device used to measure the trend (default: 10)
+      - lookbackHours: how far back to read sensor history (default: 24)
+      - dryRun: compute the plan without saving it
+    """
+    try:
+        entries = scheduling.plan_rising(min_pof=minPof, window=window, lookback_hours=lookbackHours, dry_run=dryRun)
+    except Exception as e:
+        return {"error": str(e)}
     return {
-        "scheduleId": schedule_id,
-        "deviceId": deviceId,
-        "equipmentType": equipmentType,
-        "scheduledDate": scheduledDate,
-        "type": maintenanceType,
-        "status": "scheduled",
-        "estimatedDuration_hours": estimatedDuration,
-        "message": f"Maintenance scheduled successfully. ID: {schedule_id}"
-    }
\ No newline at end of file
+        "dryRun": dryRun,
+        "count": len(entries),
+        "schedule": [scheduling.schedule_to_dict(e) for e in entries]
+    }
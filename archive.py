@@ -0,0 +1,225 @@
+"""Cold archive tier for sensor history.
+
+Readings older than a cutoff are moved out of the hot `SensorReading` table
+into `ArchiveChunk` rows: per-machine runs of up to `chunk_size` samples,
+compressed with tscodec (delta-of-delta timestamps, Gorilla XOR floats).
+Chunks are written and the archived rows deleted in the same transaction,
+one batch at a time, so the job can be interrupted and rerun.
+
+`read_range` decodes only the chunks - and within them only the blocks -
+that overlap the requested time range. `history` stitches archived and hot
+readings together.
+
+Requires Django to be set up before import (see api.py).
+"""
+import time
+from datetime import timedelta
+from typing import TYPE_CHECKING
+
+import numpy as np
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import Length
+from django.utils import timezone
+
+import tscodec
+from core_db.models import ArchiveChunk, SensorReading
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+CHANNELS = ('vibration', 'temperature')
+DELETE_BATCH = 900  # stays under SQLite's bound-parameter limit
+
+
+def _to_us(timestamps) -> np.ndarray:
+    import pandas as pd
+    return pd.DatetimeIndex(timestamps).as_unit('us').asi8
+
+
+def _from_us(ts_us: np.ndarray):
+    import pandas as pd
+    return pd.to_datetime(ts_us, unit='us', utc=True)
+
+
+def build_chunks(machine_id: str, rows: list, chunk_size: int) -> list:
+    """Compress (timestamp, vibration, temperature) rows sorted by time into unsaved ArchiveChunks."""
+    ts = _to_us([r[0] for r in rows])
+    values = [np.array([r[i + 1] for r in rows], dtype=np.float64) for i in range(len(CHANNELS))]
+    chunks = []
+    for lo in range(0, len(rows), chunk_size):
+        hi = min(len(rows), lo + chunk_size)
+        index, ts_stream, col_streams = tscodec.encode_chunk(ts[lo:hi], [v[lo:hi] for v in values])
+        chunks.append(ArchiveChunk(
+            machine_id=machine_id,
+            start=rows[lo][0],
+            end=rows[hi - 1][0],
+            sample_count=hi - lo,
+            codec_version=tscodec.CODEC_VERSION,
+            block_index=index,
+            timestamps=ts_stream,
+            **dict(zip(CHANNELS, col_streams)),
+        ))
+    return chunks
+
+
+def archive_machine(machine_id: str, cutoff, chunk_size: int = 4096, batch_rows: int = 50000) -> int:
+    """Move one machine's readings older than `cutoff` into archive chunks. Returns rows archived."""
+    moved = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                SensorReading.objects.filter(machine_id=machine_id, timestamp__lt=cutoff)
+                .order_by('timestamp', 'id')
+                .values_list('id', 'timestamp', *CHANNELS)[:batch_rows]
+            )
+            if not rows:
+                return moved
+            ArchiveChunk.objects.bulk_create(build_chunks(machine_id, [r[1:] for r in rows], chunk_size))
+            ids = [r[0] for r in rows]
+            for lo in range(0, len(ids), DELETE_BATCH):
+                SensorReading.objects.filter(id__in=ids[lo:lo + DELETE_BATCH]).delete()
+        moved += len(rows)
+
+
+def archive_aged(older_than: timedelta, machine_ids=None, chunk_size: int = 4096, batch_rows: int = 50000,
+                 progress=None) -> dict:
+    """Archive every machine's readings older than `older_than`."""
+    cutoff = timezone.now() - older_than
+    if machine_ids is None:
+        machine_ids = list(
+            SensorReading.objects.filter(timestamp__lt=cutoff).order_by()
+            .values_list('machine_id', flat=True).distinct()
+        )
+    started = time.perf_counter()
+    total = 0
+    for i, machine_id in enumerate(machine_ids, 1):
+        total += archive_machine(machine_id, cutoff, chunk_size, batch_rows)
+        if progress:
+            progress(i, len(machine_ids), total, time.perf_counter() - started)
+    return {'machines': len(machine_ids), 'rows': total, 'seconds': time.perf_counter() - started,
+            'cutoff': cutoff}
+
+
+def read_range(machine_id: str, start=None, end=None) -> 'pd.DataFrame':
+    """Archived readings for `machine_id` with start <= timestamp <= end, as a DataFrame."""
+    import pandas as pd
+
+    chunks = ArchiveChunk.objects.filter(machine_id=machine_id)
+    if start is not None:
+        chunks = chunks.filter(end__gte=start)
+    if end is not None:
+        chunks = chunks.filter(start__lte=end)
+    start_us = int(_to_us([start])[0]) if start is not None else None
+    end_us = int(_to_us([end])[0]) if end is not None else None
+
+    ts_parts, col_parts = [], [[] for _ in CHANNELS]
+    for chunk in chunks.order_by('start'):
+        ts, cols = tscodec.decode_range(
+            bytes(chunk.block_index), bytes(chunk.timestamps),
+            [bytes(getattr(chunk, c)) for c in CHANNELS], start_us, end_us,
+        )
+        ts_parts.append(ts)
+        for i, col in enumerate(cols):
+            col_parts[i].append(col)
+    if not ts_parts:
+        return pd.DataFrame(columns=['timestamp', *CHANNELS])
+    data = {'timestamp': _from_us(np.concatenate(ts_parts))}
+    for name, parts in zip(CHANNELS, col_parts):
+        data[name] = np.concatenate(parts)
+    return pd.DataFrame(data)
+
+
+def history(machine_id: str, start=None, end=None) -> 'pd.DataFrame':
+    """Archived plus hot readings for `machine_id` in [start, end], oldest first."""
+    import pandas as pd
+
+    hot = SensorReading.objects.filter(machine_id=machine_id)
+    if start is not None:
+        hot = hot.filter(timestamp__gte=start)
+    if end is not None:
+        hot = hot.filter(timestamp__lte=end)
+    hot_df = pd.DataFrame.from_records(
+        list(hot.order_by('timestamp').values_list('timestamp', *CHANNELS)), columns=['timestamp', *CHANNELS]
+    )
+    archived = read_range(machine_id, start, end)
+    if archived.empty:
+        return hot_df
+    if hot_df.empty:
+        return archived
+    return pd.concat([archived, hot_df], ignore_index=True).sort_values('timestamp', kind='stable', ignore_index=True)
+
+
+# ============================================
+# Reporting
+# ============================================
+
+def raw_bytes_per_row(model=SensorReading):
+    """On-disk bytes per `model` row including indexes, where the backend can tell us."""
+    table = model._meta.db_table
+    count = model.objects.count()
+    if not count:
+        return None
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute("SELECT pg_total_relation_size(%s)", [table])
+            return cursor.fetchone()[0] / count
+        if connection.vendor == 'sqlite':
+            try:
+                cursor.execute(
+                    "SELECT SUM(pgsize) FROM dbstat WHERE name = %s OR name IN "
+                    "(SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = %s)", [table, table]
+                )
+            except Exception:
+                return None  # SQLite built without DBSTAT
+            size = cursor.fetchone()[0]
+            return size / count if size else None
+    return None
+
+
+def archive_stats() -> dict:
+    totals = ArchiveChunk.objects.aggregate(
+        chunks=Count('id'),
+        samples=Sum('sample_count'),
+        bytes=Sum(Length('block_index') + Length('timestamps') + Length('vibration') + Length('temperature')),
+    )
+    samples, stored = totals['samples'] or 0, totals['bytes'] or 0
+    return {'chunks': totals['chunks'], 'samples': samples, 'bytes': stored,
+            'bytes_per_sample': stored / samples if samples else None}
+
+
+def scan_benchmark(machines: int = 5) -> list:
+    """Time archive range scans against reading the same number of hot rows through the ORM."""
+    results = []
+    ids = list(ArchiveChunk.objects.order_by().values_list('machine_id', flat=True).distinct()[:machines])
+    busiest = SensorReading.objects.values('machine_id').annotate(n=Count('id')).order_by('-n').first()
+    for machine_id in ids:
+        t = time.perf_counter()
+        archived = read_range(machine_id)
+        archive_s = time.perf_counter() - t
+
+        # A time range covering the middle half of the archive, to show block skipping.
+        n = len(archived)
+        part_s = None
+        if n >= 4:
+            lo, hi = archived['timestamp'].iloc[n // 4], archived['timestamp'].iloc[3 * n // 4]
+            t = time.perf_counter()
+            read_range(machine_id, lo.to_pydatetime(), hi.to_pydatetime())
+            part_s = time.perf_counter() - t
+
+        # Same machine's remaining hot rows, or the busiest machine's once it has been fully archived
+        hot = SensorReading.objects.filter(machine_id=machine_id)
+        if not hot.exists() and busiest:
+            hot = SensorReading.objects.filter(machine_id=busiest['machine_id'])
+        t = time.perf_counter()
+        hot_rows = len(list(hot.order_by('-timestamp').values_list('timestamp', *CHANNELS)[:n]))
+        raw_s = time.perf_counter() - t
+        results.append({
+            'machine_id': machine_id,
+            'archived_samples': n,
+            'archive_scan_s': archive_s,
+            'archive_half_range_s': part_s,
+            'raw_rows': hot_rows,
+            'raw_scan_s': raw_s,
+        })
+    return results
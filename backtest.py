@@ -0,0 +1,242 @@
+"""Historical backtesting of PoF thresholds and alert rules.
+
+Replays each machine's stored history through `pdm.compute_pof_array` and an
+alert rule, for every point of a parameter grid at once, and scores the
+alerts against known failures:
+
+  - vib_thresh / temp_thresh: the PoF model thresholds (defaults 80 / 90);
+  - alert_at: PoF at or above which a reading is hot;
+  - persistence: consecutive hot readings needed before alerting;
+  - rearm_s: an alert opens an episode; the next alert needs rearm_s
+    seconds without a hot streak first (same dedup as triggers.py).
+
+An alert counts as a detection when it falls in the `horizon` before a
+failure (default 72 h, the workflow's time window); the lead time is from
+the first such alert to the failure. Every other alert is a false alarm.
+Failures come from `generate_fleet --events-out` (machine_id,
+failure_time); without them only alert counts and rates are reported.
+
+Evaluation is NumPy over a (grid, readings) matrix per machine: the PoF is
+computed once per distinct threshold pair, persistence uses a cumulative
+sum, and episode dedup a running maximum, so a bigger grid costs array
+width rather than Python loops. Machines are fanned out over a process pool;
+each worker loads its machines' history itself (history store when
+available, else archive + hot rows, see downsample.load_range).
+
+Requires Django to be set up before import (see api.py).
+"""
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import downsample
+import pdm
+
+GRID_KEYS = ('vib_thresh', 'temp_thresh', 'alert_at', 'persistence', 'rearm_s')
+DEFAULT_GRID = {
+    'vib_thresh': [60.0, 70.0, 80.0, 90.0],
+    'temp_thresh': [80.0, 90.0, 100.0],
+    'alert_at': [0.02, 0.05, 0.1, 0.15],
+    'persistence': [1, 3],
+    'rearm_s': [3600.0],
+}
+US = 1_000_000
+# Readings x grid rows evaluated per block, to bound memory on long histories
+BLOCK_CELLS = 4_000_000
+
+
+def parameter_grid(spec: dict = None) -> dict:
+    """Cartesian product of `spec` (missing keys use DEFAULT_GRID) as aligned NumPy arrays."""
+    spec = {**DEFAULT_GRID, **(spec or {})}
+    if any(int(k) != k or k < 1 for k in spec['persistence']):
+        raise ValueError(f"persistence must be whole numbers >= 1, got {spec['persistence']}")
+    rows = list(itertools.product(*(spec[k] for k in GRID_KEYS)))
+    return {k: np.array([r[i] for r in rows], dtype=np.float64) for i, k in enumerate(GRID_KEYS)}
+
+
+def load_events(path: str) -> dict:
+    """machine_id -> sorted failure times (int64 us) from a failure-events JSON file."""
+    import pandas as pd
+
+    with open(path, encoding='utf-8') as fh:
+        events = json.load(fh)
+    out = {}
+    for event in events:
+        ts = pd.Timestamp(event['failure_time'])
+        ts = ts.tz_localize('UTC') if ts.tzinfo is None else ts.tz_convert('UTC')
+        out.setdefault(event['machine_id'], []).append(ts.value // 1000)
+    return {m: np.sort(np.array(v, dtype=np.int64)) for m, v in out.items()}
+
+
+# ============================================
+# Vectorized evaluation
+# ============================================
+
+def alert_matrix(ts, vibration, temperature, grid: dict) -> np.ndarray:
+    """Boolean (grid rows, readings) matrix: True where that parameter set raises an alert."""
+    n, g = len(ts), len(grid['alert_at'])
+    if n == 0:
+        return np.zeros((g, 0), dtype=bool)
+    t = np.asarray(ts, dtype=np.int64)
+
+    # PoF once per distinct threshold pair
+    pairs, pair_idx = np.unique(np.stack([grid['vib_thresh'], grid['temp_thresh']], axis=1), axis=0,
+                                return_inverse=True)
+    pof = pdm.compute_pof_array(vibration[None, :], temperature[None, :], pairs[:, :1], pairs[:, 1:])
+    hot = pof[pair_idx.ravel()] >= grid['alert_at'][:, None]
+
+    # Sustained: the last `persistence` readings were all hot
+    sustained = np.zeros_like(hot)
+    counts = np.concatenate([np.zeros((g, 1), dtype=np.int64), np.cumsum(hot, axis=1)], axis=1)
+    for k in np.unique(grid['persistence']).astype(int):
+        if k > n:
+            continue
+        rows = grid['persistence'] == k
+        sustained[rows, k - 1:] = counts[rows, k:] - counts[rows, :-k] == k
+
+    # Episode dedup: alert only if the previous sustained reading is more than rearm_s back
+    last = np.where(sustained, t[None, :], np.iinfo(np.int64).min // 2)
+    np.maximum.accumulate(last, axis=1, out=last)
+    previous = np.concatenate([np.full((g, 1), np.iinfo(np.int64).min // 2), last[:, :-1]], axis=1)
+    rearm = (grid['rearm_s'] * US).astype(np.int64)[:, None]
+    return sustained & (t[None, :] - previous > rearm)
+
+
+def score_machine(ts, alerts: np.ndarray, failures, horizon_s: float) -> dict:
+    """Alert counts, detections and lead times per grid row for one machine."""
+    g = alerts.shape[0]
+    t = np.asarray(ts, dtype=np.int64)
+    in_window = np.zeros(len(t), dtype=bool)
+    leads = np.full((g, len(failures)), np.nan)
+    horizon = int(horizon_s * US)
+    for j, fail in enumerate(failures):
+        lo = np.searchsorted(t, fail - horizon, side='left')
+        hi = np.searchsorted(t, fail, side='right')
+        in_window[lo:hi] = True
+        window = alerts[:, lo:hi]
+        hit = window.any(axis=1)
+        first = lo + window.argmax(axis=1)
+        leads[hit, j] = (fail - t[first[hit]]) / US
+    total = alerts.sum(axis=1)
+    return {
+        'alerts': total,
+        'false_alerts': total - alerts[:, in_window].sum(axis=1),
+        'leads': leads,
+    }
+
+
+def _evaluate(ts, columns, grid: dict, failures, horizon_s: float) -> dict:
+    g = len(grid['alert_at'])
+    step = max(1, BLOCK_CELLS // max(1, len(ts)))
+    parts = []
+    for lo in range(0, g, step):
+        block = {k: v[lo:lo + step] for k, v in grid.items()}
+        alerts = alert_matrix(ts, np.asarray(columns['vibration']), np.asarray(columns['temperature']), block)
+        parts.append(score_machine(ts, alerts, failures, horizon_s))
+    return {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+
+
+# ============================================
+# Process pool
+# ============================================
+
+_worker = {}
+
+
+def _init_worker(path: list, grid: dict, events: dict, start, end, horizon_s: float):
+    sys.path[:] = path
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+    _worker.update(grid=grid, events=events, start=start, end=end, horizon_s=horizon_s)
+
+
+def _run_machines(machine_ids: list) -> tuple:
+    g = len(_worker['grid']['alert_at'])
+    totals = {'alerts': np.zeros(g), 'false_alerts': np.zeros(g)}
+    leads, readings, span_s = [], 0, 0.0
+    for machine_id in machine_ids:
+        ts, columns, _ = downsample.load_range(machine_id, _worker['start'], _worker['end'])
+        if len(ts) == 0:
+            continue
+        ts = np.asarray(ts)
+        failures = _worker['events'].get(machine_id, np.empty(0, dtype=np.int64))
+        # Failures outside the replayed history can't be scored
+        failures = failures[(failures >= ts[0]) & (failures <= ts[-1])]
+        result = _evaluate(ts, columns, _worker['grid'], failures, _worker['horizon_s'])
+        totals['alerts'] += result['alerts']
+        totals['false_alerts'] += result['false_alerts']
+        leads.append(result['leads'])
+        readings += len(ts)
+        span_s += (int(ts[-1]) - int(ts[0])) / US
+    leads = np.concatenate(leads, axis=1) if leads else np.empty((g, 0))
+    return totals, leads, readings, span_s
+
+
+def run(machine_ids: list, grid: dict, events: dict = None, start=None, end=None, horizon_s: float = 72 * 3600,
+        workers: int = None, chunk: int = 8) -> dict:
+    """Backtest `grid` over `machine_ids`; returns {'report': DataFrame, 'readings', 'elapsed', ...}."""
+    import pandas as pd
+    from django.db import connections
+
+    events = events or {}
+    workers = workers or os.cpu_count() or 1
+    g = len(grid['alert_at'])
+    totals = {'alerts': np.zeros(g), 'false_alerts': np.zeros(g)}
+    leads, readings, span_s = [], 0, 0.0
+
+    started = time.perf_counter()
+    batches = [machine_ids[i:i + chunk] for i in range(0, len(machine_ids), chunk)]
+    init = (list(sys.path), grid, events, start, end, horizon_s)
+    if workers <= 1:
+        _init_worker(*init)
+        results = map(_run_machines, batches)
+        pool = None
+    else:
+        connections.close_all()  # forked workers must open their own
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init)
+        results = pool.map(_run_machines, batches)
+    try:
+        for part, part_leads, part_readings, part_span in results:
+            for key in totals:
+                totals[key] += part[key]
+            leads.append(part_leads)
+            readings += part_readings
+            span_s += part_span
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    elapsed = time.perf_counter() - started
+
+    leads = np.concatenate(leads, axis=1) if leads else np.empty((g, 0))
+    failures = leads.shape[1]
+    detected = (~np.isnan(leads)).sum(axis=1)
+    report = pd.DataFrame({k: grid[k] for k in GRID_KEYS})
+    report['persistence'] = report['persistence'].astype(int)
+    report['alerts'] = totals['alerts'].astype(int)
+    report['false_alerts'] = totals['false_alerts'].astype(int)
+    report['alerts_per_machine_day'] = totals['alerts'] / max(span_s / 86400, 1e-9)
+    report['detected'] = detected
+    report['missed'] = failures - detected
+    report['recall'] = detected / failures if failures else np.nan
+    with np.errstate(all='ignore'):
+        true_alerts = totals['alerts'] - totals['false_alerts']
+        report['precision'] = np.where(totals['alerts'] > 0, true_alerts / np.maximum(totals['alerts'], 1), np.nan)
+        hits = ~np.isnan(leads)
+        report['lead_median_h'] = [np.median(row[m]) / 3600 if m.any() else np.nan for row, m in zip(leads, hits)]
+        report['lead_min_h'] = [row[m].min() / 3600 if m.any() else np.nan for row, m in zip(leads, hits)]
+    return {
+        'report': report,
+        'machines': len(machine_ids),
+        'failures': failures,
+        'readings': readings,
+        'elapsed': elapsed,
+        'workers': workers,
+    }
@@ -59,6 +59,35 @@ def load_data_from_db(limit=1000):
         print(f"Error loading data from DB: {e}")
         return pd.DataFrame(columns=["timestamp", "machine_id", "vibration", "temperature"])
 
+def load_series(machine_id, hours=None, points=1000):
+    """Downsampled chart series from the API (LTTB); None if the API is unavailable."""
+    params = {'points': points}
+    if hours:
+        params['from'] = (pd.Timestamp.now(tz='UTC') - pd.Timedelta(hours=hours)).isoformat()
+    try:
+        resp = requests.get(f'http://127.0.0.1:8000/api/sensor-readings/{machine_id}/series', params=params, timeout=5)
+        body = resp.json()
+        if resp.status_code != 200 or 'data' not in body:
+            return None
+    except Exception:
+        return None
+    series = pd.DataFrame(body['data'])
+    series['timestamp'] = pd.to_datetime(series['timestamp'])
+    return series
+
+def load_top_risk(k=25):
+    """Riskiest machines fleet-wide from the API's risk index; None if the API is unavailable."""
+    try:
+        resp = requests.get('http://127.0.0.1:8000/api/risk/top', params={'k': k}, timeout=3)
+        body = resp.json()
+        if resp.status_code != 200 or 'data' not in body:
+            return None
+    except Exception:
+        return None
+    top = pd.DataFrame(body['data'], columns=['machine_id', 'timestamp', 'vibration', 'temperature', 'pof',
+                                              'equipmentType', 'location'])
+    return top.rename(columns={'timestamp': 'last_seen', 'pof': 'PoF'}).round({'vibration': 1, 'temperature': 1})
+
 def machines_from_df(df):
     if df.empty:
         return []
@@ -81,6 +110,7 @@ with col_right:
     st.header("Controls")
     vib_threshold = st.number_input("Vibration alert threshold", value=80.0, step=0.1)
     temp_threshold = st.number_input("Temperature alert threshold", value=90.0, step=0.1)
+    top_k = st.number_input("Machines in risk overview", min_value=1, max_value=1000, value=25, step=1)
     auto_trigger = st.checkbox("Auto-trigger AI when PoF > threshold", value=False)
     n8n_url = st.text_input("n8n Webhook URL (optional)", value=os.getenv("N8N_WEBHOOK_URL", ""))
     if st.button("🚨 TRIGGER AI TEAM"):
@@ -121,25 +151,34 @@ with col_left:
     else:
         # Show overview table of machines with PoF
         machines = machines_from_df(df)
-        rows = []
-        for m in machines:
-            sub = df[df['machine_id'] == m].tail(5)
-            latest = sub.iloc[-1]
-            pof = compute_pof(latest['vibration'], latest['temperature'], vib_threshold, temp_threshold)
-            rows.append({
-                'machine_id': m,
-                'last_seen': latest['timestamp'],
-                'vibration': round(latest['vibration'],1),
-                'temperature': round(latest['temperature'],1),
-                'PoF': pof,
-            })
-        overview = pd.DataFrame(rows)
-        st.dataframe(overview.sort_values('PoF', ascending=False).reset_index(drop=True))
+        # The API's risk index scores with the default 80/90 thresholds; other thresholds are computed here
+        overview = load_top_risk(int(top_k)) if (vib_threshold, temp_threshold) == (80.0, 90.0) else None
+        if overview is None:
+            rows = []
+            for m in machines:
+                sub = df[df['machine_id'] == m].tail(5)
+                latest = sub.iloc[-1]
+                pof = compute_pof(latest['vibration'], latest['temperature'], vib_threshold, temp_threshold)
+                rows.append({
+                    'machine_id': m,
+                    'last_seen': latest['timestamp'],
+                    'vibration': round(latest['vibration'],1),
+                    'temperature': round(latest['temperature'],1),
+                    'PoF': pof,
+                })
+            overview = pd.DataFrame(rows).sort_values('PoF', ascending=False).head(int(top_k))
+        st.dataframe(overview.reset_index(drop=True))
 
         sel = st.selectbox("Select machine to inspect", options=machines)
         if sel:
                 sel_df = df[df['machine_id']==sel].sort_values('timestamp')
-                st.line_chart(sel_df.set_index('timestamp')[['vibration','temperature']])
+                ranges = {'Last hour': 1, 'Last 24 hours': 24, 'Last 7 days': 24 * 7, 'All history': None}
+                span = st.selectbox("Chart range", options=list(ranges), index=1)
+                # Server-side LTTB keeps the chart to ~1000 points over any range
+                chart_df = load_series(sel, ranges[span])
+                if chart_df is None:
+                    chart_df = sel_df
+                st.line_chart(chart_df.set_index('timestamp')[['vibration','temperature']])
                 st.subheader("Recent readings")
                 st.table(sel_df.tail(10).reset_index(drop=True))
                 # compute latest PoF via API (preferred) with local fallback
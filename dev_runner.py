@@ -2,11 +2,24 @@
 
 Run from project root:
     python dev_runner.py
+    python dev_runner.py --prod --workers 8 [--ui]
 
 This script spawns three subprocesses, forwards their output with prefixes,
 and attempts a graceful shutdown on Ctrl+C.
+
+`--prod` instead runs N API worker processes (no --reload) sharing one
+listening socket, each with its own warmed caches and DB connections (see
+serving.py). A supervisor restarts workers that exit or whose heartbeat goes
+stale, with exponential backoff, drains them gracefully on shutdown and
+prints per-worker load every few seconds. On platforms without fd passing
+(Windows) it falls back to `uvicorn --workers N`.
 """
+import argparse
+import json
+import signal
+import socket
 import subprocess
+import tempfile
 import threading
 import sys
 import os
@@ -23,8 +36,9 @@ def stream_output(pipe, prefix):
         pass
 
 
-def start_process(name, cmd, cwd=None):
-    proc = subprocess.Popen(cmd, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+def start_process(name, cmd, cwd=None, env=None, pass_fds=()):
+    proc = subprocess.Popen(cmd, cwd=cwd, env=env, pass_fds=pass_fds,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
     t_out = threading.Thread(target=stream_output, args=(proc.stdout, name), daemon=True)
     t_err = threading.Thread(target=stream_output, args=(proc.stderr, name+":ERR"), daemon=True)
     t_out.start()
@@ -32,7 +46,7 @@ def start_process(name, cmd, cwd=None):
     return proc
 
 
-def main():
+def run_dev():
     root = os.path.dirname(__file__)
     python = sys.executable
 
@@ -74,5 +88,203 @@ def main():
                 pass
 
 
+# ============================================
+# PRODUCTION MODE: supervised API workers
+# ============================================
+
+class Worker:
+    def __init__(self, index, heartbeat_path):
+        self.index = index
+        self.name = f"API{index}"
+        self.heartbeat_path = heartbeat_path
+        self.proc = None
+        self.started = 0.0
+        self.restarts = 0
+        self.failures = 0
+        self.next_start = 0.0
+        self.last_requests = 0
+        self.last_report = 0.0
+        self.kill_at = None
+        self.stop_reason = None
+
+    def heartbeat(self):
+        try:
+            with open(self.heartbeat_path, encoding='utf-8') as fh:
+                beat = json.load(fh)
+        except (OSError, ValueError):
+            return None
+        # Ignore a heartbeat left behind by the previous process in this slot
+        return beat if self.proc is not None and beat.get('pid') == self.proc.pid else None
+
+
+class Supervisor:
+    def __init__(self, args, root):
+        self.args = args
+        self.root = root
+        self.stopping = threading.Event()
+        self.state_dir = tempfile.mkdtemp(prefix='praxis-workers-')
+        self.workers = [Worker(i, os.path.join(self.state_dir, f"worker-{i}.json")) for i in range(args.workers)]
+        self.sock = None
+
+    def bind(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((self.args.host, self.args.port))
+        self.sock.listen(2048)
+        self.sock.set_inheritable(True)
+
+    def spawn(self, worker):
+        env = dict(os.environ)
+        env['PRAXIS_WORKER_ID'] = str(worker.index)
+        env['PRAXIS_HEARTBEAT_FILE'] = worker.heartbeat_path
+        cmd = [sys.executable, "-m", "uvicorn", "api:app", "--fd", str(self.sock.fileno()),
+               "--timeout-graceful-shutdown", str(self.args.drain_timeout), "--no-access-log"]
+        worker.proc = start_process(worker.name, cmd, cwd=self.root, env=env, pass_fds=(self.sock.fileno(),))
+        worker.started = time.time()
+        worker.kill_at = None
+        worker.stop_reason = None
+        worker.last_requests = 0
+        worker.last_report = worker.started
+        print(f"[SUP] started {worker.name} pid {worker.proc.pid}")
+
+    def schedule_restart(self, worker, reason):
+        now = time.time()
+        if now - worker.started > self.args.stable_after:
+            worker.failures = 0
+        worker.failures += 1
+        delay = min(self.args.max_backoff, self.args.backoff * 2 ** (worker.failures - 1))
+        worker.next_start = now + delay
+        worker.restarts += 1
+        worker.proc = None
+        print(f"[SUP] {worker.name} {reason}; restarting in {delay:.1f}s (restart #{worker.restarts})")
+
+    def check(self, worker):
+        now = time.time()
+        if worker.proc is None:
+            if now >= worker.next_start:
+                self.spawn(worker)
+            return
+        code = worker.proc.poll()
+        if code is not None:
+            self.schedule_restart(worker, worker.stop_reason or f"exited with code {code}")
+            return
+        if worker.kill_at is not None:
+            # A hung worker may never act on SIGTERM; don't block the other workers on it.
+            if now >= worker.kill_at:
+                worker.proc.kill()
+            return
+        beat = worker.heartbeat()
+        last_seen = beat['ts'] if beat else worker.started
+        grace = self.args.health_timeout if beat else self.args.startup_timeout
+        if now - last_seen > grace:
+            print(f"[SUP] {worker.name} heartbeat stale for {now - last_seen:.1f}s; stopping it")
+            worker.proc.terminate()
+            worker.kill_at = now + self.args.kill_timeout
+            worker.stop_reason = "failed health check"
+
+    def report(self):
+        now = time.time()
+        total_rate = 0.0
+        lines = []
+        for w in self.workers:
+            beat = w.heartbeat()
+            if w.proc is None or beat is None:
+                state = 'restarting' if w.proc is None else 'starting'
+                lines.append(f"  {w.name:<6} {state:<10} restarts {w.restarts}")
+                continue
+            rate = (beat['requests'] - w.last_requests) / max(now - w.last_report, 1e-6)
+            w.last_requests, w.last_report = beat['requests'], now
+            total_rate += rate
+            lines.append(f"  {w.name:<6} pid {beat['pid']:<7} up {now - w.started:>7.0f}s  "
+                         f"req {beat['requests']:>8} ({rate:>7.1f}/s)  in-flight {beat['in_flight']:>3}  "
+                         f"agents {beat['agent_queue']}  restarts {w.restarts}")
+        print(f"[SUP] {len(self.workers)} workers, {total_rate:.1f} req/s total")
+        for line in lines:
+            print(line)
+
+    def run(self):
+        self.bind()
+        print(f"[SUP] listening on {self.args.host}:{self.args.port} with {len(self.workers)} workers "
+              f"(state in {self.state_dir})")
+        for w in self.workers:
+            self.spawn(w)
+        next_report = time.time() + self.args.report_interval
+        try:
+            while not self.stopping.wait(0.5):
+                for w in self.workers:
+                    self.check(w)
+                if time.time() >= next_report:
+                    self.report()
+                    next_report = time.time() + self.args.report_interval
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        print(f"[SUP] draining {len(self.workers)} workers (up to {self.args.drain_timeout}s)...")
+        alive = [w.proc for w in self.workers if w.proc is not None and w.proc.poll() is None]
+        for proc in alive:
+            proc.terminate()
+        deadline = time.time() + self.args.drain_timeout + 5
+        for proc in alive:
+            try:
+                proc.wait(max(0.0, deadline - time.time()))
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        if self.sock is not None:
+            self.sock.close()
+        print("[SUP] all workers stopped")
+
+
+def run_prod(args):
+    root = os.path.dirname(os.path.abspath(__file__))
+    extra = []
+    if args.ui:
+        extra.append(start_process("UI", [sys.executable, "-m", "streamlit", "run", "dashboard.py"], cwd=root))
+
+    try:
+        if os.name != 'posix':
+            # No fd inheritance for a shared listening socket: let uvicorn's own supervisor handle it.
+            print("[SUP] shared-socket supervisor needs POSIX; falling back to uvicorn --workers "
+                  "(no heartbeat restarts or load report)")
+            subprocess.call([sys.executable, "-m", "uvicorn", "api:app", "--host", args.host,
+                             "--port", str(args.port), "--workers", str(args.workers),
+                             "--timeout-graceful-shutdown", str(args.drain_timeout)], cwd=root)
+            return
+
+        supervisor = Supervisor(args, root)
+        signal.signal(signal.SIGTERM, lambda *_: supervisor.stopping.set())
+        try:
+            supervisor.run()
+        except KeyboardInterrupt:
+            pass
+    finally:
+        for p in extra:
+            if p.poll() is None:
+                p.terminate()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run PraxisGuard services.")
+    parser.add_argument('--prod', action='store_true', help='supervised multi-worker API (no simulator, no reload)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--ui', action='store_true', help='also run the Streamlit dashboard (prod mode)')
+    parser.add_argument('--health-timeout', type=float, default=10.0, help='seconds without a heartbeat before restart')
+    parser.add_argument('--startup-timeout', type=float, default=60.0, help='seconds allowed for the first heartbeat')
+    parser.add_argument('--drain-timeout', type=int, default=20, help='seconds to finish in-flight requests on stop')
+    parser.add_argument('--kill-timeout', type=float, default=5.0, help='seconds before SIGKILL for an unhealthy worker')
+    parser.add_argument('--backoff', type=float, default=1.0, help='first restart delay, doubled per crash')
+    parser.add_argument('--max-backoff', type=float, default=60.0)
+    parser.add_argument('--stable-after', type=float, default=60.0, help='uptime after which the backoff resets')
+    parser.add_argument('--report-interval', type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    if args.prod:
+        run_prod(args)
+    else:
+        run_dev()
+
+
 if __name__ == '__main__':
     main()
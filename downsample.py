@@ -0,0 +1,114 @@
+"""Shape-preserving downsampling of sensor series for charts.
+
+`lttb` is Largest-Triangle-Three-Buckets: it keeps the first and last point
+and, per bucket, the point forming the largest triangle with the previously
+kept point and the next bucket's average, so peaks and edges survive. The
+bucket loop is inherently sequential; the work inside each bucket is NumPy.
+`minmax` keeps each bucket's min and max and is fully vectorized.
+
+`series` picks the cheapest source for a machine's readings: the memory-mapped
+history store when it exists (zero-copy), else archived plus hot rows from the
+database (see archive.history).
+
+Requires Django to be set up before import (see api.py).
+"""
+import numpy as np
+
+import archive
+import historystore
+
+CHANNELS = ('vibration', 'temperature')
+METHODS = ('lttb', 'minmax')
+
+
+def _bucket_edges(n: int, buckets: int) -> np.ndarray:
+    # Interior points 1..n-2 split into `buckets` nearly equal ranges
+    return 1 + (np.arange(buckets + 1) * (n - 2)) // buckets
+
+
+def lttb(x, y, points: int) -> np.ndarray:
+    """Indices of the `points` samples LTTB keeps from (x, y), in order."""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if points >= n or points < 3:
+        return np.arange(n)
+
+    edges = _bucket_edges(n, points - 2)
+    # Averages of every bucket in one pass; the last point acts as the bucket after the last
+    sums_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1)
+    sums_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1)
+    sizes = np.diff(edges)
+    avg_x = np.append(sums_x / sizes, x[-1])
+    avg_y = np.append(sums_y / sizes, y[-1])
+
+    out = np.empty(points, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for b in range(points - 2):
+        lo, hi = edges[b], edges[b + 1]
+        ax, ay = x[a], y[a]
+        # Twice the triangle area; the constant factor doesn't change the argmax
+        area = np.abs((ax - avg_x[b + 1]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (avg_y[b + 1] - ay))
+        a = lo + int(np.argmax(area))
+        out[b + 1] = a
+    return out
+
+
+def minmax(y, points: int) -> np.ndarray:
+    """Indices of each bucket's min and max (about `points` samples), in order."""
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    buckets = points // 2
+    if points >= n or buckets < 1:
+        return np.arange(n)
+
+    starts = (np.arange(buckets) * n) // buckets
+    bucket = np.repeat(np.arange(buckets), np.diff(np.append(starts, n)))
+    keep = [np.array([0, n - 1])]
+    for extreme in (np.minimum, np.maximum):
+        # First position in each bucket that holds the bucket's extreme value
+        hits = np.flatnonzero(y == extreme.reduceat(y, starts)[bucket])
+        keep.append(hits[np.unique(bucket[hits], return_index=True)[1]])
+    return np.unique(np.concatenate(keep))
+
+
+def select(x, columns: dict, points: int, method: str = 'lttb') -> np.ndarray:
+    """Row indices to keep so every channel keeps its shape (union of per-channel picks).
+
+    The union can hold up to len(columns) * points rows.
+    """
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {', '.join(METHODS)}")
+    picks = [lttb(x, col, points) if method == 'lttb' else minmax(col, points) for col in columns.values()]
+    return np.unique(np.concatenate(picks)) if picks else np.arange(len(x))
+
+
+def load_range(machine_id: str, start, end) -> tuple:
+    """(timestamps as int64 us, {channel: values}, source name) for the range."""
+    if historystore.enabled() and historystore.has(machine_id):
+        view = historystore.window(machine_id, start, end)
+        return view['timestamp'], {c: view[c] for c in CHANNELS}, 'history'
+
+    df = archive.history(machine_id, start, end)
+    if df.empty:
+        return np.empty(0, dtype=np.int64), {c: np.empty(0) for c in CHANNELS}, 'db'
+    ts = df['timestamp'].dt.tz_convert('UTC').dt.as_unit('us').astype('int64').to_numpy()
+    return ts, {c: df[c].to_numpy(dtype=np.float64) for c in CHANNELS}, 'db'
+
+
+def series(machine_id: str, start=None, end=None, points: int = 1000, method: str = 'lttb') -> dict:
+    """Downsampled readings of `machine_id` in [start, end] for plotting."""
+    ts, columns, source = load_range(machine_id, start, end)
+    keep = select(ts, columns, points, method) if len(ts) else np.arange(0)
+    stamps = np.asarray(ts[keep]).astype('datetime64[us]')
+    data = {'timestamp': [f"{t}+00:00" for t in stamps.astype(str)]}
+    data.update({c: np.asarray(columns[c][keep]).tolist() for c in CHANNELS})
+    return {
+        'machine_id': machine_id,
+        'source': source,
+        'method': method,
+        'raw_points': int(len(ts)),
+        'points': int(len(keep)),
+        'data': data,
+    }
@@ -0,0 +1,197 @@
+"""Equipment metadata helpers shared by the API, scheduler and agents.
+
+Equipment types and error-code thresholds come from a JSON registry
+(`data/equipment_rules.json`, or `EQUIPMENT_RULES_PATH`):
+
+  - `prefixes` maps machine-ID prefixes to equipment types; lookups use a
+    longest-prefix trie, so `MRI-7` and `MRIX-7` can map to different types.
+  - `thresholds` gives per-type `{channel: {LEVEL: limit}}` rules, falling
+    back to `default` for types without their own entry. A reading above a
+    limit raises `<CHANNEL CODE>_<LEVEL>` (e.g. `VIB_HIGH`).
+
+`RuleSet` compiles the thresholds once into a (types x rules) matrix so a
+whole fleet's latest readings are checked with a few NumPy comparisons.
+
+Machine locations come from `data/machine_locations.json` (or
+`MACHINE_LOCATIONS_PATH`): `locations` maps machine-ID prefixes - a full ID
+is its own longest prefix - to a location name, with `default` for the rest.
+"""
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+import metrics
+
+DEFAULT_RULES_PATH = Path(__file__).resolve().parent / 'data' / 'equipment_rules.json'
+DEFAULT_LOCATIONS_PATH = Path(__file__).resolve().parent / 'data' / 'machine_locations.json'
+
+_type_cache_hit = metrics.cache_requests.labels_('equipment_type', 'hit')
+_type_cache_miss = metrics.cache_requests.labels_('equipment_type', 'miss')
+
+
+class PrefixTrie:
+    """Case-insensitive longest-prefix lookup over machine IDs."""
+
+    def __init__(self, mapping: dict = None):
+        self._root = {}
+        for prefix, value in (mapping or {}).items():
+            self.insert(prefix, value)
+
+    def insert(self, prefix: str, value):
+        node = self._root
+        for ch in prefix.upper():
+            node = node.setdefault(ch, {})
+        node[None] = value
+
+    def longest_match(self, key: str, default=None):
+        node = self._root
+        found = default
+        for ch in key.upper():
+            node = node.get(ch)
+            if node is None:
+                break
+            if None in node:
+                found = node[None]
+        return found
+
+
+class RuleSet:
+    """Per-equipment-type threshold rules compiled for vectorized evaluation."""
+
+    def __init__(self, config: dict):
+        self.default_type = config.get('default_type', 'MRI Scanner')
+        self.channels = config.get('channels', {})
+        self.prefixes = {p.upper(): t for p, t in config.get('prefixes', {}).items()}
+        self._trie = PrefixTrie(config.get('prefixes', {}))
+        self._type_cache = {}
+
+        thresholds = config.get('thresholds', {})
+        default_rules = thresholds.get('default', {})
+        # Every (channel, level) that appears for any type becomes a rule column.
+        rules = []
+        for per_type in thresholds.values():
+            for channel, levels in per_type.items():
+                for level in levels:
+                    if (channel, level) not in rules:
+                        rules.append((channel, level))
+        self.rules = rules
+        self.codes = np.array([f"{self.channels.get(c, c.upper())}_{level}" for c, level in rules], dtype=object)
+        self.rule_channels = [c for c, _ in rules]
+
+        self.types = [t for t in thresholds if t != 'default']
+        self._type_index = {t: i for i, t in enumerate(self.types)}
+        # Row len(types) holds the defaults for types with no entry of their own.
+        matrix = np.full((len(self.types) + 1, len(rules)), np.inf)
+        for row, per_type in enumerate([thresholds[t] for t in self.types] + [default_rules]):
+            for col, (channel, level) in enumerate(rules):
+                limit = per_type.get(channel, {}).get(level, default_rules.get(channel, {}).get(level))
+                if limit is not None:
+                    matrix[row, col] = float(limit)
+        self.thresholds = matrix
+
+    @classmethod
+    def from_file(cls, path) -> 'RuleSet':
+        with open(path, encoding='utf-8') as fh:
+            return cls(json.load(fh))
+
+    def equipment_type(self, machine_id: str) -> str:
+        cached = self._type_cache.get(machine_id)
+        if cached is None:
+            _type_cache_miss.inc()
+            cached = self._trie.longest_match(machine_id, self.default_type)
+            self._type_cache[machine_id] = cached
+        else:
+            _type_cache_hit.inc()
+        return cached
+
+    def prefix_rules(self, equipment_type: str) -> tuple:
+        """How to select `equipment_type`'s machines by ID prefix (e.g. in SQL).
+
+        Returns ([(prefix, [longer prefixes of other types to exclude])],
+        whether IDs matching no prefix at all belong to the type too).
+        """
+        wanted = equipment_type.lower()
+        rules = []
+        for prefix, type_name in sorted(self.prefixes.items()):
+            if type_name.lower() != wanted:
+                continue
+            excluded = [p for p, t in self.prefixes.items()
+                        if len(p) > len(prefix) and p.startswith(prefix) and t.lower() != wanted]
+            rules.append((prefix, sorted(excluded)))
+        return rules, self.default_type.lower() == wanted
+
+    def thresholds_for(self, equipment_type: str) -> dict:
+        row = self.thresholds[self._type_index.get(equipment_type, len(self.types))]
+        out = {}
+        for (channel, level), limit in zip(self.rules, row):
+            if np.isfinite(limit):
+                out.setdefault(channel, {})[level] = float(limit)
+        return out
+
+    def evaluate(self, equipment_types, readings: dict) -> list:
+        """Return the error codes raised by each device, in input order.
+
+        `equipment_types` is a sequence of type names; `readings` maps channel
+        name -> array of values aligned with it. Missing channels never fire.
+        """
+        n = len(equipment_types)
+        if n == 0:
+            return []
+        rows = np.fromiter((self._type_index.get(t, len(self.types)) for t in equipment_types), dtype=np.intp, count=n)
+        values = np.full((n, len(self.rules)), -np.inf)
+        for col, channel in enumerate(self.rule_channels):
+            if channel in readings:
+                values[:, col] = np.asarray(readings[channel], dtype=np.float64)
+        fired = values > self.thresholds[rows]
+
+        device_idx, rule_idx = np.nonzero(fired)
+        out = [[] for _ in range(n)]
+        for d, code in zip(device_idx.tolist(), self.codes[rule_idx].tolist()):
+            out[d].append(code)
+        return out
+
+
+_rules = None
+
+
+def get_rules() -> RuleSet:
+    """Return the process-wide rule set, loading it on first use."""
+    global _rules
+    if _rules is None:
+        _rules = RuleSet.from_file(os.getenv('EQUIPMENT_RULES_PATH', DEFAULT_RULES_PATH))
+    return _rules
+
+
+def reload_rules(path=None) -> RuleSet:
+    """Drop the cached rule set and load it again (optionally from `path`)."""
+    global _rules
+    _rules = RuleSet.from_file(path or os.getenv('EQUIPMENT_RULES_PATH', DEFAULT_RULES_PATH))
+    return _rules
+
+
+def equipment_type_for(machine_id: str) -> str:
+    """Derive the equipment type from a machine ID such as `VEN-204` or `MAC-101`."""
+    return get_rules().equipment_type(machine_id)
+
+
+_locations = None
+
+
+def _location_trie() -> tuple:
+    global _locations
+    if _locations is None:
+        path = os.getenv('MACHINE_LOCATIONS_PATH', DEFAULT_LOCATIONS_PATH)
+        config = {}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as fh:
+                config = json.load(fh)
+        _locations = (PrefixTrie(config.get('locations', {})), config.get('default', 'Unknown'))
+    return _locations
+
+
+def location_for(machine_id: str) -> str:
+    """Location of a machine from the location registry (longest matching ID prefix)."""
+    trie, default = _location_trie()
+    return trie.longest_match(machine_id, default)
@@ -0,0 +1,35 @@
+"""Fleet-wide reading queries shared by the API and background jobs.
+
+Requires Django to be set up before import (see api.py).
+"""
+from typing import TYPE_CHECKING
+
+from django.db import connection
+from django.db.models import OuterRef, Subquery
+
+from core_db.models import SensorReading
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+LATEST_COLUMNS = ['machine_id', 'vibration', 'temperature', 'timestamp']
+
+
+def latest_readings_qs():
+    """Queryset with the newest reading of every machine, in a single query.
+
+    Postgres uses DISTINCT ON over the (machine_id, -timestamp) index; other
+    backends use a correlated subquery against the same index.
+    """
+    if connection.vendor == 'postgresql':
+        return SensorReading.objects.order_by('machine_id', '-timestamp').distinct('machine_id')
+    newest = SensorReading.objects.filter(machine_id=OuterRef('machine_id')).order_by('-timestamp').values('id')[:1]
+    return SensorReading.objects.filter(id=Subquery(newest)).order_by('machine_id')
+
+
+def latest_readings() -> 'pd.DataFrame':
+    """Latest reading per machine as a DataFrame (machine_id, vibration, temperature, timestamp)."""
+    import pandas as pd
+
+    rows = latest_readings_qs().values_list(*LATEST_COLUMNS)
+    return pd.DataFrame.from_records(list(rows), columns=LATEST_COLUMNS)
@@ -0,0 +1,123 @@
+"""Synthetic fleet history generator for PraxisGuard capacity planning.
+
+Generates sensor histories for N machines across every equipment type, with
+per-type baselines, daily cycles, noise, occasional transient spikes and
+injected degradation-to-failure episodes. Output is produced in bounded
+chunks of machines so tens of millions of rows never sit in memory at once.
+
+Runs are fully determined by `seed`, so the same arguments always produce the
+same rows and the same ground-truth failure events (useful for benchmarks,
+regression tests and backtests).
+
+This module only needs NumPy/pandas; `manage.py generate_fleet` loads its
+output through `ingest.insert_readings`.
+"""
+from dataclasses import dataclass, asdict
+
+import numpy as np
+import pandas as pd
+
+# prefix -> (vibration mean, vibration sd, temperature mean, temperature sd)
+EQUIPMENT_PROFILES = {
+    'VEN': (35.0, 5.0, 55.0, 3.0),
+    'XR': (25.0, 4.0, 60.0, 4.0),
+    'CT': (45.0, 6.0, 65.0, 4.0),
+    'US': (15.0, 3.0, 45.0, 2.0),
+    'MAC': (20.0, 3.0, 45.0, 2.0),
+    'MRI': (30.0, 4.0, 50.0, 3.0),
+}
+
+FAILURE_MODES = ('bearing', 'overheat', 'combined')
+
+
+@dataclass
+class FailureEvent:
+    machine_id: str
+    mode: str
+    degradation_start: str
+    failure_time: str
+
+    def to_dict(self):
+        return asdict(self)
+
+
+def machine_ids(machines: int) -> list:
+    """Deterministic IDs cycling through every equipment type, e.g. VEN-00000, XR-00001."""
+    prefixes = list(EQUIPMENT_PROFILES)
+    return [f"{prefixes[i % len(prefixes)]}-{i:05d}" for i in range(machines)]
+
+
+def _machine_frame(rng, machine_id, times, interval_s, failure_rate, spike_rate, events):
+    prefix = machine_id.split('-', 1)[0]
+    vib_mu, vib_sd, temp_mu, temp_sd = EQUIPMENT_PROFILES[prefix]
+    n = len(times)
+
+    # Per-machine offset so units of the same type don't look identical.
+    vib_mu += rng.normal(0, vib_sd)
+    temp_mu += rng.normal(0, temp_sd)
+    seconds = (times - times[0]).total_seconds().to_numpy()
+    daily = np.sin(2 * np.pi * (seconds / 86400.0 + rng.random()))
+    vibration = vib_mu + 0.3 * vib_sd * daily + rng.normal(0, vib_sd * 0.5, n)
+    temperature = temp_mu + 0.5 * temp_sd * daily + rng.normal(0, temp_sd * 0.3, n)
+
+    spikes = rng.random(n) < spike_rate
+    vibration[spikes] += rng.uniform(20, 50, spikes.sum())
+
+    if n > 10 and rng.random() < failure_rate:
+        mode = FAILURE_MODES[rng.integers(len(FAILURE_MODES))]
+        fail_idx = int(rng.integers(int(n * 0.2), n))
+        ramp_len = max(2, min(fail_idx, int(rng.uniform(6, 72) * 3600 / interval_s)))
+        start_idx = fail_idx - ramp_len
+        progress = np.linspace(0.0, 1.0, ramp_len) ** 2
+        if mode in ('bearing', 'combined'):
+            vibration[start_idx:fail_idx] += progress * (110 - vib_mu)
+        if mode in ('overheat', 'combined'):
+            temperature[start_idx:fail_idx] += progress * (120 - temp_mu)
+        # Machine is repaired after failing and returns to baseline.
+        events.append(FailureEvent(
+            machine_id=machine_id,
+            mode=mode,
+            degradation_start=times[start_idx].isoformat(),
+            failure_time=times[fail_idx - 1].isoformat(),
+        ))
+
+    return vibration.clip(min=0.0), temperature
+
+
+def generate_fleet(machines: int, start, end, interval_s: int = 60, seed: int = 0,
+                   failure_rate: float = 0.1, spike_rate: float = 0.001, chunk_rows: int = 1_000_000):
+    """Yield (DataFrame, [FailureEvent]) chunks covering `machines` machines from `start` to `end`.
+
+    Each chunk holds whole machines and roughly `chunk_rows` rows, with columns
+    machine_id, vibration, temperature, timestamp (UTC).
+    """
+    start = pd.Timestamp(start)
+    end = pd.Timestamp(end)
+    start = start.tz_localize('UTC') if start.tzinfo is None else start.tz_convert('UTC')
+    end = end.tz_localize('UTC') if end.tzinfo is None else end.tz_convert('UTC')
+    times = pd.date_range(start, end, freq=pd.Timedelta(seconds=interval_s), inclusive='left')
+    if len(times) == 0:
+        return
+    naive_times = times.tz_localize(None).to_numpy()
+    per_chunk = max(1, chunk_rows // len(times))
+    ids = machine_ids(machines)
+    # One child generator per machine: output doesn't depend on chunk size.
+    seeds = np.random.SeedSequence(seed).spawn(machines)
+
+    for lo in range(0, machines, per_chunk):
+        chunk_ids = ids[lo:lo + per_chunk]
+        events = []
+        vib_parts, temp_parts = [], []
+        for offset, machine_id in enumerate(chunk_ids):
+            rng = np.random.default_rng(seeds[lo + offset])
+            vib, temp = _machine_frame(rng, machine_id, times, interval_s, failure_rate, spike_rate, events)
+            vib_parts.append(vib)
+            temp_parts.append(temp)
+        df = pd.DataFrame({
+            'machine_id': np.repeat(np.array(chunk_ids, dtype=object), len(times)),
+            'vibration': np.concatenate(vib_parts),
+            'temperature': np.concatenate(temp_parts),
+            'timestamp': np.tile(naive_times, len(chunk_ids)),
+        })
+        df['timestamp'] = df['timestamp'].dt.tz_localize('UTC')
+        yield df, events
@@ -0,0 +1,222 @@
+"""Process-pool PoF sweep over the whole fleet.
+
+`sweep()` scores every machine's recent readings in parallel:
+
+  1. the window (last `window_s` seconds) is loaded once and packed into
+     flat arrays - timestamps, vibration, temperature and per-machine row
+     offsets - in one `multiprocessing.shared_memory` block;
+  2. machines are split into shards; a worker gets only the block name,
+     the array lengths and its shard's (start, stop), attaches to the block
+     and scores its machines on zero-copy views, so no DataFrame is ever
+     pickled;
+  3. each shard returns one small float64 matrix (machines x FIELDS), and
+     the shards are stacked into one result in fleet order.
+
+Scorers are plain functions of one machine's (ts, vibration, temperature)
+arrays, registered in SCORERS by name so workers can look them up. The
+default `window` scorer goes beyond the latest-reading heuristic: PoF max
+and mean over the window, per-hour trends from a least-squares fit, a
+robust z-score of the latest vibration, and the PoF the trends project
+`horizon_h` ahead. `risk` is the larger of the current and projected PoF.
+Anything per-machine and CPU-bound (anomaly models, inference) fits the
+same slot.
+
+`persist()` writes machines at or above a risk level as AgentLog rows in
+one bulk insert. Loading and persisting need Django set up (see api.py);
+the worker side is plain NumPy.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+import pdm
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+FIELDS = ('readings', 'pof', 'pof_max', 'pof_mean', 'vib_trend_h', 'temp_trend_h', 'vib_z', 'pof_projected',
+          'risk')
+US = 1_000_000
+
+
+# ============================================
+# Scorers (run in the workers)
+# ============================================
+
+def _trend_per_hour(hours, values) -> float:
+    if len(values) < 3 or hours[-1] == hours[0]:
+        return 0.0
+    centered = hours - hours.mean()
+    return float(np.dot(centered, values - values.mean()) / np.dot(centered, centered))
+
+
+def window_score(ts, vibration, temperature, horizon_h: float = 24.0) -> tuple:
+    """FIELDS for one machine's window (arrays sorted by time)."""
+    pof = pdm.compute_pof_array(vibration, temperature)
+    hours = (ts - ts[-1]) / (3600 * US)
+    vib_trend = _trend_per_hour(hours, vibration)
+    temp_trend = _trend_per_hour(hours, temperature)
+    median = np.median(vibration)
+    mad = np.median(np.abs(vibration - median)) * 1.4826
+    vib_z = float((vibration[-1] - median) / mad) if mad > 0 else 0.0
+    # Only worsening trends are projected forward
+    projected = float(pdm.compute_pof_array(vibration[-1] + max(vib_trend, 0.0) * horizon_h,
+                                            temperature[-1] + max(temp_trend, 0.0) * horizon_h))
+    return (len(ts), float(pof[-1]), float(pof.max()), float(pof.mean()), vib_trend, temp_trend, vib_z,
+            projected, max(float(pof[-1]), projected))
+
+
+SCORERS = {'window': window_score}
+
+
+def _attach(name: str):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+def _views(buf, rows: int, machines: int) -> tuple:
+    offsets = np.ndarray((machines + 1,), dtype=np.int64, buffer=buf)
+    base = offsets.nbytes
+    ts = np.ndarray((rows,), dtype=np.int64, buffer=buf, offset=base)
+    vib = np.ndarray((rows,), dtype=np.float64, buffer=buf, offset=base + 8 * rows)
+    temp = np.ndarray((rows,), dtype=np.float64, buffer=buf, offset=base + 16 * rows)
+    return offsets, ts, vib, temp
+
+
+def _score_shard(name: str, rows: int, machines: int, lo: int, hi: int, scorer: str, horizon_h: float):
+    shm = _attach(name)
+    try:
+        offsets, ts, vib, temp = _views(shm.buf, rows, machines)
+        score = SCORERS[scorer]
+        out = np.full((hi - lo, len(FIELDS)), np.nan)
+        for i in range(lo, hi):
+            a, b = offsets[i], offsets[i + 1]
+            if b > a:
+                out[i - lo] = score(ts[a:b], vib[a:b], temp[a:b], horizon_h)
+        del offsets, ts, vib, temp  # views must go before the buffer closes
+        return out
+    finally:
+        shm.close()
+
+
+# ============================================
+# Loading and the sweep
+# ============================================
+
+def load_window(window_s: float, now=None) -> tuple:
+    """(machine_ids, offsets, ts_us, vibration, temperature) for readings in the last `window_s` seconds."""
+    from datetime import timedelta
+
+    import pandas as pd
+    from django.utils import timezone
+
+    from core_db.models import SensorReading
+
+    now = now or timezone.now()
+    rows = list(
+        SensorReading.objects.filter(timestamp__gte=now - timedelta(seconds=window_s))
+        .order_by('machine_id', 'timestamp').values_list('machine_id', 'timestamp', 'vibration', 'temperature')
+    )
+    if not rows:
+        return [], np.zeros(1, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0), np.empty(0)
+    machine_col, ts_col, vib_col, temp_col = zip(*rows)
+    machine_col = np.array(machine_col, dtype=object)
+    starts = np.flatnonzero(np.r_[True, machine_col[1:] != machine_col[:-1]])
+    offsets = np.append(starts, len(machine_col)).astype(np.int64)
+    ts_us = pd.to_datetime(list(ts_col), utc=True).as_unit('us').asi8
+    return (machine_col[starts].tolist(), offsets, ts_us, np.array(vib_col, dtype=np.float64),
+            np.array(temp_col, dtype=np.float64))
+
+
+def sweep(window_s: float = 3600, workers: int = None, shards_per_worker: int = 4, scorer: str = 'window',
+          horizon_h: float = 24.0, data: tuple = None) -> dict:
+    """Score the fleet; returns {'machine_ids', 'scores' (machines x FIELDS), 'elapsed', ...}.
+
+    `workers=0` scores in this process (the sequential baseline). `data`
+    reuses a `load_window` result, e.g. to time several worker counts.
+    """
+    machine_ids, offsets, ts, vib, temp = data if data is not None else load_window(window_s)
+    machines, rows = len(machine_ids), len(ts)
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    started = time.perf_counter()
+    if machines == 0:
+        scores = np.empty((0, len(FIELDS)))
+    elif workers == 0:
+        scores = np.full((machines, len(FIELDS)), np.nan)
+        for i in range(machines):
+            a, b = offsets[i], offsets[i + 1]
+            scores[i] = SCORERS[scorer](ts[a:b], vib[a:b], temp[a:b], horizon_h)
+    else:
+        shm = shared_memory.SharedMemory(create=True, size=offsets.nbytes + 24 * rows)
+        try:
+            shared = _views(shm.buf, rows, machines)
+            for view, source in zip(shared, (offsets, ts, vib, temp)):
+                view[:] = source
+            del shared, view  # no views may outlive the block
+            edges = np.linspace(0, machines, min(machines, workers * shards_per_worker) + 1).astype(int)
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    pool.submit(_score_shard, shm.name, rows, machines, lo, hi, scorer, horizon_h)
+                    for lo, hi in zip(edges[:-1], edges[1:]) if hi > lo
+                ]
+                scores = np.vstack([f.result() for f in futures])
+        finally:
+            shm.close()
+            shm.unlink()
+    return {
+        'machine_ids': machine_ids,
+        'scores': scores,
+        'rows': rows,
+        'workers': workers,
+        'elapsed': time.perf_counter() - started,
+    }
+
+
+def to_frame(result: dict) -> 'pd.DataFrame':
+    import pandas as pd
+
+    df = pd.DataFrame(result['scores'], columns=FIELDS)
+    df.insert(0, 'machine_id', result['machine_ids'])
+    df['readings'] = df['readings'].astype(int)
+    return df
+
+
+def persist(result: dict, risk_at: float) -> int:
+    """Bulk-insert an AgentLog row for every machine with risk >= `risk_at`. Returns rows written."""
+    from core_db.models import AgentLog
+
+    df = to_frame(result)
+    at_risk = df[df['risk'] >= risk_at]
+    logs = [
+        AgentLog(
+            machine_id=row.machine_id,
+            status='AT_RISK',
+            risk_score=round(float(row.risk), 3),
+            recommendation=(f"Fleet sweep: PoF {row.pof:.3f} now, {row.pof_projected:.3f} projected "
+                            f"(vibration {row.vib_trend_h:+.2f}/h, temperature {row.temp_trend_h:+.2f}/h, "
+                            f"vibration z {row.vib_z:.1f}). Schedule an inspection."),
+        )
+        for row in at_risk.itertuples(index=False)
+    ]
+    AgentLog.objects.bulk_create(logs, batch_size=1000)
+    return len(logs)
+
+
+def benchmark(window_s: float = 3600, worker_counts=None, scorer: str = 'window', repeat: int = 3) -> list:
+    """Time the sweep sequentially and per worker count on the same loaded window."""
+    data = load_window(window_s)
+    cores = os.cpu_count() or 1
+    worker_counts = worker_counts or [w for w in (1, 2, 4, 8, 16, 32) if w < cores] + [cores]
+    results = []
+    baseline = None
+    for workers in [0] + list(worker_counts):
+        elapsed = min(sweep(window_s, workers, scorer=scorer, data=data)['elapsed'] for _ in range(repeat))
+        baseline = baseline or elapsed
+        results.append({'workers': workers, 'elapsed': elapsed, 'speedup': baseline / elapsed})
+    return results
@@ -0,0 +1,254 @@
+"""Batched, pooled forwarding of sensor readings to the n8n webhook.
+
+Callers hand readings to `Forwarder.submit()` and return immediately; sender
+threads drain a bounded queue and POST micro-batches through one keep-alive
+`requests.Session`:
+
+  - batching: a sender waits up to `linger` seconds for `max_batch` readings,
+    then posts whatever it has as one call;
+  - backpressure: the queue holds at most `max_queue` readings. When it is
+    full, `policy='drop_oldest'` (default) discards the oldest queued
+    reading to make room, `policy='drop_newest'` rejects the new one;
+  - failures: 429/5xx and network errors are retried `retries` times with
+    jittered backoff, then the batch is counted as failed and dropped.
+
+Each call posts
+    {"event": "sensor_readings", "count": n, "readings": [...], "data": <newest>}
+where `data` keeps the single-reading shape the existing n8n workflow reads.
+
+Best effort by design: readings are telemetry, and anything that must arrive
+(crisis alerts) goes through the outbox instead (see outbox.py).
+
+`get_forwarder()` builds the process-wide instance from N8N_WEBHOOK_URL and
+PRAXIS_N8N_QUEUE / PRAXIS_N8N_BATCH / PRAXIS_N8N_LINGER / PRAXIS_N8N_POLICY;
+with PRAXIS_N8N_STREAM=1, ingest.insert_readings also forwards every
+ingested batch.
+"""
+import io
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+
+import metrics
+
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+POLICIES = ('drop_oldest', 'drop_newest')
+
+
+class Forwarder:
+    def __init__(self, url: str, max_queue: int = 10000, max_batch: int = 100, linger: float = 0.2,
+                 timeout: float = 5.0, retries: int = 2, policy: str = 'drop_oldest', senders: int = 1):
+        if policy not in POLICIES:
+            raise ValueError(f"policy must be one of {POLICIES}")
+        self.url = url
+        self.max_queue = max_queue
+        self.max_batch = max_batch
+        self.linger = linger
+        self.timeout = timeout
+        self.retries = retries
+        self.policy = policy
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._busy = 0  # batches being posted
+        self._closed = False
+        self._session = None
+        self._senders = [
+            threading.Thread(target=self._run, name=f'n8n-forwarder-{i}', daemon=True) for i in range(senders)
+        ]
+        for thread in self._senders:
+            thread.start()
+
+    # ---------- producer side ----------
+
+    def submit(self, reading: dict) -> bool:
+        """Queue one reading. False if it was rejected (closed, or full with drop_newest)."""
+        return self.submit_many([reading]) == 1
+
+    def submit_many(self, readings) -> int:
+        """Queue readings; returns how many were queued (some may have pushed older ones out)."""
+        queued = dropped = 0
+        with self._cond:
+            if self._closed:
+                metrics.n8n_readings.labels_('rejected').inc(len(readings))
+                return 0
+            for reading in readings:
+                if len(self._queue) >= self.max_queue:
+                    dropped += 1
+                    if self.policy == 'drop_newest':
+                        continue
+                    self._queue.popleft()
+                self._queue.append(reading)
+                queued += 1
+            self._cond.notify()
+        evicted = dropped if self.policy == 'drop_oldest' else 0
+        metrics.n8n_queue_depth.labels_().inc(queued - evicted)
+        if dropped:
+            metrics.n8n_readings.labels_('dropped').inc(dropped)
+        return queued
+
+    def submit_frame(self, df) -> int:
+        """Queue every row of a readings DataFrame (timestamps sent as ISO strings)."""
+        if df.empty:
+            return 0
+        out = df.copy()
+        if 'timestamp' in out:
+            out['timestamp'] = out['timestamp'].map(lambda ts: ts.isoformat())
+        return self.submit_many(out.to_dict('records'))
+
+    def depth(self) -> int:
+        return len(self._queue)
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Wait until everything queued so far has been posted (or given up on)."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._queue or self._busy:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout: float = 10.0) -> bool:
+        """Stop accepting readings, send what is queued, and stop the senders."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        deadline = time.monotonic() + timeout
+        for thread in self._senders:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        if self._session is not None:
+            self._session.close()
+        return not any(thread.is_alive() for thread in self._senders)
+
+    # ---------- sender side ----------
+
+    def _next_batch(self) -> list:
+        """Block for the next batch; empty list once closed and drained."""
+        with self._cond:
+            while not self._queue and not self._closed:
+                self._cond.wait()
+            # Linger briefly so a trickle of readings goes out as one call
+            deadline = time.monotonic() + self.linger
+            while len(self._queue) < self.max_batch and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            n = min(len(self._queue), self.max_batch)
+            batch = [self._queue.popleft() for _ in range(n)]
+            if batch:
+                self._busy += 1
+        metrics.n8n_queue_depth.labels_().dec(len(batch))
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+            try:
+                ok = self._send(batch)
+                metrics.n8n_readings.labels_('sent' if ok else 'failed').inc(len(batch))
+            finally:
+                with self._cond:
+                    self._busy -= 1
+                    self._cond.notify_all()
+
+    def _get_session(self):
+        with self._cond:
+            if self._session is None:
+                self._session = self._new_session()
+            return self._session
+
+    def _new_session(self):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=len(self._senders))
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers['Content-Type'] = 'application/json'
+        return session
+
+    def _send(self, batch: list) -> bool:
+        metrics.n8n_batch_size.labels_().observe(len(batch))
+        body = json.dumps({'event': 'sensor_readings', 'count': len(batch), 'readings': batch, 'data': batch[-1]},
+                          default=str)
+        session = self._get_session()
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(random.uniform(0, min(2.0, 0.1 * (2 ** attempt))))
+            start = time.perf_counter()
+            try:
+                status = session.post(self.url, data=body, timeout=self.timeout).status_code
+            except Exception:
+                status = None
+            elapsed = time.perf_counter() - start
+            if status is not None and 200 <= status < 300:
+                metrics.n8n_post_duration.labels_('ok').observe(elapsed)
+                return True
+            metrics.n8n_post_duration.labels_('error').observe(elapsed)
+            if status is not None and status not in RETRYABLE_STATUS:
+                return False
+        return False
+
+
+# ============================================
+# Process-wide forwarder
+# ============================================
+
+_forwarder = None
+_lock = threading.Lock()
+
+
+def get_forwarder():
+    """The forwarder for N8N_WEBHOOK_URL, or None when n8n isn't configured."""
+    global _forwarder
+    url = os.getenv('N8N_WEBHOOK_URL')
+    if not url:
+        return None
+    if _forwarder is None or _forwarder.url != url:
+        with _lock:
+            if _forwarder is None or _forwarder.url != url:
+                if _forwarder is not None:
+                    _forwarder.close(timeout=0)
+                _forwarder = Forwarder(
+                    url,
+                    max_queue=int(os.getenv('PRAXIS_N8N_QUEUE', '10000')),
+                    max_batch=int(os.getenv('PRAXIS_N8N_BATCH', '100')),
+                    linger=float(os.getenv('PRAXIS_N8N_LINGER', '0.2')),
+                    policy=os.getenv('PRAXIS_N8N_POLICY', 'drop_oldest'),
+                )
+    return _forwarder
+
+
+def stream_enabled() -> bool:
+    return os.getenv('PRAXIS_N8N_STREAM') == '1'
+
+
+def shutdown(timeout: float = 5.0):
+    global _forwarder
+    if _forwarder is not None:
+        _forwarder.close(timeout)
+        _forwarder = None
+
+
+def latest_csv_row(path: str, tail_bytes: int = 65536):
+    """Last row of a CSV as a dict, reading only the header and the file's tail."""
+    import pandas as pd
+
+    with open(path, 'rb') as fh:
+        header = fh.readline()
+        fh.seek(0, os.SEEK_END)
+        size = fh.tell()
+        fh.seek(max(len(header), size - tail_bytes))
+        lines = [line for line in fh.read().splitlines() if line.strip()]
+    if not lines:
+        return None
+    df = pd.read_csv(io.BytesIO(header + lines[-1] + b'\n'))
+    return df.to_dict('records')[0]
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import AgentLog, SensorReading
+from .models import AgentLog, SensorReading, ChannelLayout, DeviceReading, ArchiveChunk, InventoryPart, PartOrder, Technician, MaintenanceSchedule, WebhookEndpoint, OutboxEvent, WebhookDelivery, RiskTrigger
 
 @admin.register(AgentLog)
 class AgentLogAdmin(admin.ModelAdmin):
@@ -12,3 +12,66 @@ class SensorReadingAdmin(admin.ModelAdmin):
     list_filter = ('machine_id',)
     date_hierarchy = 'timestamp'
     ordering = ('-timestamp',)
+
+@admin.register(ChannelLayout)
+class ChannelLayoutAdmin(admin.ModelAdmin):
+    list_display = ('id', '__str__')
+
+@admin.register(DeviceReading)
+class DeviceReadingAdmin(admin.ModelAdmin):
+    list_display = ('timestamp', 'machine_id', 'layout')
+    search_fields = ('machine_id',)
+    date_hierarchy = 'timestamp'
+    exclude = ('values',)
+
+@admin.register(ArchiveChunk)
+class ArchiveChunkAdmin(admin.ModelAdmin):
+    list_display = ('machine_id', 'start', 'end', 'sample_count', 'codec_version', 'created_at')
+    search_fields = ('machine_id',)
+    # Compressed payloads aren't useful in a form
+    exclude = ('block_index', 'timestamps', 'vibration', 'temperature')
+
+@admin.register(InventoryPart)
+class InventoryPartAdmin(admin.ModelAdmin):
+    list_display = ('part_id', 'part_name', 'equipment_type', 'quantity', 'min_stock', 'updated_at')
+    list_filter = ('equipment_type',)
+    search_fields = ('part_id', 'part_name')
+
+@admin.register(PartOrder)
+class PartOrderAdmin(admin.ModelAdmin):
+    list_display = ('timestamp', 'order_id', 'part', 'quantity', 'device_id', 'priority', 'status')
+    list_filter = ('status', 'priority')
+    search_fields = ('order_id', 'device_id', 'idempotency_key')
+
+@admin.register(Technician)
+class TechnicianAdmin(admin.ModelAdmin):
+    list_display = ('technician_id', 'name', 'equipment_types', 'active')
+    list_filter = ('active',)
+
+@admin.register(MaintenanceSchedule)
+class MaintenanceScheduleAdmin(admin.ModelAdmin):
+    list_display = ('start', 'end', 'schedule_id', 'device_id', 'equipment_type', 'technician', 'maintenance_type', 'status')
+    list_filter = ('status', 'maintenance_type', 'equipment_type')
+    search_fields = ('schedule_id', 'device_id')
+    date_hierarchy = 'start'
+
+@admin.register(WebhookEndpoint)
+class WebhookEndpointAdmin(admin.ModelAdmin):
+    list_display = ('name', 'url', 'format', 'rate_per_sec', 'burst', 'active')
+    list_filter = ('active', 'format')
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ('id', 'created_at', 'event_type', 'fanned_out')
+    list_filter = ('event_type', 'fanned_out')
+
+@admin.register(WebhookDelivery)
+class WebhookDeliveryAdmin(admin.ModelAdmin):
+    list_display = ('event', 'endpoint', 'status', 'attempts', 'next_attempt_at', 'last_status', 'delivered_at')
+    list_filter = ('status', 'endpoint')
+    raw_id_fields = ('event',)
+
+@admin.register(RiskTrigger)
+class RiskTriggerAdmin(admin.ModelAdmin):
+    list_display = ('machine_id', 'last_hot_at', 'fired_at', 'pof', 'fire_count')
+    search_fields = ('machine_id',)
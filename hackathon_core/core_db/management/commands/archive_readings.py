@@ -0,0 +1,84 @@
+"""Move aged SensorReading rows into the compressed archive tier.
+
+Each batch of rows is compressed into ArchiveChunk rows and deleted from the
+hot table in one transaction, so the job can be stopped and rerun at any time.
+
+    python manage.py archive_readings --older-than-days 30
+    python manage.py archive_readings --older-than-days 7 --machine MRI-00005 --dry-run
+    python manage.py archive_readings --report-only
+"""
+import sys
+from datetime import timedelta
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+# Make repo-root modules (archive.py, tscodec.py) importable when run via manage.py
+PROJECT_ROOT = Path(__file__).resolve().parents[4]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import archive  # noqa: E402
+from core_db.models import SensorReading  # noqa: E402
+
+
+class Command(BaseCommand):
+    help = "Compress SensorReading rows older than N days into ArchiveChunk and report compression/scan speed."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=float, default=30.0)
+        parser.add_argument('--machine', action='append', dest='machines', help='limit to these machine IDs')
+        parser.add_argument('--chunk-size', type=int, default=4096, help='samples per archive chunk')
+        parser.add_argument('--batch-rows', type=int, default=50000, help='rows moved per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='only count the rows that would move')
+        parser.add_argument('--report-only', action='store_true', help='skip archiving, just print the report')
+        parser.add_argument('--bench-machines', type=int, default=5, help='machines used for the scan benchmark')
+
+    def handle(self, *args, **opts):
+        if not opts['report_only']:
+            older_than = timedelta(days=opts['older_than_days'])
+            if opts['dry_run']:
+                from django.utils import timezone
+                qs = SensorReading.objects.filter(timestamp__lt=timezone.now() - older_than)
+                if opts['machines']:
+                    qs = qs.filter(machine_id__in=opts['machines'])
+                self.stdout.write(f"Would archive {qs.count():,} rows older than {opts['older_than_days']} days")
+                return
+
+            def progress(done, total, rows, elapsed):
+                if done == total or done % 50 == 0:
+                    self.stdout.write(f"  {done}/{total} machines, {rows:,} rows ({rows / elapsed:,.0f} rows/sec)")
+
+            result = archive.archive_aged(older_than, opts['machines'], opts['chunk_size'], opts['batch_rows'],
+                                          progress=progress)
+            self.stdout.write(self.style.SUCCESS(
+                f"Archived {result['rows']:,} rows from {result['machines']} machines older than "
+                f"{result['cutoff']:%Y-%m-%d %H:%M} in {result['seconds']:.1f}s"
+            ))
+
+        self.report(opts['bench_machines'])
+
+    def report(self, bench_machines: int):
+        stats = archive.archive_stats()
+        raw = archive.raw_bytes_per_row()
+        self.stdout.write("\nArchive tier:")
+        self.stdout.write(f"  {stats['chunks']:,} chunks, {stats['samples']:,} samples, {stats['bytes']:,} bytes")
+        if stats['bytes_per_sample']:
+            self.stdout.write(f"  {stats['bytes_per_sample']:.2f} bytes/sample archived")
+        if raw:
+            self.stdout.write(f"  {raw:.1f} bytes/row in the hot table (incl. indexes)")
+        if raw and stats['bytes_per_sample']:
+            self.stdout.write(f"  compression ratio {raw / stats['bytes_per_sample']:.1f}x")
+
+        results = archive.scan_benchmark(bench_machines)
+        if results:
+            self.stdout.write("\nRange scans (samples/sec):")
+        for r in results:
+            line = (f"  {r['machine_id']:<12} archive full {r['archived_samples'] / r['archive_scan_s']:>10,.0f}")
+            if r['archive_half_range_s']:
+                line += f"  archive mid-half {r['archived_samples'] / 2 / r['archive_half_range_s']:>10,.0f}"
+            if r['raw_rows']:
+                line += f"  hot table {r['raw_rows'] / r['raw_scan_s']:>10,.0f} ({r['raw_rows']:,} rows)"
+            else:
+                line += "  hot table: no rows left to compare"
+            self.stdout.write(line)
@@ -0,0 +1,88 @@
+"""Backtest PoF thresholds and alert rules against stored history.
+
+    python manage.py generate_fleet --machines 500 --days 30 --events-out failures.json
+    python manage.py backtest --events failures.json
+    python manage.py backtest --events failures.json --vib-thresh 70 80 --alert-at 0.05 0.1 \
+        --persistence 1 3 5 --rearm 600 3600 --workers 8 --out backtest.csv
+
+Every combination of the grid options is evaluated; see backtest.py.
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+
+# Make repo-root modules (backtest.py, pdm.py) importable when run via manage.py
+PROJECT_ROOT = Path(__file__).resolve().parents[4]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import backtest  # noqa: E402
+from core_db.models import SensorReading  # noqa: E402
+
+
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be >= 1, got {value}")
+    return number
+
+
+class Command(BaseCommand):
+    help = "Replay stored readings through the PoF/alert logic over a parameter grid and score detections."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', help='failure events JSON (generate_fleet --events-out)')
+        parser.add_argument('--machine', action='append', dest='machines', help='only these machine IDs')
+        parser.add_argument('--limit', type=int, help='at most N machines (machines with failures first)')
+        parser.add_argument('--since', help='start of the replayed history')
+        parser.add_argument('--until', help='end of the replayed history')
+        parser.add_argument('--vib-thresh', type=float, nargs='+')
+        parser.add_argument('--temp-thresh', type=float, nargs='+')
+        parser.add_argument('--alert-at', type=float, nargs='+', help='PoF that makes a reading hot')
+        parser.add_argument('--persistence', type=_positive_int, nargs='+', help='consecutive hot readings to alert')
+        parser.add_argument('--rearm', type=float, nargs='+', help='quiet seconds before a new alert episode')
+        parser.add_argument('--horizon', type=float, default=72.0, help='hours before a failure that count')
+        parser.add_argument('--workers', type=int, help='processes (default: CPU count)')
+        parser.add_argument('--chunk', type=int, default=8, help='machines per task')
+        parser.add_argument('--top', type=int, default=15, help='rows to print')
+        parser.add_argument('--out', help='write the full report to this CSV')
+
+    def handle(self, *args, **opts):
+        events = backtest.load_events(opts['events']) if opts['events'] else {}
+        machine_ids = opts['machines'] or sorted(
+            SensorReading.objects.values_list('machine_id', flat=True).distinct().order_by())
+        if opts['limit']:
+            machine_ids = sorted(machine_ids, key=lambda m: m not in events)[:opts['limit']]
+        if not machine_ids:
+            raise CommandError("No machines to backtest")
+
+        spec = {key: opts[opt] for key, opt in (
+            ('vib_thresh', 'vib_thresh'), ('temp_thresh', 'temp_thresh'), ('alert_at', 'alert_at'),
+            ('persistence', 'persistence'), ('rearm_s', 'rearm'),
+        ) if opts[opt]}
+        grid = backtest.parameter_grid(spec)
+        since = pd.Timestamp(opts['since'], tz='UTC') if opts['since'] else None
+        until = pd.Timestamp(opts['until'], tz='UTC') if opts['until'] else None
+
+        self.stdout.write(f"Backtesting {len(grid['alert_at'])} parameter sets over {len(machine_ids)} machines...")
+        result = backtest.run(machine_ids, grid, events, since, until, horizon_s=opts['horizon'] * 3600,
+                              workers=opts['workers'], chunk=opts['chunk'])
+        report = result['report']
+        if result['failures']:
+            report = report.sort_values(['recall', 'false_alerts', 'lead_median_h'], ascending=[False, True, False])
+        else:
+            report = report.sort_values('alerts')
+
+        with pd.option_context('display.width', 200, 'display.max_columns', None):
+            self.stdout.write(report.head(opts['top']).to_string(index=False, float_format=lambda v: f"{v:.3g}"))
+        if opts['out']:
+            report.to_csv(opts['out'], index=False)
+            self.stdout.write(f"Full report written to {opts['out']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['readings']:,} readings x {len(report)} parameter sets, {result['failures']} failures, "
+            f"{result['elapsed']:.1f}s on {result['workers']} workers "
+            f"({result['readings'] * len(report) / max(result['elapsed'], 1e-9):,.0f} reading-evaluations/sec)"
+        ))
@@ -0,0 +1,41 @@
+"""Benchmark the multi-channel DeviceReading path at N channels per device.
+
+    python manage.py channel_bench --devices 50 --samples 2000 --channels 20
+"""
+import sys
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+# Make repo-root modules (multichannel.py) importable when run via manage.py
+PROJECT_ROOT = Path(__file__).resolve().parents[4]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import multichannel  # noqa: E402
+
+
+class Command(BaseCommand):
+    help = "Insert/load/evaluate/rollup synthetic multi-channel readings and report throughput."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--devices', type=int, default=50)
+        parser.add_argument('--samples', type=int, default=2000, help='readings per device')
+        parser.add_argument('--channels', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **opts):
+        r = multichannel.benchmark(opts['devices'], opts['samples'], opts['channels'], opts['seed'])
+        rows, values = r['samples'], r['samples'] * r['channels']
+        self.stdout.write(f"{r['devices']} devices x {rows // r['devices']:,} samples x {r['channels']} channels "
+                          f"= {values:,} values in {rows:,} rows")
+        self.stdout.write(f"  insert    {r['insert_s']:8.2f}s  {rows / r['insert_s']:>12,.0f} rows/sec")
+        self.stdout.write(f"  load      {r['load_s']:8.2f}s  {values / r['load_s']:>12,.0f} values/sec")
+        self.stdout.write(f"  evaluate  {r['evaluate_s']:8.3f}s  {values / r['evaluate_s']:>12,.0f} values/sec "
+                          f"(PoF + thresholds, {r['rows_with_codes']:,} rows with codes)")
+        self.stdout.write(f"  rollup    {r['rollup_s']:8.3f}s  {values / r['rollup_s']:>12,.0f} values/sec "
+                          f"({r['rollup_groups']:,} hourly groups)")
+        self.stdout.write(f"  latest    {r['latest_s'] * 1e3:8.1f}ms for {r['devices']} devices")
+        if r['bytes_per_row']:
+            self.stdout.write(f"  storage   {r['bytes_per_row']:.0f} bytes/row incl. index "
+                              f"({r['bytes_per_row'] / r['channels']:.1f} bytes/value)")
@@ -0,0 +1,40 @@
+"""Backfill the multi-channel DeviceReading table from SensorReading.
+
+Safe to rerun or resume with --after-id; rows already copied are skipped.
+
+    python manage.py copy_device_readings
+    python manage.py copy_device_readings --batch-rows 50000 --after-id 1200000
+"""
+import sys
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+# Make repo-root modules (multichannel.py) importable when run via manage.py
+PROJECT_ROOT = Path(__file__).resolve().parents[4]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import multichannel  # noqa: E402
+from core_db.models import DeviceReading  # noqa: E402
+
+
+class Command(BaseCommand):
+    help = "Copy SensorReading rows into DeviceReading (vibration, temperature layout)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-rows', type=int, default=20000)
+        parser.add_argument('--after-id', type=int, default=0, help='resume after this SensorReading id')
+
+    def handle(self, *args, **opts):
+        before = DeviceReading.objects.count()
+
+        def progress(copied, last_id, elapsed):
+            self.stdout.write(f"  {copied:,} rows read, last id {last_id} ({copied / elapsed:,.0f} rows/sec)")
+
+        read = multichannel.copy_sensor_readings(opts['batch_rows'], opts['after_id'], progress=progress)
+        added = DeviceReading.objects.count() - before
+        self.stdout.write(self.style.SUCCESS(
+            f"Read {read:,} SensorReading rows, added {added:,} DeviceReading rows "
+            f"({read - added:,} already present or duplicate timestamps)"
+        ))
@@ -0,0 +1,47 @@
+"""Deliver outbox events to the registered webhook endpoints.
+
+Several dispatchers can run at once; deliveries are claimed, not locked.
+
+    python manage.py dispatch_webhooks
+    python manage.py dispatch_webhooks --once --workers 16
+"""
+import json
+import sys
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+# Make repo-root modules (outbox.py, metrics.py) importable when run via manage.py
+PROJECT_ROOT = Path(__file__).resolve().parents[4]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import outbox  # noqa: E402
+
+
+class Command(BaseCommand):
+    help = "Run the outbox webhook dispatcher (until interrupted, or once with --once)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='exit when nothing is due')
+        parser.add_argument('--workers', type=int, default=8, help='concurrent HTTP requests')
+        parser.add_argument('--batch', type=int, default=100, help='events fanned out per pass')
+        parser.add_argument('--timeout', type=float, default=5.0, help='per-request timeout in seconds')
+        parser.add_argument('--max-attempts', type=int, default=8)
+        parser.add_argument('--poll-interval', type=float, default=1.0)
+
+    def handle(self, *args, **opts):
+        dispatcher = outbox.Dispatcher(
+            workers=opts['workers'],
+            batch=opts['batch'],
+            timeout=opts['timeout'],
+            max_attempts=opts['max_attempts'],
+            poll_interval=opts['poll_interval'],
+        )
+        try:
+            dispatcher.run(once=opts['once'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            dispatcher.close()
+        self.stdout.write(json.dumps(outbox.stats(), indent=2))
@@ -0,0 +1,56 @@
+"""Score the whole fleet's recent readings on a process pool.
+
+    python manage.py fleet_sweep --window 60 --top 20
+    python manage.py fleet_sweep --window 60 --persist --risk-at 0.3
+    python manage.py fleet_sweep --window 60 --bench
+"""
+import sys
+from pathlib import Path
+
+import pandas as pd
+from django.core.management.base import BaseCommand
+
+# Make repo-root modules (fleetsweep.py, pdm.py) importable when run via manage.py
+PROJECT_ROOT = Path(__file__).resolve().parents[4]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import fleetsweep  # noqa: E402
+
+
+class Command(BaseCommand):
+    help = "Parallel PoF sweep over every machine's recent readings (shared-memory process pool)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--window', type=float, default=60.0, help='minutes of history per machine')
+        parser.add_argument('--workers', type=int, help='processes (default: CPU count; 0 = in-process)')
+        parser.add_argument('--scorer', choices=sorted(fleetsweep.SCORERS), default='window')
+        parser.add_argument('--horizon', type=float, default=24.0, help='hours the trend projection looks ahead')
+        parser.add_argument('--top', type=int, default=10, help='riskiest machines to print')
+        parser.add_argument('--persist', action='store_true', help='bulk-insert AgentLog rows for risky machines')
+        parser.add_argument('--risk-at', type=float, default=0.3, help='risk level written by --persist')
+        parser.add_argument('--out', help='write every machine\'s scores to this CSV')
+        parser.add_argument('--bench', action='store_true', help='report speedup against worker count instead')
+
+    def handle(self, *args, **opts):
+        window_s = opts['window'] * 60
+        if opts['bench']:
+            self.stdout.write("workers  seconds  speedup")
+            for row in fleetsweep.benchmark(window_s, scorer=opts['scorer']):
+                label = 'serial' if row['workers'] == 0 else row['workers']
+                self.stdout.write(f"{label:>7}  {row['elapsed']:7.3f}  {row['speedup']:6.2f}x")
+            return
+
+        result = fleetsweep.sweep(window_s, opts['workers'], scorer=opts['scorer'], horizon_h=opts['horizon'])
+        df = fleetsweep.to_frame(result)
+        with pd.option_context('display.width', 200, 'display.max_columns', None):
+            self.stdout.write(df.nlargest(opts['top'], 'risk').to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+        if opts['out']:
+            df.to_csv(opts['out'], index=False)
+        if opts['persist']:
+            written = fleetsweep.persist(result, opts['risk_at'])
+            self.stdout.write(f"Logged {written} machines at risk >= {opts['risk_at']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Scored {len(df):,} machines ({result['rows']:,} readings) in {result['elapsed']:.2f}s "
+            f"on {result['workers']} workers"
+        ))
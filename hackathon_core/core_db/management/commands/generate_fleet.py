@@ -0,0 +1,76 @@
+"""Generate and bulk-load a synthetic fleet history into SensorReading.
+
+    python manage.py generate_fleet --machines 1000 --days 30 --interval 60 --seed 7 \
+        --failure-rate 0.1 --events-out failures.json
+
+Same arguments and seed always produce the same rows and failure events.
+Uses COPY on Postgres and bulk_create elsewhere (see ingest.insert_readings).
+"""
+import json
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+from django.core.management.base import BaseCommand
+
+# Make repo-root modules (ingest.py, fleet_generator.py) importable when run via manage.py
+PROJECT_ROOT = Path(__file__).resolve().parents[4]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import fleet_generator  # noqa: E402
+import ingest  # noqa: E402
+from core_db.models import SensorReading  # noqa: E402
+
+
+class Command(BaseCommand):
+    help = "Generate a reproducible synthetic fleet history and bulk-load it."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--machines', type=int, default=100)
+        parser.add_argument('--days', type=float, default=7.0)
+        parser.add_argument('--end', help='end of the generated span (default: now, UTC)')
+        parser.add_argument('--interval', type=int, default=60, help='seconds between readings')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--failure-rate', type=float, default=0.1, help='fraction of machines that fail')
+        parser.add_argument('--spike-rate', type=float, default=0.001, help='per-reading transient spike chance')
+        parser.add_argument('--chunk-rows', type=int, default=500000)
+        parser.add_argument('--method', choices=['auto', 'bulk_create', 'copy'], default='auto')
+        parser.add_argument('--events-out', help='write ground-truth failure events to this JSON file')
+        parser.add_argument('--truncate', action='store_true', help='delete generated machines first')
+        parser.add_argument('--dry-run', action='store_true', help='generate without loading')
+
+    def handle(self, *args, **opts):
+        end = pd.Timestamp(opts['end']) if opts['end'] else pd.Timestamp.now(tz='UTC').floor('min')
+        start = end - pd.Timedelta(days=opts['days'])
+
+        if opts['truncate'] and not opts['dry_run']:
+            ids = fleet_generator.machine_ids(opts['machines'])
+            deleted, _ = SensorReading.objects.filter(machine_id__in=ids).delete()
+            self.stdout.write(f"Deleted {deleted} existing rows for generated machines")
+
+        rows = 0
+        events = []
+        started = time.perf_counter()
+        for df, chunk_events in fleet_generator.generate_fleet(
+            opts['machines'], start, end, interval_s=opts['interval'], seed=opts['seed'],
+            failure_rate=opts['failure_rate'], spike_rate=opts['spike_rate'], chunk_rows=opts['chunk_rows'],
+        ):
+            if not opts['dry_run']:
+                # Fresh machines/timestamps: the duplicate check is only worth it on reruns.
+                ingest.insert_readings(df, dedupe=not opts['truncate'], method=opts['method'])
+            rows += len(df)
+            events.extend(chunk_events)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"  {rows:,} rows ({rows / elapsed:,.0f} rows/sec)")
+
+        elapsed = time.perf_counter() - started
+        if opts['events_out']:
+            with open(opts['events_out'], 'w', encoding='utf-8') as fh:
+                json.dump([e.to_dict() for e in events], fh, indent=2)
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Generated' if opts['dry_run'] else 'Loaded'} {rows:,} readings for {opts['machines']} machines "
+            f"({start:%Y-%m-%d %H:%M} -> {end:%Y-%m-%d %H:%M}), {len(events)} failure events, "
+            f"{elapsed:.1f}s ({rows / elapsed if elapsed else 0:,.0f} rows/sec)"
+        ))
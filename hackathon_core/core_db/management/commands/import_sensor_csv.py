@@ -0,0 +1,64 @@
+"""Backfill SensorReading from a CSV such as live_sensor_stream.csv.
+
+Streams the file in chunks, keeps the original timestamps and skips rows
+already stored for the same (machine_id, timestamp), so the command can be
+rerun safely.
+
+    python manage.py import_sensor_csv ../live_sensor_stream.csv --chunksize 100000
+"""
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+
+# Make repo-root modules (ingest.py) importable when run via manage.py
+PROJECT_ROOT = Path(__file__).resolve().parents[4]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import ingest  # noqa: E402
+
+
+class Command(BaseCommand):
+    help = "Stream a sensor CSV into SensorReading, preserving timestamps and skipping duplicates."
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path', nargs='?', default=str(PROJECT_ROOT / 'live_sensor_stream.csv'))
+        parser.add_argument('--chunksize', type=int, default=100000)
+        parser.add_argument('--method', choices=['auto', 'bulk_create', 'copy'], default='auto')
+        parser.add_argument('--source-tz', default='UTC', help='timezone of naive CSV timestamps')
+        parser.add_argument('--no-dedupe', action='store_true', help='skip the duplicate check (first load only)')
+
+    def handle(self, *args, **opts):
+        path = Path(opts['csv_path'])
+        if not path.exists():
+            raise CommandError(f"CSV not found: {path}")
+
+        totals = {'read': 0, 'inserted': 0, 'duplicates': 0, 'invalid': 0}
+        started = time.perf_counter()
+        reader = pd.read_csv(
+            path,
+            chunksize=opts['chunksize'],
+            usecols=ingest.READING_COLUMNS,
+            dtype={'machine_id': 'string', 'timestamp': 'string'},
+            engine='c',
+        )
+        for chunk in reader:
+            df, invalid = ingest.normalize_frame(chunk, source_tz=opts['source_tz'])
+            result = ingest.insert_readings(df, dedupe=not opts['no_dedupe'], method=opts['method'])
+            totals['read'] += len(chunk)
+            totals['invalid'] += invalid
+            totals['inserted'] += result['inserted']
+            totals['duplicates'] += result['duplicates']
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"  {totals['read']} rows read, {totals['inserted']} inserted "
+                              f"({totals['read'] / elapsed:,.0f} rows/sec)")
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {path.name}: {totals['inserted']} inserted, {totals['duplicates']} duplicates skipped, "
+            f"{totals['invalid']} invalid, {totals['read']} read in {elapsed:.2f}s "
+            f"({totals['read'] / elapsed if elapsed else 0:,.0f} rows/sec)"
+        ))
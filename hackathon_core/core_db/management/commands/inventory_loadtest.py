@@ -0,0 +1,91 @@
+"""Concurrent ordering load test for the parts inventory.
+
+Creates a throw-away part with a small stock, hammers it from many threads
+through `inventory.place_order`, and checks that confirmed orders never exceed
+the stock and that a shared idempotency key produces exactly one order.
+
+    python manage.py inventory_loadtest --stock 50 --orders 500 --workers 16
+"""
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+# Make repo-root modules (inventory.py) importable when run via manage.py
+PROJECT_ROOT = Path(__file__).resolve().parents[4]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import inventory  # noqa: E402
+from core_db.models import InventoryPart, PartOrder  # noqa: E402
+
+
+class Command(BaseCommand):
+    help = "Concurrently order a scarce test part and verify nothing is oversold."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stock', type=int, default=50)
+        parser.add_argument('--orders', type=int, default=500, help='order attempts (each for --quantity units)')
+        parser.add_argument('--quantity', type=int, default=1)
+        parser.add_argument('--workers', type=int, default=16)
+        parser.add_argument('--keep', action='store_true', help='keep the test part and its orders')
+
+    def handle(self, *args, **opts):
+        part_id = f"LOADTEST-{uuid.uuid4().hex[:8].upper()}"
+        part = InventoryPart.objects.create(
+            part_id=part_id, part_name='Load test part', equipment_type='Load Test', quantity=opts['stock']
+        )
+        try:
+            self._run(part_id, opts)
+        finally:
+            if not opts['keep']:
+                PartOrder.objects.filter(part=part).delete()
+                part.delete()
+
+    def _attempt(self, part_id, quantity, key=None):
+        try:
+            _, replayed = inventory.place_order(part_id, quantity, 'LOADTEST', 'critical', idempotency_key=key)
+            return 'replayed' if replayed else 'confirmed'
+        except inventory.InsufficientStock:
+            return 'insufficient'
+        except Exception:
+            return 'error'
+        finally:
+            connection.close()
+
+    def _run(self, part_id, opts):
+        stock, quantity, attempts = opts['stock'], opts['quantity'], opts['orders']
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=opts['workers']) as pool:
+            outcomes = list(pool.map(lambda _: self._attempt(part_id, quantity), range(attempts)))
+        elapsed = time.perf_counter() - start
+
+        confirmed = outcomes.count('confirmed')
+        remaining = InventoryPart.objects.get(part_id=part_id).quantity
+        ordered_units = sum(PartOrder.objects.filter(part__part_id=part_id).values_list('quantity', flat=True))
+
+        self.stdout.write(
+            f"{attempts} attempts in {elapsed:.2f}s ({attempts / elapsed:.0f} orders/sec, {opts['workers']} workers): "
+            f"confirmed={confirmed} insufficient={outcomes.count('insufficient')} errors={outcomes.count('error')}"
+        )
+        self.stdout.write(f"stock={stock} ordered_units={ordered_units} remaining={remaining}")
+        if ordered_units > stock or ordered_units + remaining != stock or confirmed * quantity != ordered_units:
+            raise CommandError("Oversold or lost stock: inventory invariant violated")
+
+        # Same idempotency key from every worker must yield exactly one order.
+        if remaining >= quantity:
+            key = f"{part_id}-IDEM"
+            with ThreadPoolExecutor(max_workers=opts['workers']) as pool:
+                replays = list(pool.map(lambda _: self._attempt(part_id, quantity, key), range(opts['workers'])))
+            keyed = PartOrder.objects.filter(idempotency_key=key).count()
+            self.stdout.write(f"idempotency: {opts['workers']} concurrent submits -> {keyed} order(s), "
+                              f"{replays.count('replayed')} replayed, {replays.count('error')} errors")
+            if keyed != 1:
+                raise CommandError("Idempotency key produced more than one order")
+
+        self.stdout.write(self.style.SUCCESS("No overselling detected."))
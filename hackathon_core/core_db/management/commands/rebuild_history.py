@@ -0,0 +1,81 @@
+"""Rebuild the memory-mapped history store from the database.
+
+Creating the store also switches on incremental sync from ingest.insert_readings.
+
+    python manage.py rebuild_history
+    python manage.py rebuild_history --machine MRI-00005 --bench 3
+    python manage.py rebuild_history --bench-only 5
+"""
+import sys
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+# Make repo-root modules (historystore.py, archive.py) importable when run via manage.py
+PROJECT_ROOT = Path(__file__).resolve().parents[4]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import historystore  # noqa: E402
+import pdm  # noqa: E402
+from core_db.models import SensorReading  # noqa: E402
+
+
+class Command(BaseCommand):
+    help = "Rebuild per-machine memmap history files from SensorReading (and the archive tier)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--machine', action='append', dest='machines', help='only rebuild these machine IDs')
+        parser.add_argument('--batch-rows', type=int, default=50000)
+        parser.add_argument('--bench', type=int, default=0, help='after rebuilding, time window reads for N machines')
+        parser.add_argument('--bench-only', type=int, metavar='N', help='skip the rebuild, just benchmark N machines')
+
+    def handle(self, *args, **opts):
+        if opts['bench_only'] is None:
+            started = time.perf_counter()
+
+            def progress(done, total, rows):
+                if done == total or done % 50 == 0:
+                    self.stdout.write(f"  {done}/{total} machines, {rows:,} rows")
+
+            result = historystore.rebuild(opts['machines'], opts['batch_rows'], progress=progress)
+            stats = historystore.stats()
+            self.stdout.write(self.style.SUCCESS(
+                f"Rebuilt {result['machines']} machines ({result['rows']:,} rows) in "
+                f"{time.perf_counter() - started:.1f}s -> {stats['root']} ({stats['bytes'] / 1e6:.1f} MB)"
+            ))
+        bench = opts['bench_only'] if opts['bench_only'] is not None else opts['bench']
+        if bench:
+            self.benchmark(bench)
+
+    def benchmark(self, machines: int):
+        """Time a middle-half window read plus PoF via the store against the same ORM query."""
+        import pandas as pd
+
+        for machine_id in historystore.machines()[:machines]:
+            ts = historystore.window(machine_id)['timestamp']
+            if len(ts) < 4:
+                continue
+            start, end = int(ts[len(ts) // 4]), int(ts[3 * len(ts) // 4])
+
+            t = time.perf_counter()
+            result = pdm.pof_window(machine_id, start, end)
+            store_s = time.perf_counter() - t
+
+            lo, hi = pd.Timestamp(start, unit='us', tz='UTC'), pd.Timestamp(end, unit='us', tz='UTC')
+            t = time.perf_counter()
+            rows = list(
+                SensorReading.objects.filter(machine_id=machine_id, timestamp__gte=lo, timestamp__lte=hi)
+                .order_by('timestamp').values_list('vibration', 'temperature')
+            )
+            if rows:
+                vib, temp = zip(*rows)
+                pdm.compute_pof_array(vib, temp)
+            orm_s = time.perf_counter() - t
+
+            n = len(result['pof'])
+            self.stdout.write(
+                f"  {machine_id:<12} {n:>9,} rows  store {store_s * 1e3:8.2f} ms  "
+                f"ORM {orm_s * 1e3:9.1f} ms ({len(rows):,} rows)  {orm_s / max(store_s, 1e-9):,.0f}x"
+            )
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+SEED_PARTS = [
+    ("MRI Scanner", "MRI-COIL-001", "RF Coil", 3, 2),
+    ("MRI Scanner", "MRI-COOL-001", "Cooling Pump", 1, 2),
+    ("MRI Scanner", "MRI-MAG-001", "Gradient Magnet", 2, 1),
+    ("Ventilator", "VEN-FLTR-001", "HEPA Filter", 15, 10),
+    ("Ventilator", "VEN-TUBE-001", "Breathing Circuit", 25, 20),
+    ("Ventilator", "VEN-VALV-001", "Exhalation Valve", 5, 5),
+    ("CT Scanner", "CT-TUBE-001", "X-Ray Tube", 1, 1),
+    ("CT Scanner", "CT-DET-001", "Detector Array", 2, 1),
+    ("Patient Monitor", "MON-SENS-001", "SpO2 Sensor", 20, 15),
+    ("Patient Monitor", "MON-CABL-001", "ECG Cable", 30, 20),
+    ("Patient Monitor", "MON-BATT-001", "Battery Pack", 8, 10),
+    ("X-Ray Machine", "XR-TUBE-001", "X-Ray Tube", 2, 2),
+    ("X-Ray Machine", "XR-COLL-001", "Collimator", 1, 1),
+    ("Ultrasound", "US-PROB-001", "Linear Probe", 4, 3),
+    ("Ultrasound", "US-PROB-002", "Curved Probe", 3, 2),
+]
+
+
+def seed_inventory(apps, schema_editor):
+    InventoryPart = apps.get_model('core_db', 'InventoryPart')
+    InventoryPart.objects.bulk_create([
+        InventoryPart(equipment_type=t, part_id=pid, part_name=name, quantity=qty, min_stock=min_stock)
+        for t, pid, name, qty, min_stock in SEED_PARTS
+    ], ignore_conflicts=True)
+
+
+def unseed_inventory(apps, schema_editor):
+    InventoryPart = apps.get_model('core_db', 'InventoryPart')
+    InventoryPart.objects.filter(part_id__in=[p[1] for p in SEED_PARTS], orders__isnull=True).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_db', '0002_sensorreading'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryPart',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('part_id', models.CharField(max_length=50, unique=True)),
+                ('part_name', models.CharField(max_length=100)),
+                ('equipment_type', models.CharField(db_index=True, max_length=100)),
+                ('quantity', models.PositiveIntegerField(default=0)),
+                ('min_stock', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['equipment_type', 'part_id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PartOrder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order_id', models.CharField(max_length=20, unique=True)),
+                ('quantity', models.PositiveIntegerField()),
+                ('device_id', models.CharField(max_length=100)),
+                ('priority', models.CharField(max_length=20)),
+                ('status', models.CharField(default='confirmed', max_length=20)),
+                ('idempotency_key', models.CharField(blank=True, max_length=100, null=True, unique=True)),
+                ('estimated_delivery', models.DateTimeField()),
+                ('timestamp', models.DateTimeField(auto_now_add=True)),
+                ('part', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='orders', to='core_db.inventorypart')),
+            ],
+        ),
+        migrations.RunPython(seed_inventory, unseed_inventory),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_db', '0003_inventorypart_partorder'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Technician',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('technician_id', models.CharField(max_length=50, unique=True)),
+                ('name', models.CharField(max_length=100)),
+                ('equipment_types', models.CharField(blank=True, default='', max_length=255)),
+                ('active', models.BooleanField(default=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MaintenanceSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('schedule_id', models.CharField(max_length=20, unique=True)),
+                ('device_id', models.CharField(max_length=100)),
+                ('equipment_type', models.CharField(max_length=100)),
+                ('start', models.DateTimeField()),
+                ('end', models.DateTimeField()),
+                ('maintenance_type', models.CharField(default='preventive', max_length=50)),
+                ('status', models.CharField(default='scheduled', max_length=20)),
+                ('reason', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('technician', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='schedule', to='core_db.technician')),
+            ],
+            options={
+                'ordering': ['start'],
+                'indexes': [models.Index(fields=['device_id', 'start'], name='core_db_mai_device__788be0_idx'), models.Index(fields=['status', 'end'], name='core_db_mai_status_89b6e6_idx')],
+            },
+        ),
+    ]
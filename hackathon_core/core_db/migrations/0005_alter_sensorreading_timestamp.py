@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:34
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_db', '0004_technician_maintenanceschedule'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='sensorreading',
+            name='timestamp',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+    ]
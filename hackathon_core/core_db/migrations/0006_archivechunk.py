@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_db', '0005_alter_sensorreading_timestamp'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('machine_id', models.CharField(max_length=100)),
+                ('start', models.DateTimeField()),
+                ('end', models.DateTimeField()),
+                ('sample_count', models.PositiveIntegerField()),
+                ('codec_version', models.PositiveSmallIntegerField(default=1)),
+                ('block_index', models.BinaryField()),
+                ('timestamps', models.BinaryField()),
+                ('vibration', models.BinaryField()),
+                ('temperature', models.BinaryField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['machine_id', 'start'],
+                'indexes': [models.Index(fields=['machine_id', 'start'], name='core_db_arc_machine_47965b_idx')],
+            },
+        ),
+    ]
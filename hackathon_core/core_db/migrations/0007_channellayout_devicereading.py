@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:07
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_db', '0006_archivechunk'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChannelLayout',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=40, unique=True)),
+                ('channels', models.JSONField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DeviceReading',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('machine_id', models.CharField(max_length=100)),
+                ('timestamp', models.DateTimeField(default=django.utils.timezone.now)),
+                ('values', models.BinaryField()),
+                ('layout', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='readings', to='core_db.channellayout')),
+            ],
+            options={
+                'ordering': ['-timestamp'],
+                'constraints': [models.UniqueConstraint(fields=('machine_id', 'timestamp'), name='uniq_device_reading')],
+            },
+        ),
+    ]
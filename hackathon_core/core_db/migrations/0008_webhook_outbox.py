@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:13
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_db', '0007_channellayout_devicereading'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebhookEndpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('url', models.URLField(max_length=500)),
+                ('event_types', models.JSONField(blank=True, default=list)),
+                ('format', models.CharField(choices=[('json', 'JSON envelope'), ('slack', 'Slack incoming webhook')], default='json', max_length=10)),
+                ('rate_per_sec', models.FloatField(default=5.0)),
+                ('burst', models.PositiveIntegerField(default=10)),
+                ('active', models.BooleanField(default=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='OutboxEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(max_length=50)),
+                ('payload', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('fanned_out', models.BooleanField(default=False)),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['fanned_out', 'id'], name='core_db_out_fanned__b10aab_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='WebhookDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(default='pending', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('claim', models.CharField(blank=True, default='', max_length=32)),
+                ('claimed_until', models.DateTimeField(blank=True, null=True)),
+                ('last_status', models.IntegerField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('delivered_at', models.DateTimeField(blank=True, null=True)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='core_db.outboxevent')),
+                ('endpoint', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='core_db.webhookendpoint')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='core_db_web_status_d32a52_idx')],
+                'constraints': [models.UniqueConstraint(fields=('event', 'endpoint'), name='uniq_webhook_delivery')],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_db', '0008_webhook_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RiskTrigger',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('machine_id', models.CharField(max_length=100, unique=True)),
+                ('last_hot_at', models.DateTimeField(blank=True, null=True)),
+                ('fired_at', models.DateTimeField(blank=True, null=True)),
+                ('pof', models.FloatField(default=0.0)),
+                ('fire_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
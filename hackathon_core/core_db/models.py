@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 class AgentLog(models.Model):
     machine_id = models.CharField(max_length=100)
@@ -14,7 +15,8 @@ class SensorReading(models.Model):
     machine_id = models.CharField(max_length=100, db_index=True)
     vibration = models.FloatField()
     temperature = models.FloatField()
-    timestamp = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Not auto_now_add so backfills and replays can keep the source timestamp.
+    timestamp = models.DateTimeField(default=timezone.now, db_index=True)
 
     class Meta:
         ordering = ['-timestamp']
@@ -23,4 +25,200 @@ class SensorReading(models.Model):
         ]
 
     def __str__(self):
-        return f"{self.machine_id} - {self.timestamp}"
\ No newline at end of file
+        return f"{self.machine_id} - {self.timestamp}"
+
+class ChannelLayout(models.Model):
+    """Ordered channel names shared by DeviceReading rows (see multichannel.py)."""
+    key = models.CharField(max_length=40, unique=True)  # sha1 of the channel list
+    channels = models.JSONField()
+
+    def __str__(self):
+        return ", ".join(self.channels)
+
+class DeviceReading(models.Model):
+    """One sample of every channel a device reports.
+
+    `values` packs one little-endian float64 per channel in `layout` order
+    (NaN = not reported), so a row stays one row however many channels the
+    device has and a batch decodes with a single np.frombuffer.
+    """
+    machine_id = models.CharField(max_length=100)
+    timestamp = models.DateTimeField(default=timezone.now)
+    layout = models.ForeignKey(ChannelLayout, on_delete=models.PROTECT, related_name='readings')
+    values = models.BinaryField()
+
+    class Meta:
+        ordering = ['-timestamp']
+        constraints = [
+            # Also serves (machine_id, timestamp) range scans and latest-per-machine lookups
+            models.UniqueConstraint(fields=['machine_id', 'timestamp'], name='uniq_device_reading'),
+        ]
+
+    def __str__(self):
+        return f"{self.machine_id} - {self.timestamp}"
+
+class ArchiveChunk(models.Model):
+    """Compressed cold history for one machine (see archive.py / tscodec.py)."""
+    machine_id = models.CharField(max_length=100)
+    start = models.DateTimeField()
+    end = models.DateTimeField()
+    sample_count = models.PositiveIntegerField()
+    codec_version = models.PositiveSmallIntegerField(default=1)
+    block_index = models.BinaryField()
+    timestamps = models.BinaryField()
+    vibration = models.BinaryField()
+    temperature = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['machine_id', 'start']
+        indexes = [
+            models.Index(fields=['machine_id', 'start']),
+        ]
+
+    @property
+    def stored_bytes(self):
+        return len(self.block_index) + len(self.timestamps) + len(self.vibration) + len(self.temperature)
+
+    def __str__(self):
+        return f"{self.machine_id} {self.start} - {self.end} ({self.sample_count})"
+
+class InventoryPart(models.Model):
+    part_id = models.CharField(max_length=50, unique=True)
+    part_name = models.CharField(max_length=100)
+    equipment_type = models.CharField(max_length=100, db_index=True)
+    quantity = models.PositiveIntegerField(default=0)
+    min_stock = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['equipment_type', 'part_id']
+
+    @property
+    def stock_status(self):
+        if self.quantity == 0:
+            return 'out_of_stock'
+        return 'low_stock' if self.quantity <= self.min_stock else 'in_stock'
+
+    def __str__(self):
+        return f"{self.part_id} ({self.quantity})"
+
+class PartOrder(models.Model):
+    order_id = models.CharField(max_length=20, unique=True)
+    part = models.ForeignKey(InventoryPart, on_delete=models.PROTECT, related_name='orders')
+    quantity = models.PositiveIntegerField()
+    device_id = models.CharField(max_length=100)
+    priority = models.CharField(max_length=20)
+    status = models.CharField(max_length=20, default='confirmed')
+    idempotency_key = models.CharField(max_length=100, unique=True, null=True, blank=True)
+    estimated_delivery = models.DateTimeField()
+    timestamp = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.order_id} - {self.part.part_id} x{self.quantity}"
+
+class Technician(models.Model):
+    technician_id = models.CharField(max_length=50, unique=True)
+    name = models.CharField(max_length=100)
+    # Comma-separated equipment types this technician services; empty means all.
+    equipment_types = models.CharField(max_length=255, blank=True, default='')
+    active = models.BooleanField(default=True)
+
+    def can_service(self, equipment_type):
+        if not self.equipment_types:
+            return True
+        return equipment_type in [t.strip() for t in self.equipment_types.split(',')]
+
+    def __str__(self):
+        return f"{self.technician_id} - {self.name}"
+
+class MaintenanceSchedule(models.Model):
+    schedule_id = models.CharField(max_length=20, unique=True)
+    device_id = models.CharField(max_length=100)
+    equipment_type = models.CharField(max_length=100)
+    technician = models.ForeignKey(Technician, null=True, blank=True, on_delete=models.SET_NULL, related_name='schedule')
+    start = models.DateTimeField()
+    end = models.DateTimeField()
+    maintenance_type = models.CharField(max_length=50, default='preventive')
+    status = models.CharField(max_length=20, default='scheduled')
+    reason = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['start']
+        indexes = [
+            models.Index(fields=['device_id', 'start']),
+            models.Index(fields=['status', 'end']),
+        ]
+
+    def __str__(self):
+        return f"{self.schedule_id} - {self.device_id} @ {self.start}"
+
+class WebhookEndpoint(models.Model):
+    """A consumer of outbox events (see outbox.py)."""
+    FORMAT_CHOICES = [('json', 'JSON envelope'), ('slack', 'Slack incoming webhook')]
+
+    name = models.CharField(max_length=50, unique=True)
+    url = models.URLField(max_length=500)
+    event_types = models.JSONField(default=list, blank=True)  # empty = every event type
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default='json')
+    rate_per_sec = models.FloatField(default=5.0)
+    burst = models.PositiveIntegerField(default=10)
+    active = models.BooleanField(default=True)
+
+    def wants(self, event_type: str) -> bool:
+        return not self.event_types or event_type in self.event_types
+
+    def __str__(self):
+        return f"{self.name} ({self.url})"
+
+class OutboxEvent(models.Model):
+    """An event written in the same transaction as the change it announces."""
+    event_type = models.CharField(max_length=50)
+    payload = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    fanned_out = models.BooleanField(default=False)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['fanned_out', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} #{self.id}"
+
+class WebhookDelivery(models.Model):
+    """Delivery state of one outbox event to one endpoint."""
+    event = models.ForeignKey(OutboxEvent, on_delete=models.CASCADE, related_name='deliveries')
+    endpoint = models.ForeignKey(WebhookEndpoint, on_delete=models.CASCADE, related_name='deliveries')
+    status = models.CharField(max_length=10, default='pending')  # pending, sending, delivered, dead
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claim = models.CharField(max_length=32, blank=True, default='')
+    claimed_until = models.DateTimeField(null=True, blank=True)
+    last_status = models.IntegerField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default='')
+    delivered_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['event', 'endpoint'], name='uniq_webhook_delivery'),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.event} -> {self.endpoint.name} ({self.status})"
+
+class RiskTrigger(models.Model):
+    """Threshold-crossing state of one device, shared by every ingest process (see triggers.py)."""
+    machine_id = models.CharField(max_length=100, unique=True)
+    last_hot_at = models.DateTimeField(null=True, blank=True)  # newest reading at or above the threshold
+    fired_at = models.DateTimeField(null=True, blank=True)
+    pof = models.FloatField(default=0.0)  # PoF that fired the last alert
+    fire_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.machine_id} (fired {self.fire_count}x)"
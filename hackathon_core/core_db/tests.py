@@ -1,3 +1,167 @@
-from django.test import TestCase
+import json
+import math
+import sys
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
 
-# Create your tests here.
+from django.test import SimpleTestCase, TransactionTestCase
+
+from core_db.models import SensorReading
+
+# Make repo-root modules (api.py, forwarder.py, sqlprofile.py) importable when run via manage.py
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import forwarder  # noqa: E402
+import sqlprofile  # noqa: E402
+
+
+def _seed(machines: int = 12, readings: int = 3):
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    SensorReading.objects.bulk_create([
+        SensorReading(machine_id=f"MRI-{m:05d}", vibration=40.0 + m, temperature=60.0 + i,
+                      timestamp=start + timedelta(minutes=i))
+        for m in range(machines) for i in range(readings)
+    ])
+
+
+class QueryCountTests(TransactionTestCase):
+    """Fleet endpoints stay at a fixed number of queries however many machines there are.
+
+    TransactionTestCase, because TestClient runs sync endpoints on another
+    thread, which only sees committed rows.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        from fastapi.testclient import TestClient
+        import api
+
+        cls.api = TestClient(api.app)
+
+    def setUp(self):
+        _seed()
+
+    def test_machines_query_count(self):
+        with sqlprofile.assert_max_queries(3):
+            response = self.api.get('/api/machines')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total_machines'], 12)
+
+    def test_iot_sensors_query_count(self):
+        with sqlprofile.assert_max_queries(3):
+            response = self.api.get('/api/iot/sensors')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 12)
+
+
+class NPlusOneTests(TransactionTestCase):
+
+    def setUp(self):
+        _seed()
+
+    def _per_machine_lookups(self):
+        for machine_id in SensorReading.objects.order_by().values_list('machine_id', flat=True).distinct():
+            SensorReading.objects.filter(machine_id=machine_id).order_by('-timestamp').first()
+
+    def test_repeated_statement_is_flagged(self):
+        with sqlprofile.profile_queries(n_plus_one_threshold=5) as profile:
+            self._per_machine_lookups()
+        self.assertEqual(profile.count, 13)
+        [(fp, executions)] = profile.n_plus_one
+        self.assertEqual(executions, 12)
+        self.assertIn('WHERE', fp)
+        self.assertIn('<-- N+1', profile.summary())
+
+    def test_assert_max_queries_rejects_n_plus_one(self):
+        with self.assertRaisesRegex(AssertionError, 'N\\+1 query pattern'):
+            with sqlprofile.assert_max_queries(100):
+                self._per_machine_lookups()
+
+
+class _WebhookStub(BaseHTTPRequestHandler):
+    """n8n stand-in: records each POSTed body and answers with the next queued status (default 200)."""
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        server.received.set()
+        server.gate.wait(10)
+        with server.lock:
+            server.posts.append(body)
+            status = server.statuses.pop(0) if server.statuses else 200
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class ForwarderTests(SimpleTestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _WebhookStub)
+        self.server.posts, self.server.statuses, self.server.lock = [], [], threading.Lock()
+        self.server.gate, self.server.received = threading.Event(), threading.Event()
+        self.server.gate.set()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/webhook"
+        self.forwarders = []
+
+    def tearDown(self):
+        self.server.gate.set()
+        for fwd in self.forwarders:
+            fwd.close(timeout=5)
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _forwarder(self, **kwargs):
+        fwd = forwarder.Forwarder(self.url, **kwargs)
+        self.forwarders.append(fwd)
+        return fwd
+
+    def _sent(self) -> list:
+        return [reading['n'] for body in self.server.posts for reading in body['readings']]
+
+    def test_batches_readings(self):
+        fwd = self._forwarder(max_batch=100, linger=0.5)
+        self.assertEqual(fwd.submit_many([{'n': i} for i in range(250)]), 250)
+        self.assertTrue(fwd.flush())
+        self.assertLessEqual(len(self.server.posts), math.ceil(250 / 100))
+        self.assertEqual(self._sent(), list(range(250)))
+        self.assertEqual(self.server.posts[-1]['data'], {'n': 249})
+
+    def test_retries_on_503(self):
+        self.server.statuses = [503]
+        fwd = self._forwarder(linger=0, retries=2)
+        fwd.submit({'n': 1})
+        self.assertTrue(fwd.flush())
+        self.assertEqual(len(self.server.posts), 2)
+        self.assertEqual(self._sent(), [1, 1])
+
+    def _fill_blocked(self, policy: str) -> tuple:
+        # Hold the sender inside a POST so later readings pile up in the queue
+        fwd = self._forwarder(max_queue=5, max_batch=100, linger=0, policy=policy)
+        self.server.gate.clear()
+        fwd.submit({'n': -1})
+        self.assertTrue(self.server.received.wait(5))
+        queued = fwd.submit_many([{'n': i} for i in range(10)])
+        self.assertEqual(fwd.depth(), 5)
+        self.server.gate.set()
+        self.assertTrue(fwd.flush())
+        return queued, self._sent()
+
+    def test_queue_bound_drop_oldest(self):
+        queued, sent = self._fill_blocked('drop_oldest')
+        self.assertEqual(queued, 10)
+        self.assertEqual(sent, [-1, 5, 6, 7, 8, 9])
+
+    def test_queue_bound_drop_newest(self):
+        queued, sent = self._fill_blocked('drop_newest')
+        self.assertEqual(queued, 5)
+        self.assertEqual(sent, [-1, 0, 1, 2, 3, 4])
@@ -0,0 +1,31 @@
+"""
+Settings for local benchmarks and load tests.
+
+Same as settings.py, but pointed at a throw-away database instead of the
+shared NeonDB instance: SQLite by default (BENCH_SQLITE_PATH), or a local
+Postgres when BENCH_PGDATABASE is set (BENCH_PGHOST/PORT/USER/PASSWORD).
+"""
+import os
+import tempfile
+
+from .settings import *  # noqa: F401,F403
+
+if os.getenv('BENCH_PGDATABASE'):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('BENCH_PGDATABASE'),
+            'USER': os.getenv('BENCH_PGUSER', 'postgres'),
+            'PASSWORD': os.getenv('BENCH_PGPASSWORD', ''),
+            'HOST': os.getenv('BENCH_PGHOST', 'localhost'),
+            'PORT': os.getenv('BENCH_PGPORT', '5432'),
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('BENCH_SQLITE_PATH', os.path.join(tempfile.gettempdir(), 'praxisguard_bench.sqlite3')),
+            'OPTIONS': {'timeout': 30},
+        }
+    }
@@ -85,6 +85,9 @@ DATABASES = {
         'OPTIONS': {
             'sslmode': 'require',
         },
+        # Persistent per-thread connections for the API (see serving.DBRoute)
+        'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
     }
     # Old MySQL Configuration (commented out)
     # 'default': {
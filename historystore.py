@@ -0,0 +1,360 @@
+"""Memory-mapped per-machine history files for fast window reads.
+
+Each machine gets a directory under the store root with one fixed-width,
+append-only file per column:
+
+    timestamp.i8     int64 microseconds since the epoch (UTC), strictly increasing
+    vibration.f8     float64
+    temperature.f8   float64
+    index.i8         sparse index: timestamp of every INDEX_STRIDE-th row
+
+`window` maps the files read-only and returns NumPy views for a time range,
+so slicing a long series copies nothing. The sparse index narrows the binary
+search to one stride, so a lookup touches a couple of pages.
+
+The store is kept in sync by `ingest.insert_readings` once it exists (run
+`manage.py rebuild_history` to create it from the database). Appends only
+accept rows newer than the machine's last stored timestamp; late or
+duplicate rows are skipped and counted, and a rebuild picks them up.
+
+The root is PRAXIS_HISTORY_DIR, or data/history next to this file.
+"""
+import os
+import shutil
+import threading
+from pathlib import Path
+from urllib.parse import quote, unquote
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process locking only
+    fcntl = None
+
+CHANNELS = ('vibration', 'temperature')
+INDEX_STRIDE = 1024
+_ROW_BYTES = 8
+
+_lock = threading.Lock()
+_write_lock = threading.Lock()
+_maps = {}  # machine dir -> (rows, {column: memmap}, index, timestamp file inode)
+
+
+def root() -> Path:
+    default = Path(__file__).resolve().parent / 'data' / 'history'
+    return Path(os.getenv('PRAXIS_HISTORY_DIR', default))
+
+
+def enabled() -> bool:
+    """The store is maintained once its root directory exists."""
+    return root().is_dir()
+
+
+def _machine_dir(machine_id: str, base: Path = None) -> Path:
+    return (base or root()) / quote(machine_id, safe='').replace('.', '%2E')
+
+
+def _column_files(path: Path) -> dict:
+    files = {'timestamp': path / 'timestamp.i8'}
+    files.update({c: path / f'{c}.f8' for c in CHANNELS})
+    return files
+
+
+def _dtype(column: str):
+    return np.int64 if column == 'timestamp' else np.float64
+
+
+def machines() -> list:
+    base = root()
+    if not base.is_dir():
+        return []
+    return sorted(unquote(p.name) for p in base.iterdir() if p.is_dir() and not p.name.startswith('.'))
+
+
+def has(machine_id: str) -> bool:
+    return _machine_dir(machine_id).is_dir()
+
+
+def _rows_on_disk(path: Path) -> int:
+    # Timestamps are written last, so the shortest file bounds the complete rows.
+    sizes = [f.stat().st_size if f.exists() else 0 for f in _column_files(path).values()]
+    return min(sizes) // _ROW_BYTES
+
+
+# ============================================
+# Writing
+# ============================================
+
+class _FileLock:
+    """Per-machine append lock: a thread lock, plus flock across worker processes.
+
+    The lock file sits in `<base>/.locks`, outside the machine directory that
+    `rebuild_machine` swaps, so every writer locks the same file.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path.parent / '.locks' / f'{path.name}.lock'
+
+    def __enter__(self):
+        _write_lock.acquire()
+        if fcntl:
+            try:
+                self.path.parent.mkdir(exist_ok=True)
+                self.fh = open(self.path, 'a')
+                fcntl.flock(self.fh, fcntl.LOCK_EX)
+            except BaseException:
+                _write_lock.release()
+                raise
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl:
+            fcntl.flock(self.fh, fcntl.LOCK_UN)
+            self.fh.close()
+        _write_lock.release()
+
+
+def _last_timestamp(path: Path, rows: int):
+    if not rows:
+        return None
+    with open(path / 'timestamp.i8', 'rb') as fh:
+        fh.seek((rows - 1) * _ROW_BYTES)
+        return int(np.frombuffer(fh.read(_ROW_BYTES), dtype=np.int64)[0])
+
+
+def _append_arrays(path: Path, ts_us: np.ndarray, values: dict) -> int:
+    """Append strictly-newer rows to one machine directory (caller holds the lock)."""
+    files = _column_files(path)
+    rows = _rows_on_disk(path)
+    for f in files.values():
+        # Drop a partial row left by an interrupted append
+        if f.exists() and f.stat().st_size != rows * _ROW_BYTES:
+            os.truncate(f, rows * _ROW_BYTES)
+
+    last = _last_timestamp(path, rows)
+    keep = np.ones(len(ts_us), dtype=bool)
+    keep[1:] = ts_us[1:] > ts_us[:-1]
+    if last is not None:
+        keep &= ts_us > last
+    if not keep.any():
+        return 0
+    ts_us = ts_us[keep]
+
+    for c in CHANNELS:
+        with open(files[c], 'ab') as fh:
+            fh.write(np.ascontiguousarray(values[c][keep], dtype='<f8').tobytes())
+    with open(files['timestamp'], 'ab') as fh:
+        fh.write(np.ascontiguousarray(ts_us, dtype='<i8').tobytes())
+
+    # Sparse index entries for every stride boundary crossed by this append
+    index_file = path / 'index.i8'
+    have = index_file.stat().st_size // _ROW_BYTES if index_file.exists() else 0
+    total = rows + len(ts_us)
+    starts = np.arange(have * INDEX_STRIDE, total, INDEX_STRIDE)
+    if len(starts):
+        all_ts = np.memmap(files['timestamp'], dtype='<i8', mode='r', shape=(total,))
+        with open(index_file, 'ab') as fh:
+            fh.write(np.asarray(all_ts[starts]).tobytes())
+        del all_ts
+    return len(ts_us)
+
+
+def append_machine(machine_id: str, ts_us, values: dict, base: Path = None) -> int:
+    """Append one machine's rows (sorted by time). Returns rows written."""
+    path = _machine_dir(machine_id, base)
+    path.mkdir(parents=True, exist_ok=True)
+    ts_us = np.asarray(ts_us, dtype=np.int64)
+    with _FileLock(path):
+        return _append_arrays(path, ts_us, {c: np.asarray(values[c], dtype=np.float64) for c in CHANNELS})
+
+
+def append_frame(df) -> dict:
+    """Append a normalized ingest frame (machine_id, vibration, temperature, timestamp).
+
+    Returns {'appended': n, 'skipped': n}; skipped rows were not newer than
+    what the store already holds for their machine.
+    """
+    if df.empty:
+        return {'appended': 0, 'skipped': 0}
+    df = df.sort_values(['machine_id', 'timestamp'], kind='stable')
+    ts = df['timestamp'].dt.tz_convert('UTC').dt.as_unit('us').astype('int64').to_numpy()
+    machine_ids = df['machine_id'].to_numpy()
+    values = {c: df[c].to_numpy(dtype=np.float64) for c in CHANNELS}
+
+    # Group boundaries of the sorted machine_id column
+    bounds = np.flatnonzero(machine_ids[1:] != machine_ids[:-1]) + 1
+    starts, ends = np.r_[0, bounds], np.r_[bounds, len(df)]
+    appended = 0
+    for lo, hi in zip(starts, ends):
+        appended += append_machine(str(machine_ids[lo]), ts[lo:hi], {c: v[lo:hi] for c, v in values.items()})
+    return {'appended': appended, 'skipped': len(df) - appended}
+
+
+# ============================================
+# Reading
+# ============================================
+
+def _open(path: Path):
+    """Current read-only maps for a machine directory, remapped when the files have grown."""
+    rows = _rows_on_disk(path) if path.is_dir() else 0
+    # A rebuild swaps in new files, possibly with the same row count
+    inode = (path / 'timestamp.i8').stat().st_ino if rows else None
+    with _lock:
+        cached = _maps.get(path)
+        if cached and cached[0] == rows and cached[3] == inode:
+            return cached[:3]
+        if not rows:
+            cols = {c: np.empty(0, dtype=_dtype(c)) for c in _column_files(path)}
+            index = np.empty(0, dtype=np.int64)
+        else:
+            cols = {c: np.memmap(f, dtype=_dtype(c), mode='r', shape=(rows,)) for c, f in _column_files(path).items()}
+            index_rows = -(-rows // INDEX_STRIDE)
+            index_file = path / 'index.i8'
+            if index_file.exists() and index_file.stat().st_size >= index_rows * _ROW_BYTES:
+                index = np.memmap(index_file, dtype=np.int64, mode='r', shape=(index_rows,))
+            else:
+                # Append interrupted before the index caught up: a strided view works too
+                index = cols['timestamp'][::INDEX_STRIDE]
+        _maps[path] = (rows, cols, index, inode)
+        return rows, cols, index
+
+
+def _to_us(t):
+    if t is None or isinstance(t, (int, np.integer)):
+        return t
+    import pandas as pd
+    ts = pd.Timestamp(t)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize('UTC')
+    return ts.value // 1000  # .value is always nanoseconds
+
+
+def _bound(ts: np.ndarray, index: np.ndarray, t_us: int, side: str) -> int:
+    # Pick the stride from the sparse index, then binary-search only inside it
+    block = max(0, int(np.searchsorted(index, t_us, 'right')) - 1)
+    lo = block * INDEX_STRIDE
+    return lo + int(np.searchsorted(ts[lo:lo + INDEX_STRIDE], t_us, side))
+
+
+def window(machine_id: str, start=None, end=None) -> dict:
+    """Readings of `machine_id` with start <= timestamp <= end as zero-copy views.
+
+    `start`/`end` are datetimes, pandas Timestamps, ISO strings or int
+    microseconds. Returns {'timestamp': int64 us, 'vibration': f8, 'temperature': f8}.
+    """
+    rows, cols, index = _open(_machine_dir(machine_id))
+    lo = 0 if start is None or not rows else _bound(cols['timestamp'], index, _to_us(start), 'left')
+    hi = rows if end is None or not rows else _bound(cols['timestamp'], index, _to_us(end), 'right')
+    return {c: arr[lo:max(lo, hi)] for c, arr in cols.items()}
+
+
+def tail(machine_id: str, n: int) -> dict:
+    """The last `n` readings of `machine_id` as views."""
+    rows, cols, _ = _open(_machine_dir(machine_id))
+    return {c: arr[max(0, rows - n):] for c, arr in cols.items()}
+
+
+def to_frame(view: dict):
+    """DataFrame (timestamp, vibration, temperature) for a `window` result; copies the data."""
+    import pandas as pd
+    return pd.DataFrame({
+        'timestamp': pd.to_datetime(np.asarray(view['timestamp']), unit='us', utc=True),
+        **{c: np.asarray(view[c]) for c in CHANNELS},
+    })
+
+
+# ============================================
+# Rebuild from the database
+# ============================================
+
+def _db_batches(machine_id: str, batch_rows: int, after_us: int = None):
+    """(ts_us, {channel: values}) batches of archived then hot readings, oldest first.
+
+    With `after_us`, only hot readings newer than it (archiving only moves
+    older rows, so the archive has nothing newer).
+    """
+    import pandas as pd
+
+    import archive
+    from core_db.models import SensorReading
+
+    hot = SensorReading.objects.filter(machine_id=machine_id)
+    if after_us is None:
+        archived = archive.read_range(machine_id)
+        if not archived.empty:
+            yield (archived['timestamp'].dt.as_unit('us').astype('int64').to_numpy(),
+                   {c: archived[c].to_numpy(dtype=np.float64) for c in CHANNELS})
+    else:
+        hot = hot.filter(timestamp__gt=pd.Timestamp(after_us, unit='us', tz='UTC').to_pydatetime())
+
+    rows = (hot.order_by('timestamp', 'id')
+            .values_list('timestamp', *CHANNELS).iterator(chunk_size=batch_rows))
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_rows:
+            yield _rows_to_arrays(pd, batch)
+            batch = []
+    if batch:
+        yield _rows_to_arrays(pd, batch)
+
+
+def _rows_to_arrays(pd, rows: list):
+    ts = pd.DatetimeIndex([r[0] for r in rows]).tz_convert('UTC').as_unit('us').asi8
+    return ts, {c: np.array([r[i + 1] for r in rows], dtype=np.float64) for i, c in enumerate(CHANNELS)}
+
+
+def rebuild_machine(machine_id: str, batch_rows: int = 50000) -> int:
+    """Rewrite one machine's files from the archive tier and SensorReading. Returns rows stored."""
+    base = root()
+    staging = base / '.rebuild'
+    target = _machine_dir(machine_id, base)
+    tmp = _machine_dir(machine_id, staging)
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    written = 0
+    for ts, values in _db_batches(machine_id, batch_rows):
+        written += _append_arrays(tmp, ts, values)
+
+    # Appends that landed in the live directory while we read are lost with it, so catch
+    # up on rows committed since and swap under the machine's lock; appends waiting on
+    # it then go to the new directory, where rows it already has are skipped.
+    target.mkdir(parents=True, exist_ok=True)
+    with _FileLock(target):
+        for ts, values in _db_batches(machine_id, batch_rows, _last_timestamp(tmp, _rows_on_disk(tmp))):
+            written += _append_arrays(tmp, ts, values)
+        old = staging / f'{target.name}.old'
+        shutil.rmtree(old, ignore_errors=True)
+        os.replace(target, old)
+        os.replace(tmp, target)
+    shutil.rmtree(old, ignore_errors=True)
+    with _lock:
+        _maps.pop(target, None)
+    return written
+
+
+def rebuild(machine_ids=None, batch_rows: int = 50000, progress=None) -> dict:
+    """Rebuild the store for `machine_ids` (default: every machine in the database)."""
+    from core_db.models import ArchiveChunk, SensorReading
+
+    if machine_ids is None:
+        hot = SensorReading.objects.order_by().values_list('machine_id', flat=True).distinct()
+        cold = ArchiveChunk.objects.order_by().values_list('machine_id', flat=True).distinct()
+        machine_ids = sorted(set(hot) | set(cold))
+    root().mkdir(parents=True, exist_ok=True)
+    total = 0
+    for i, machine_id in enumerate(machine_ids, 1):
+        total += rebuild_machine(machine_id, batch_rows)
+        if progress:
+            progress(i, len(machine_ids), total)
+    shutil.rmtree(root() / '.rebuild', ignore_errors=True)
+    return {'machines': len(machine_ids), 'rows': total}
+
+
+def stats() -> dict:
+    ids = machines()
+    rows = sum(_rows_on_disk(_machine_dir(m)) for m in ids)
+    return {'root': str(root()), 'machines': len(ids), 'rows': rows,
+            'bytes': rows * _ROW_BYTES * (1 + len(CHANNELS))}
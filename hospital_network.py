@@ -0,0 +1,207 @@
+"""Hospital network store for PraxisGuard backup-equipment search.
+
+The network (hospitals, coordinates and equipment) is loaded once from a JSON
+file and indexed two ways:
+
+  - (equipment type, status) -> available units per hospital
+  - a lat/lon grid per (equipment type, status) holding only hospitals that
+    actually have such a unit available
+
+`nearest()` walks grid rings outwards from the origin and stops as soon as no
+unvisited cell can beat the current k-th best haversine distance, so a query
+touches a handful of cells instead of the whole network.
+"""
+import heapq
+import json
+import math
+import os
+from pathlib import Path
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEG_LAT = 111.19
+
+DEFAULT_NETWORK_PATH = Path(__file__).resolve().parent / 'data' / 'hospital_network.json'
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two lat/lon points in kilometres."""
+    p1 = math.radians(lat1)
+    p2 = math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _key(equipment_type: str, status: str) -> tuple:
+    return (equipment_type.strip().lower(), status.strip().lower())
+
+
+class HospitalNetwork:
+    """In-memory, indexed view of the hospital network."""
+
+    def __init__(self, hospitals: list, origin: dict = None, cell_deg: float = 0.1):
+        self.hospitals = hospitals
+        self.origin = origin or {}
+        self.cell_deg = cell_deg
+        # (type, status) -> {hospital index: [units]}
+        self._units = {}
+        # (type, status) -> {(cell_lat, cell_lon): [hospital index]}
+        self._grid = {}
+        # (type, status) -> (min_i, max_i, min_j, max_j) cell bounds
+        self._bounds = {}
+        # lower-cased location name -> (lat, lon)
+        self._locations = {}
+
+        if self.origin.get('location'):
+            self._locations[self.origin['location'].lower()] = (self.origin['lat'], self.origin['lon'])
+
+        for idx, hospital in enumerate(hospitals):
+            lat, lon = hospital['lat'], hospital['lon']
+            if hospital.get('location'):
+                self._locations.setdefault(hospital['location'].lower(), (lat, lon))
+            cell = self._cell(lat, lon)
+            for unit in hospital.get('equipment', []):
+                if not unit.get('available'):
+                    continue
+                key = _key(unit['equipmentType'], unit['status'])
+                per_hospital = self._units.setdefault(key, {})
+                if idx not in per_hospital:
+                    self._grid.setdefault(key, {}).setdefault(cell, []).append(idx)
+                    self._extend_bounds(key, cell)
+                per_hospital.setdefault(idx, []).append(unit)
+
+    @classmethod
+    def from_dict(cls, data: dict, **kwargs) -> 'HospitalNetwork':
+        return cls(data.get('hospitals', []), origin=data.get('origin'), **kwargs)
+
+    @classmethod
+    def from_file(cls, path, **kwargs) -> 'HospitalNetwork':
+        with open(path, encoding='utf-8') as fh:
+            return cls.from_dict(json.load(fh), **kwargs)
+
+    def _cell(self, lat: float, lon: float) -> tuple:
+        return (math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg))
+
+    def _extend_bounds(self, key, cell):
+        b = self._bounds.get(key)
+        if b is None:
+            self._bounds[key] = (cell[0], cell[0], cell[1], cell[1])
+        else:
+            self._bounds[key] = (min(b[0], cell[0]), max(b[1], cell[0]),
+                                 min(b[2], cell[1]), max(b[3], cell[1]))
+
+    def resolve_origin(self, location: str = None, lat: float = None, lon: float = None) -> tuple:
+        """Return (lat, lon) for explicit coordinates, a known location name, or the network origin."""
+        if lat is not None and lon is not None:
+            return (lat, lon)
+        if location and location.lower() in self._locations:
+            return self._locations[location.lower()]
+        return (self.origin.get('lat', 0.0), self.origin.get('lon', 0.0))
+
+    def available_units(self, equipment_type: str, status: str = 'operational') -> dict:
+        """Map hospital index -> available units of `equipment_type` in `status`."""
+        return self._units.get(_key(equipment_type, status), {})
+
+    def nearest(self, equipment_type: str, lat: float, lon: float, k: int = 10,
+                status: str = 'operational', max_km: float = None) -> list:
+        """Return up to `k` (distance_km, hospital, units) tuples, nearest first."""
+        key = _key(equipment_type, status)
+        grid = self._grid.get(key)
+        if not grid or k <= 0:
+            return []
+        units = self._units[key]
+        min_i, max_i, min_j, max_j = self._bounds[key]
+        ci, cj = self._cell(lat, lon)
+        max_ring = max(abs(ci - min_i), abs(ci - max_i), abs(cj - min_j), abs(cj - max_j))
+
+        best = []  # max-heap of (-distance, idx) holding the k nearest so far
+        for ring in range(max_ring + 1):
+            for cell in self._ring_cells(ci, cj, ring):
+                for idx in grid.get(cell, ()):
+                    h = self.hospitals[idx]
+                    d = haversine_km(lat, lon, h['lat'], h['lon'])
+                    if max_km is not None and d > max_km:
+                        continue
+                    if len(best) < k:
+                        heapq.heappush(best, (-d, idx))
+                    elif d < -best[0][0]:
+                        heapq.heapreplace(best, (-d, idx))
+            # Anything outside this ring is at least `ring` cells away in lat or lon.
+            edge_lat = min(89.9, abs(lat) + (ring + 1) * self.cell_deg)
+            bound_km = ring * self.cell_deg * KM_PER_DEG_LAT * math.cos(math.radians(edge_lat))
+            if max_km is not None and bound_km > max_km:
+                break
+            if len(best) == k and -best[0][0] <= bound_km:
+                break
+
+        return [(d, self.hospitals[idx], units[idx]) for d, idx in sorted((-nd, idx) for nd, idx in best)]
+
+    @staticmethod
+    def _ring_cells(ci: int, cj: int, ring: int):
+        if ring == 0:
+            yield (ci, cj)
+            return
+        for dj in range(-ring, ring + 1):
+            yield (ci - ring, cj + dj)
+            yield (ci + ring, cj + dj)
+        for di in range(-ring + 1, ring):
+            yield (ci + di, cj - ring)
+            yield (ci + di, cj + ring)
+
+
+_network = None
+
+
+def get_network() -> HospitalNetwork:
+    """Return the process-wide network, loading it on first use.
+
+    The file is read from `HOSPITAL_NETWORK_PATH` if set, else `data/hospital_network.json`.
+    """
+    global _network
+    if _network is None:
+        _network = HospitalNetwork.from_file(os.getenv('HOSPITAL_NETWORK_PATH', DEFAULT_NETWORK_PATH))
+    return _network
+
+
+def reload_network(path=None) -> HospitalNetwork:
+    """Drop the cached network and load it again (optionally from `path`)."""
+    global _network
+    _network = HospitalNetwork.from_file(path or os.getenv('HOSPITAL_NETWORK_PATH', DEFAULT_NETWORK_PATH))
+    return _network
+
+
+def _synthetic_network(n_hospitals: int, units_per_hospital: int, seed: int = 0) -> HospitalNetwork:
+    import random
+    rng = random.Random(seed)
+    types = ['MRI Scanner', 'CT Scanner', 'Ventilator', 'Patient Monitor', 'X-Ray Machine', 'Ultrasound']
+    hospitals = []
+    for h in range(n_hospitals):
+        hospitals.append({
+            'hospitalId': f'HOSP-{h:05d}',
+            'hospitalName': f'Hospital {h}',
+            'location': f'Zone {h % 50}',
+            'lat': rng.uniform(8.0, 30.0),
+            'lon': rng.uniform(68.0, 90.0),
+            'equipment': [{
+                'equipmentType': rng.choice(types),
+                'equipmentId': f'EQ-{h:05d}-{u:02d}',
+                'status': 'operational' if rng.random() < 0.9 else 'maintenance',
+                'available': rng.random() < 0.7,
+            } for u in range(units_per_hospital)],
+        })
+    return HospitalNetwork(hospitals, origin={'lat': 19.076, 'lon': 72.8777}, cell_deg=0.5)
+
+
+if __name__ == '__main__':
+    # quick benchmark: 5k hospitals x 10 units = 50k units
+    import random
+    import time
+    net = _synthetic_network(5000, 10)
+    rng = random.Random(1)
+    queries = [(rng.uniform(8.0, 30.0), rng.uniform(68.0, 90.0)) for _ in range(2000)]
+    start = time.perf_counter()
+    for qlat, qlon in queries:
+        net.nearest('Ventilator', qlat, qlon, k=5)
+    elapsed = time.perf_counter() - start
+    print(f"{len(queries)} k=5 queries over 5000 hospitals: {elapsed / len(queries) * 1e3:.3f} ms/query")
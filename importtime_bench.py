@@ -0,0 +1,129 @@
+"""Import-time benchmark for the PraxisGuard API.
+
+Runs `python -X importtime -c "import api"` in fresh interpreters, parses the
+per-module timings from stderr and reports the median total import time plus
+the most expensive top-level packages. Fails (exit 1) when the median goes
+over `--budget-ms` or when a package that should load lazily (the agent/LLM
+stack, pandas) is pulled in at import time, so startup regressions show up
+in CI and before/after comparisons.
+
+Run from project root:
+    python importtime_bench.py
+    python importtime_bench.py --runs 10 --budget-ms 1500 --out importtime.json
+    python importtime_bench.py --baseline importtime.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+root = Path(__file__).resolve().parent
+
+# Loaded on first use (agents on first /api/run_agent, pandas on first DataFrame endpoint).
+LAZY_PACKAGES = ['agents', 'crewai', 'crewai_tools', 'langchain_google_genai', 'dotenv', 'pandas']
+
+
+def parse_importtime(stderr: str) -> list:
+    """Parse `-X importtime` output into (module, self_us, cumulative_us, depth) tuples."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # header line
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        rows.append((name.strip(), int(parts[0]), int(parts[1]), depth))
+    return rows
+
+
+def measure(module: str) -> dict:
+    env = dict(os.environ)
+    env.setdefault('PYTHONPATH', str(root))
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=root, env=env, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    rows = parse_importtime(proc.stderr)
+    by_package = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        by_package[name.split('.', 1)[0]] += self_us
+    return {
+        'wall_ms': wall * 1000,
+        'import_ms': sum(r[1] for r in rows) / 1000,
+        'packages_ms': {k: v / 1000 for k, v in by_package.items()},
+        'modules': {r[0] for r in rows},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure API import time with -X importtime.")
+    parser.add_argument('--module', default='api')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15, help='packages to list')
+    parser.add_argument('--budget-ms', type=float, help='fail if the median import time exceeds this')
+    parser.add_argument('--allow', nargs='*', default=[], help='lazy packages allowed at import time')
+    parser.add_argument('--out', help='write results JSON here')
+    parser.add_argument('--baseline', help='previous results JSON to compare against')
+    args = parser.parse_args(argv)
+
+    runs = [measure(args.module) for _ in range(args.runs)]
+    import_ms = statistics.median(r['import_ms'] for r in runs)
+    wall_ms = statistics.median(r['wall_ms'] for r in runs)
+    packages = defaultdict(list)
+    for r in runs:
+        for pkg, ms in r['packages_ms'].items():
+            packages[pkg].append(ms)
+    package_ms = {pkg: statistics.median(v) for pkg, v in packages.items()}
+
+    print(f"import {args.module}: median {import_ms:.1f} ms imports, {wall_ms:.1f} ms process wall ({args.runs} runs)")
+    print(f"\nTop {args.top} packages by self time:")
+    for pkg, ms in sorted(package_ms.items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"  {pkg:<32} {ms:>9.1f} ms")
+
+    eager = sorted(p for p in LAZY_PACKAGES if p in runs[0]['modules'] and p not in args.allow)
+    failed = False
+    if eager:
+        print(f"\nFAIL: should load lazily but imported at startup: {', '.join(eager)}")
+        failed = True
+    if args.budget_ms is not None and import_ms > args.budget_ms:
+        print(f"\nFAIL: {import_ms:.1f} ms is over the {args.budget_ms:.1f} ms budget")
+        failed = True
+
+    report = {
+        'module': args.module,
+        'runs': args.runs,
+        'python': sys.version.split()[0],
+        'import_ms': round(import_ms, 2),
+        'wall_ms': round(wall_ms, 2),
+        'packages_ms': {k: round(v, 2) for k, v in sorted(package_ms.items(), key=lambda kv: -kv[1])},
+        'eager_lazy_packages': eager,
+    }
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as fh:
+            json.dump(report, fh, indent=2)
+        print(f"\nWrote {args.out}")
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as fh:
+            base = json.load(fh)
+        print(f"\nChange vs {args.baseline}: imports {base['import_ms']:.1f} -> {import_ms:.1f} ms "
+              f"({(import_ms / base['import_ms'] - 1) * 100:+.1f}%)")
+        for pkg, ms in sorted(package_ms.items(), key=lambda kv: -kv[1])[:args.top]:
+            before = base['packages_ms'].get(pkg, 0.0)
+            if abs(ms - before) >= 5:
+                print(f"  {pkg:<32} {before:>9.1f} -> {ms:.1f} ms")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
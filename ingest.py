@@ -0,0 +1,188 @@
+"""Bulk sensor-reading ingest for PraxisGuard.
+
+`insert_readings` is the single bulk write path for backfills, generators and
+simulators: it takes a DataFrame of (machine_id, vibration, temperature,
+timestamp), keeps the source timestamps, skips rows already stored for the
+same (machine_id, timestamp) - in the hot table or already moved to the
+cold archive (see archive.py) - and loads the rest with `bulk_create` - or with
+Postgres `COPY` when available - so reruns are idempotent. Committed rows are
+also appended to the memory-mapped history store when it exists (see
+historystore.py), and queued for n8n with PRAXIS_N8N_STREAM=1 (see
+forwarder.py). Fresh readings that cross the PoF threshold publish an alert
+in the same transaction (see triggers.py).
+
+Requires Django to be set up before import (see api.py).
+"""
+import io
+import logging
+from typing import TYPE_CHECKING
+
+import numpy as np
+from django.db import connection, transaction
+
+from core_db.models import ArchiveChunk, SensorReading
+import archive
+import forwarder
+import historystore
+import metrics
+import multichannel
+import riskindex
+import triggers
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+READING_COLUMNS = ['machine_id', 'vibration', 'temperature', 'timestamp']
+
+logger = logging.getLogger('praxis.history')
+
+
+def normalize_frame(df: 'pd.DataFrame', source_tz: str = 'UTC') -> tuple:
+    """Coerce types, drop invalid rows and localize naive timestamps.
+
+    Returns (clean DataFrame, number of rows dropped as invalid).
+    """
+    import pandas as pd
+
+    df = df[READING_COLUMNS].copy()
+    df['machine_id'] = df['machine_id'].astype('string').str.strip()
+    df['vibration'] = pd.to_numeric(df['vibration'], errors='coerce')
+    df['temperature'] = pd.to_numeric(df['temperature'], errors='coerce')
+    ts = pd.to_datetime(df['timestamp'], errors='coerce', format='mixed')
+    if ts.dt.tz is None:
+        ts = ts.dt.tz_localize(source_tz, ambiguous='NaT', nonexistent='NaT')
+    df['timestamp'] = ts.dt.tz_convert('UTC')
+    before = len(df)
+    df = df.dropna()
+    df = df[df['machine_id'] != '']
+    return df, before - len(df)
+
+
+def _drop_stored(df: 'pd.DataFrame') -> 'pd.DataFrame':
+    """`df` without the (machine_id, timestamp) pairs already stored, via the (machine_id, timestamp) index."""
+    existing = set(SensorReading.objects.filter(
+        machine_id__in=df['machine_id'].unique().tolist(),
+        timestamp__gte=df['timestamp'].min().to_pydatetime(),
+        timestamp__lte=df['timestamp'].max().to_pydatetime(),
+    ).values_list('machine_id', 'timestamp'))
+    if not existing:
+        return df
+    keys = zip(df['machine_id'].tolist(), df['timestamp'].dt.to_pydatetime())
+    return df[np.fromiter(((m, ts) not in existing for m, ts in keys), dtype=bool, count=len(df))]
+
+
+def _drop_archived(df: 'pd.DataFrame') -> 'pd.DataFrame':
+    """`df` without the rows already moved to the cold archive (one query when nothing overlaps)."""
+    import pandas as pd
+
+    overlapping = list(ArchiveChunk.objects.filter(
+        machine_id__in=df['machine_id'].unique().tolist(),
+        start__lte=df['timestamp'].max().to_pydatetime(),
+        end__gte=df['timestamp'].min().to_pydatetime(),
+    ).order_by().values_list('machine_id', flat=True).distinct())
+    if not overlapping:
+        return df
+    ts_us = pd.DatetimeIndex(df['timestamp']).as_unit('us').asi8
+    archived = np.zeros(len(df), dtype=bool)
+    for machine_id in overlapping:
+        rows = (df['machine_id'] == machine_id).to_numpy()
+        stored = archive.read_range(machine_id, df['timestamp'][rows].min(), df['timestamp'][rows].max())
+        archived[rows] = np.isin(ts_us[rows], pd.DatetimeIndex(stored['timestamp']).as_unit('us').asi8)
+    return df[~archived]
+
+
+def _bulk_create(df: 'pd.DataFrame', batch_size: int) -> int:
+    objs = [
+        SensorReading(machine_id=m, vibration=v, temperature=t, timestamp=ts)
+        for m, ts, v, t in zip(df['machine_id'].tolist(), df['timestamp'].dt.to_pydatetime(),
+                               df['vibration'].tolist(), df['temperature'].tolist())
+    ]
+    SensorReading.objects.bulk_create(objs, batch_size=batch_size)
+    return len(objs)
+
+
+def _copy_insert(df: 'pd.DataFrame', dedupe: bool) -> int:
+    table = SensorReading._meta.db_table
+    buf = io.StringIO()
+    out = df.assign(timestamp=df['timestamp'].map(lambda t: t.isoformat()))
+    out.to_csv(buf, sep='\t', header=False, index=False, columns=READING_COLUMNS)
+    buf.seek(0)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS _ingest_stage "
+            "(machine_id varchar(100), vibration double precision, temperature double precision, "
+            "timestamp timestamptz) ON COMMIT DELETE ROWS"
+        )
+        raw = cursor.cursor
+        # CSV format, matching to_csv's quoting; text format would mis-read quotes, tabs and backslashes
+        copy_sql = ("COPY _ingest_stage (machine_id, vibration, temperature, timestamp) "
+                    "FROM STDIN WITH (FORMAT csv, DELIMITER E'\\t')")
+        if hasattr(raw, 'copy_expert'):  # psycopg2
+            raw.copy_expert(copy_sql, buf)
+        else:  # psycopg 3
+            with raw.copy(copy_sql) as copy:
+                copy.write(buf.getvalue())
+        select = "SELECT machine_id, vibration, temperature, timestamp FROM _ingest_stage s"
+        if dedupe:
+            # Stored rows were already dropped; this guards against a concurrent writer
+            select += (
+                f" WHERE NOT EXISTS (SELECT 1 FROM {table} r"
+                f" WHERE r.machine_id = s.machine_id AND r.timestamp = s.timestamp)"
+            )
+        cursor.execute(f"INSERT INTO {table} (machine_id, vibration, temperature, timestamp) {select}")
+        return cursor.rowcount
+
+
+def insert_readings(df: 'pd.DataFrame', dedupe: bool = True, method: str = 'auto', batch_size: int = 5000) -> dict:
+    """Insert a normalized frame of readings in one transaction.
+
+    `method` is 'bulk_create', 'copy' (Postgres only) or 'auto' (copy on
+    Postgres). Returns {'inserted': n, 'duplicates': n}. Only the rows
+    actually inserted reach the downstream hooks (risk index, triggers, n8n
+    stream, history store), so rerunning a backfill doesn't replay them.
+    """
+    if method == 'auto':
+        method = 'copy' if connection.vendor == 'postgresql' else 'bulk_create'
+    if method == 'copy' and connection.vendor != 'postgresql':
+        raise ValueError("COPY loading requires PostgreSQL")
+    if df.empty:
+        return {'inserted': 0, 'duplicates': 0}
+    if dedupe:
+        unique = _drop_stored(_drop_archived(df.drop_duplicates(['machine_id', 'timestamp'])))
+        if unique.empty:
+            return {'inserted': 0, 'duplicates': len(df)}
+    else:
+        unique = df
+
+    with transaction.atomic():
+        if method == 'copy':
+            inserted = _copy_insert(unique, dedupe)
+        else:
+            inserted = _bulk_create(unique, batch_size)
+        if multichannel.dual_write_enabled():
+            # Migration period: keep the multi-channel table in step (see multichannel.py)
+            multichannel.insert(unique, multichannel.LEGACY_CHANNELS, batch_size)
+        if triggers.enabled():
+            # Alerts commit with the readings that raised them; a failure here must not lose the readings
+            try:
+                with transaction.atomic():
+                    triggers.process_batch(unique)
+            except Exception:
+                logging.getLogger('praxis.triggers').exception("PoF trigger evaluation failed")
+    metrics.ingest_rows.labels_(method).inc(inserted)
+    riskindex.record_batch(unique)
+    if forwarder.stream_enabled():
+        fwd = forwarder.get_forwarder()
+        if fwd is not None:
+            fwd.submit_frame(unique)
+    if historystore.enabled():
+        try:
+            synced = historystore.append_frame(unique)
+        except OSError as e:
+            # The DB is the source of truth; `manage.py rebuild_history` repairs the store
+            logger.warning("history store append failed: %s", e)
+        else:
+            if synced['skipped']:
+                logger.debug("history store skipped %d late or duplicate rows", synced['skipped'])
+    return {'inserted': inserted, 'duplicates': len(df) - inserted}
@@ -0,0 +1,457 @@
+"""Binary sensor ingest gateway for PraxisGuard (asyncio TCP + UDP).
+
+Bedside devices report several times per second; HTTP+JSON per sample costs
+far more than the reading itself. The gateway accepts compact binary frames
+and feeds them to the bulk ingest path (`ingest.insert_readings`).
+
+Wire format (little-endian). One frame = header + fixed-size records:
+
+    header   2s  magic b'PX'
+             B   version (1)
+             B   channels per record (C >= len(CHANNELS))
+             H   record count (N)
+             I   payload length in bytes (N * record size)
+    record   16s machine id, ASCII, NUL-padded
+             q   timestamp, microseconds since the Unix epoch (UTC)
+             Cf  channel values as float32, in CHANNELS order
+                 (channels beyond the known ones are ignored)
+
+Over TCP frames are sent back to back on one connection; over UDP each
+datagram carries exactly one frame. Records are decoded with `np.frombuffer`
+over a `memoryview` of the payload, so parsing never copies or loops in
+Python per record.
+
+Decoded frames go through a bounded queue to the DB flushers, which coalesce
+whatever is queued into one bulk insert. When the flushers fall behind the
+queue fills up: TCP connections stop being read (the kernel window closes and
+clients block in `drain()`), while UDP datagrams are dropped and counted.
+
+    python ingest_gateway.py serve --tcp-port 9750 --udp-port 9751
+    python ingest_gateway.py bench --machines 2000 --frames 500 --records 200 [--sink null]
+"""
+import argparse
+import asyncio
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+
+MAGIC = b'PX'
+VERSION = 1
+CHANNELS = ('vibration', 'temperature')
+ID_BYTES = 16
+HEADER = struct.Struct('<2sBBHI')
+MAX_RECORDS = 0xFFFF
+
+
+class ProtocolError(ValueError):
+    pass
+
+
+def record_dtype(channels: int) -> np.dtype:
+    """Packed record layout matching the wire format."""
+    return np.dtype([('machine_id', f'S{ID_BYTES}'), ('ts_us', '<i8'), ('values', '<f4', (channels,))])
+
+
+# ============================================
+# Encoding / decoding
+# ============================================
+
+def encode_frame(machine_ids, timestamps_us, values) -> bytes:
+    """Pack N readings into one frame. `values` is an (N, channels) array."""
+    values = np.asarray(values, dtype='<f4')
+    if values.ndim == 1:
+        values = values.reshape(-1, 1)
+    n, channels = values.shape
+    if n > MAX_RECORDS:
+        raise ProtocolError(f"at most {MAX_RECORDS} records per frame, got {n}")
+    records = np.empty(n, dtype=record_dtype(channels))
+    records['machine_id'] = np.asarray(machine_ids, dtype=f'S{ID_BYTES}')
+    records['ts_us'] = timestamps_us
+    records['values'] = values
+    payload = records.tobytes()
+    return HEADER.pack(MAGIC, VERSION, channels, n, len(payload)) + payload
+
+
+def parse_header(buf) -> tuple:
+    """Validate a frame header; returns (channels, records, payload length)."""
+    magic, version, channels, count, length = HEADER.unpack_from(buf)
+    if magic != MAGIC:
+        raise ProtocolError(f"bad magic {magic!r}")
+    if version != VERSION:
+        raise ProtocolError(f"unsupported version {version}")
+    if channels < len(CHANNELS):
+        raise ProtocolError(f"records carry {channels} channels, need at least {len(CHANNELS)}")
+    if length != count * record_dtype(channels).itemsize:
+        raise ProtocolError(f"payload length {length} does not match {count} records x {channels} channels")
+    return channels, count, length
+
+
+def decode_payload(payload, channels: int) -> np.ndarray:
+    """Zero-copy view of a frame payload as a structured record array."""
+    records = np.frombuffer(memoryview(payload), dtype=record_dtype(channels))
+    # Machine IDs must be ASCII, or decoding them at flush time fails for the whole coalesced batch
+    if (records.view(np.uint8).reshape(len(records), -1)[:, :ID_BYTES] >= 0x80).any():
+        raise ProtocolError("machine id is not ASCII")
+    return records
+
+
+def decode_frame(frame) -> np.ndarray:
+    """Decode a complete frame (header + payload), e.g. one UDP datagram."""
+    view = memoryview(frame)
+    if len(view) < HEADER.size:
+        raise ProtocolError("truncated header")
+    channels, _, length = parse_header(view)
+    if len(view) != HEADER.size + length:
+        raise ProtocolError(f"frame is {len(view)} bytes, header says {HEADER.size + length}")
+    return decode_payload(view[HEADER.size:], channels)
+
+
+def records_to_frame(batches: list):
+    """Concatenate decoded record arrays into an ingest DataFrame.
+
+    Records with an empty machine ID or a NaN/inf channel value are left out.
+    """
+    import pandas as pd
+
+    known = len(CHANNELS)
+    ids, ts, cols = [], [], [[] for _ in CHANNELS]
+    for records in batches:
+        ids.append(records['machine_id'])
+        ts.append(records['ts_us'])
+        values = records['values']
+        for i in range(known):
+            cols[i].append(values[:, i])
+    machine_ids = np.concatenate(ids).astype(f'U{ID_BYTES}')
+    valid = np.char.strip(machine_ids) != ''
+    data = {'machine_id': machine_ids.astype(object)}
+    for name, parts in zip(CHANNELS, cols):
+        data[name] = np.concatenate(parts).astype(np.float64)
+        valid &= np.isfinite(data[name])
+    data['timestamp'] = pd.to_datetime(np.concatenate(ts), unit='us', utc=True)
+    df = pd.DataFrame(data)
+    return df if valid.all() else df[valid].reset_index(drop=True)
+
+
+# ============================================
+# Server
+# ============================================
+
+class GatewayStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.frames = 0
+        self.records = 0
+        self.rows_written = 0
+        self.flushes = 0
+        self.udp_dropped = 0
+        self.protocol_errors = 0
+        self.invalid_records = 0
+        self.flush_errors = 0
+
+    def line(self, queue: asyncio.Queue) -> str:
+        elapsed = time.perf_counter() - self.started
+        return (f"[GW] {self.records:,} records in {self.frames:,} frames, {self.rows_written:,} written "
+                f"({self.rows_written / elapsed:,.0f} rows/sec, {self.flushes} flushes), "
+                f"queue {queue.qsize()}/{queue.maxsize}, udp dropped {self.udp_dropped}, "
+                f"protocol errors {self.protocol_errors}, invalid records {self.invalid_records}, "
+                f"flush errors {self.flush_errors}")
+
+
+class DbSink:
+    """Bulk insert through ingest.insert_readings on a worker thread."""
+
+    def __init__(self, dedupe: bool = False):
+        self.dedupe = dedupe
+
+    async def write(self, df):
+        import ingest
+        result = await asyncio.to_thread(ingest.insert_readings, df, self.dedupe)
+        return result['inserted']
+
+
+class NullSink:
+    """Discard rows (measures decode/transport throughput without the DB)."""
+
+    async def write(self, df):
+        return len(df)
+
+
+class _UdpProtocol(asyncio.DatagramProtocol):
+    def __init__(self, gateway):
+        self.gateway = gateway
+
+    def datagram_received(self, data, addr):
+        gw = self.gateway
+        try:
+            records = decode_frame(data)
+        except (ProtocolError, struct.error):
+            gw.stats.protocol_errors += 1
+            return
+        try:
+            gw.queue.put_nowait(records)
+        except asyncio.QueueFull:
+            # No flow control on UDP: shed load rather than buffer without bound.
+            gw.stats.udp_dropped += len(records)
+            return
+        gw.stats.frames += 1
+        gw.stats.records += len(records)
+
+
+class Gateway:
+    """TCP/UDP listeners feeding a bounded queue drained by bulk-insert flushers."""
+
+    def __init__(self, sink=None, queue_frames: int = 256, batch_rows: int = 20000, flushers: int = 2):
+        self.sink = sink or DbSink()
+        self.queue = asyncio.Queue(maxsize=queue_frames)
+        self.batch_rows = batch_rows
+        self.stats = GatewayStats()
+        self._flushers = [asyncio.create_task(self._flush_loop()) for _ in range(flushers)]
+        self._servers = []
+        self._transports = []
+
+    async def start(self, host: str = '0.0.0.0', tcp_port: int = None, udp_port: int = None):
+        loop = asyncio.get_running_loop()
+        if tcp_port is not None:
+            server = await asyncio.start_server(self.handle_tcp, host, tcp_port)
+            self._servers.append(server)
+        if udp_port is not None:
+            transport, _ = await loop.create_datagram_endpoint(lambda: _UdpProtocol(self), local_addr=(host, udp_port))
+            self._transports.append(transport)
+        return self
+
+    @property
+    def tcp_port(self):
+        return self._servers[0].sockets[0].getsockname()[1] if self._servers else None
+
+    @property
+    def udp_port(self):
+        return self._transports[0].get_extra_info('sockname')[1] if self._transports else None
+
+    async def handle_tcp(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    header = await reader.readexactly(HEADER.size)
+                except asyncio.IncompleteReadError:
+                    return  # clean close between frames
+                channels, _, length = parse_header(header)
+                payload = await reader.readexactly(length)
+                records = decode_payload(payload, channels)
+                # Blocks while the flushers are behind, so this connection stops being read.
+                await self.queue.put(records)
+                self.stats.frames += 1
+                self.stats.records += len(records)
+        except (ProtocolError, struct.error, asyncio.IncompleteReadError) as e:
+            # The stream can't be resynchronized after a bad frame; drop the connection.
+            self.stats.protocol_errors += 1
+            print(f"[GW] closing {writer.get_extra_info('peername')}: {e}")
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _flush_loop(self):
+        while True:
+            batch = [await self.queue.get()]
+            rows = len(batch[0])
+            # Coalesce whatever else is already queued into the same insert.
+            while rows < self.batch_rows and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+                rows += len(batch[-1])
+            try:
+                await self._write(batch)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def _write(self, batch: list):
+        df = records_to_frame(batch)
+        try:
+            self.stats.rows_written += await self.sink.write(df)
+            self.stats.flushes += 1
+            self.stats.invalid_records += sum(len(records) for records in batch) - len(df)
+            return
+        except Exception as e:
+            if len(batch) == 1:
+                self.stats.flush_errors += 1
+                print(f"[GW] flush failed, {len(batch[0])} rows lost: {e}")
+                return
+            print(f"[GW] flush of {len(batch)} frames failed, retrying frame by frame: {e}")
+        # The batch mixes frames from many connections; one bad frame must not lose the others
+        for records in batch:
+            await self._write([records])
+
+    async def drain(self):
+        """Wait until every queued frame has been written."""
+        await self.queue.join()
+
+    async def close(self):
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        for transport in self._transports:
+            transport.close()
+        await self.drain()
+        for task in self._flushers:
+            task.cancel()
+
+
+# ============================================
+# Clients
+# ============================================
+
+class GatewayClient:
+    """TCP client: `await send(ids, timestamps_us, values)` blocks when the gateway applies backpressure."""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 9750):
+        self.host = host
+        self.port = port
+        self.writer = None
+
+    async def connect(self):
+        _, self.writer = await asyncio.open_connection(self.host, self.port)
+        return self
+
+    async def send(self, machine_ids, timestamps_us, values):
+        self.writer.write(encode_frame(machine_ids, timestamps_us, values))
+        await self.writer.drain()
+
+    async def send_frame(self, frame: bytes):
+        self.writer.write(frame)
+        await self.writer.drain()
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+class UdpClient:
+    """Fire-and-forget UDP client; keep frames under the path MTU (~40 records)."""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 9751):
+        import socket
+        self.addr = (host, port)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def send(self, machine_ids, timestamps_us, values):
+        self.sock.sendto(encode_frame(machine_ids, timestamps_us, values), self.addr)
+
+    def close(self):
+        self.sock.close()
+
+
+# ============================================
+# CLI
+# ============================================
+
+def _setup_django():
+    import django
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'hackathon_core'))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hackathon_core.settings')
+    django.setup()
+
+
+def _sink(args):
+    if args.sink == 'null':
+        return NullSink()
+    _setup_django()
+    return DbSink(dedupe=args.dedupe)
+
+
+async def _report(gateway, every: float):
+    while True:
+        await asyncio.sleep(every)
+        print(gateway.stats.line(gateway.queue))
+
+
+async def serve(args):
+    gateway = await Gateway(_sink(args), args.queue_frames, args.batch_rows, args.flushers).start(
+        args.host, args.tcp_port, args.udp_port)
+    print(f"[GW] listening tcp {gateway.tcp_port} udp {gateway.udp_port} (sink {args.sink})")
+    reporter = asyncio.create_task(_report(gateway, args.report_every))
+    try:
+        await asyncio.Event().wait()
+    finally:
+        reporter.cancel()
+        await gateway.close()
+        print(gateway.stats.line(gateway.queue))
+
+
+async def bench(args):
+    """Run a gateway and N TCP clients in-process and measure end-to-end rows/sec."""
+    import fleet_generator
+
+    gateway = await Gateway(_sink(args), args.queue_frames, args.batch_rows, args.flushers).start(
+        '127.0.0.1', 0, None)
+    ids = np.array(fleet_generator.machine_ids(args.machines), dtype=f'S{ID_BYTES}')
+    rng = np.random.default_rng(args.seed)
+    # Pre-encode every frame so the benchmark measures the gateway, not the client.
+    # Timestamps are unique per record so no row is dropped as a duplicate.
+    base_us = int(time.time() * 1e6)
+    pool = []
+    for i in range(args.frames):
+        pick = rng.integers(0, len(ids), args.records)
+        ts = base_us + i * args.records + np.arange(args.records, dtype=np.int64)
+        values = np.column_stack([rng.normal(30, 5, args.records), rng.normal(55, 3, args.records)])
+        pool.append(encode_frame(ids[pick], ts, values))
+    frame_bytes = len(pool[0])
+
+    async def client(n_frames, offset):
+        c = await GatewayClient('127.0.0.1', gateway.tcp_port).connect()
+        for i in range(n_frames):
+            await c.send_frame(pool[offset + i])
+        await c.close()
+
+    per_client = args.frames // args.clients
+    total_records = per_client * args.clients * args.records
+    print(f"[BENCH] {args.clients} clients x {per_client} frames x {args.records} records "
+          f"({frame_bytes} bytes/frame, {frame_bytes / args.records:.1f} bytes/record), sink {args.sink}")
+    start = time.perf_counter()
+    await asyncio.gather(*(client(per_client, k * per_client) for k in range(args.clients)))
+    sent = time.perf_counter() - start
+    # Readers may still be parked on a full queue; wait until every record is written.
+    while gateway.stats.records < total_records:
+        await asyncio.sleep(0.01)
+    await gateway.drain()
+    elapsed = time.perf_counter() - start
+    await gateway.close()
+    s = gateway.stats
+    print(f"[BENCH] clients done in {sent:.2f}s; all rows written in {elapsed:.2f}s")
+    print(f"[BENCH] {s.rows_written:,} rows -> {s.rows_written / elapsed:,.0f} rows/sec end to end, "
+          f"{s.flushes} flushes (avg {s.rows_written / max(s.flushes, 1):,.0f} rows), "
+          f"{frame_bytes * per_client * args.clients / elapsed / 1e6:.1f} MB/s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Binary TCP/UDP sensor ingest gateway.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    for name in ('serve', 'bench'):
+        p = sub.add_parser(name)
+        p.add_argument('--sink', choices=['db', 'null'], default='db')
+        p.add_argument('--dedupe', action='store_true', help='skip rows already stored (extra query per flush)')
+        p.add_argument('--queue-frames', type=int, default=256, help='decoded frames buffered before backpressure')
+        p.add_argument('--batch-rows', type=int, default=20000, help='max rows coalesced into one insert')
+        p.add_argument('--flushers', type=int, default=2)
+        if name == 'serve':
+            p.add_argument('--host', default='0.0.0.0')
+            p.add_argument('--tcp-port', type=int, default=9750)
+            p.add_argument('--udp-port', type=int, default=9751)
+            p.add_argument('--report-every', type=float, default=5.0)
+        else:
+            p.add_argument('--machines', type=int, default=2000)
+            p.add_argument('--clients', type=int, default=8)
+            p.add_argument('--frames', type=int, default=400, help='total frames across all clients')
+            p.add_argument('--records', type=int, default=200, help='records per frame')
+            p.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args) if args.command == 'serve' else bench(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""Parts inventory and ordering for PraxisGuard.
+
+Stock lives in `core_db.InventoryPart`. Orders never read-modify-write the
+quantity: stock is taken with a single conditional UPDATE
+(`quantity >= requested`) in the same transaction that records the
+`PartOrder`, so concurrent agents ordering the same scarce part can never
+drive it below zero. An optional idempotency key makes retried orders return
+the original order instead of reserving stock twice.
+
+Requires Django to be set up before import (see api.py).
+"""
+import uuid
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core_db.models import InventoryPart, PartOrder
+
+
+class InventoryError(Exception):
+    """Base class for ordering failures surfaced to API callers."""
+
+
+class UnknownPart(InventoryError):
+    pass
+
+
+class InsufficientStock(InventoryError):
+    def __init__(self, part_id: str, requested: int, available: int):
+        super().__init__(f"Insufficient stock for {part_id}: requested {requested}, available {available}")
+        self.part_id = part_id
+        self.requested = requested
+        self.available = available
+
+
+def delivery_days_for(priority: str) -> int:
+    return 1 if priority == "critical" else (2 if priority == "high" else 5)
+
+
+def part_to_dict(part: InventoryPart) -> dict:
+    return {
+        "partId": part.part_id,
+        "partName": part.part_name,
+        "quantity": part.quantity,
+        "minStock": part.min_stock,
+        "status": part.stock_status,
+    }
+
+
+def order_to_dict(order: PartOrder) -> dict:
+    return {
+        "orderId": order.order_id,
+        "partId": order.part.part_id,
+        "quantity": order.quantity,
+        "deviceId": order.device_id,
+        "priority": order.priority,
+        "status": order.status,
+        "estimatedDelivery": order.estimated_delivery.isoformat(),
+    }
+
+
+def get_inventory(device_type: str = None) -> dict:
+    """Return {equipment_type: [part dicts]} plus the latest update time, in one query."""
+    parts = InventoryPart.objects.all()
+    if device_type:
+        parts = parts.filter(equipment_type=device_type)
+    inventory = {}
+    last_updated = None
+    for part in parts:
+        inventory.setdefault(part.equipment_type, []).append(part_to_dict(part))
+        if last_updated is None or part.updated_at > last_updated:
+            last_updated = part.updated_at
+    return {"inventory": inventory, "lastUpdated": last_updated.isoformat() if last_updated else None}
+
+
+def place_order(part_id: str, quantity: int, device_id: str, priority: str = "high",
+                idempotency_key: str = None) -> tuple:
+    """Reserve `quantity` units of `part_id` and record the order.
+
+    Returns (order, replayed) where `replayed` is True when an order with the
+    same idempotency key already existed. Raises UnknownPart / InsufficientStock.
+    """
+    if quantity < 1:
+        raise InventoryError("quantity must be at least 1")
+
+    if idempotency_key:
+        existing = PartOrder.objects.select_related('part').filter(idempotency_key=idempotency_key).first()
+        if existing:
+            return existing, True
+
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            reserved = InventoryPart.objects.filter(part_id=part_id, quantity__gte=quantity).update(
+                quantity=F('quantity') - quantity, updated_at=now
+            )
+            if not reserved:
+                part = InventoryPart.objects.filter(part_id=part_id).first()
+                if part is None:
+                    raise UnknownPart(f"Unknown part: {part_id}")
+                raise InsufficientStock(part_id, quantity, part.quantity)
+
+            order = PartOrder.objects.create(
+                order_id=f"ORD-{uuid.uuid4().hex[:8].upper()}",
+                part=InventoryPart.objects.get(part_id=part_id),
+                quantity=quantity,
+                device_id=device_id,
+                priority=priority,
+                idempotency_key=idempotency_key or None,
+                estimated_delivery=now + timedelta(days=delivery_days_for(priority)),
+            )
+    except IntegrityError:
+        # A concurrent request with the same key won the race; its transaction
+        # holds the reservation and ours was rolled back.
+        if idempotency_key:
+            existing = PartOrder.objects.select_related('part').filter(idempotency_key=idempotency_key).first()
+            if existing:
+                return existing, True
+        raise
+    return order, False
+
@@ -0,0 +1,231 @@
+"""In-process HTTP load test for the PraxisGuard FastAPI app.
+
+Boots `api.app` against a throw-away database (hackathon_core.bench_settings:
+SQLite by default, or a local Postgres via BENCH_PG* variables), seeds a
+synthetic fleet, then drives each endpoint through an async httpx client
+over ASGI with the requested concurrency. For every endpoint it reports
+throughput, p50/p95/p99 latency and DB queries per request, and writes the
+results to JSON so runs can be compared.
+
+Run from project root:
+    python loadtest_api.py --machines 200 --readings 50 --requests 500 --concurrency 32
+    python loadtest_api.py --only iot_sensors machines --baseline previous.json
+"""
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+root = Path(__file__).resolve().parent
+if str(root / 'hackathon_core') not in sys.path:
+    sys.path.insert(0, str(root / 'hackathon_core'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hackathon_core.bench_settings')
+
+SCENARIOS = [
+    {'name': 'iot_sensors', 'method': 'GET', 'path': '/api/iot/sensors'},
+    {'name': 'machines', 'method': 'GET', 'path': '/api/machines'},
+    {'name': 'sensor_readings', 'method': 'GET', 'path': '/api/sensor-readings', 'params': {'limit': 100}},
+    {'name': 'stats', 'method': 'GET', 'path': '/api/stats'},
+    {'name': 'agent_logs', 'method': 'GET', 'path': '/api/agent-logs', 'params': {'limit': 100}},
+    {'name': 'inventory', 'method': 'GET', 'path': '/api/inventory'},
+    {'name': 'hospital_network', 'method': 'GET', 'path': '/api/hospital-network',
+     'params': {'equipmentType': 'Ventilator', 'location': 'Downtown'}},
+    {'name': 'maintenance_schedule', 'method': 'GET', 'path': '/api/maintenance/schedule'},
+    {'name': 'crisis_alert', 'method': 'POST', 'path': '/api/crisis-alert',
+     'json': {'deviceId': 'VEN-0001', 'equipmentType': 'Ventilator', 'location': 'Downtown'}},
+]
+
+# Per-request query counter; copied into the threadpool that runs sync endpoints.
+_current = contextvars.ContextVar('loadtest_request', default=None)
+
+
+class _RequestStats:
+    __slots__ = ('queries',)
+
+    def __init__(self):
+        self.queries = 0
+
+
+def _count_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+    return execute(sql, params, many, context)
+
+
+def install_query_counter():
+    """Attach the counter to every DB connection, including ones opened later in worker threads."""
+    import metrics
+
+    metrics.attach_execute_wrapper(_count_query, 'praxis_loadtest_queries')
+
+
+def prepare_database(machines: int, readings: int, seed: int):
+    """Migrate the bench database and (re)seed it with a synthetic fleet."""
+    import django
+    django.setup()
+    from django.core.management import call_command
+    from core_db.models import AgentLog, SensorReading
+    import pandas as pd
+    import fleet_generator
+    import ingest
+
+    call_command('migrate', verbosity=0)
+    SensorReading.objects.all().delete()
+    AgentLog.objects.all().delete()
+
+    end = pd.Timestamp.now(tz='UTC').floor('s')
+    start = end - pd.Timedelta(seconds=5 * readings)
+    for df, _ in fleet_generator.generate_fleet(machines, start, end, interval_s=5, seed=seed):
+        ingest.insert_readings(df, dedupe=False)
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+async def run_scenario(client, scenario: dict, requests: int, concurrency: int) -> dict:
+    latencies = []
+    queries = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def one():
+        nonlocal errors
+        stats = _RequestStats()
+        token = _current.set(stats)
+        try:
+            start = time.perf_counter()
+            resp = await client.request(
+                scenario['method'], scenario['path'], params=scenario.get('params'), json=scenario.get('json')
+            )
+            latencies.append(time.perf_counter() - start)
+            queries.append(stats.queries)
+            body = resp.json()
+            if resp.status_code >= 400 or (isinstance(body, dict) and 'error' in body):
+                errors += 1
+        finally:
+            _current.reset(token)
+
+    async def worker():
+        for _ in remaining:
+            await one()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    ms = lambda v: round(v * 1000, 3) if v is not None else None  # noqa: E731
+    return {
+        'method': scenario['method'],
+        'path': scenario['path'],
+        'requests': requests,
+        'concurrency': concurrency,
+        'errors': errors,
+        'throughput_rps': round(requests / wall, 2) if wall else None,
+        'latency_ms': {
+            'mean': ms(sum(latencies) / len(latencies)) if latencies else None,
+            'p50': ms(_percentile(latencies, 50)),
+            'p95': ms(_percentile(latencies, 95)),
+            'p99': ms(_percentile(latencies, 99)),
+            'max': ms(latencies[-1]) if latencies else None,
+        },
+        'db_queries_per_request': round(sum(queries) / len(queries), 2) if queries else None,
+    }
+
+
+async def run_all(scenarios, requests: int, concurrency: int) -> dict:
+    import httpx
+    import api
+
+    transport = httpx.ASGITransport(app=api.app)
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url='http://loadtest') as client:
+        for scenario in scenarios:
+            # one warm-up request so lazy imports and caches don't skew the first sample
+            await client.request(scenario['method'], scenario['path'],
+                                 params=scenario.get('params'), json=scenario.get('json'))
+            results[scenario['name']] = await run_scenario(client, scenario, requests, concurrency)
+            r = results[scenario['name']]
+            print(f"  {scenario['name']:<22} {r['throughput_rps']:>9.1f} req/s  "
+                  f"p50 {r['latency_ms']['p50']:>8.2f} ms  p95 {r['latency_ms']['p95']:>8.2f} ms  "
+                  f"p99 {r['latency_ms']['p99']:>8.2f} ms  {r['db_queries_per_request']:>7} q/req  "
+                  f"errors {r['errors']}")
+    return results
+
+
+def compare(results: dict, baseline_path: str):
+    with open(baseline_path, encoding='utf-8') as fh:
+        baseline = json.load(fh).get('results', {})
+    print(f"\nChange vs {baseline_path}:")
+    for name, r in results.items():
+        b = baseline.get(name)
+        if not b:
+            continue
+        d_rps = (r['throughput_rps'] / b['throughput_rps'] - 1) * 100 if b.get('throughput_rps') else 0.0
+        d_p95 = (r['latency_ms']['p95'] / b['latency_ms']['p95'] - 1) * 100 if b['latency_ms'].get('p95') else 0.0
+        print(f"  {name:<22} throughput {d_rps:+6.1f}%  p95 {d_p95:+6.1f}%  "
+              f"queries {b['db_queries_per_request']} -> {r['db_queries_per_request']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="In-process load test for the FastAPI app.")
+    parser.add_argument('--machines', type=int, default=200)
+    parser.add_argument('--readings', type=int, default=50, help='readings per machine')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--requests', type=int, default=200, help='requests per endpoint')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--only', nargs='+', choices=[s['name'] for s in SCENARIOS])
+    parser.add_argument('--no-seed', action='store_true', help='reuse the existing bench database as-is')
+    parser.add_argument('--out', default='loadtest_results.json')
+    parser.add_argument('--baseline', help='previous results JSON to compare against')
+    args = parser.parse_args(argv)
+
+    if args.no_seed:
+        import django
+        django.setup()
+    else:
+        print(f"Seeding {args.machines} machines x {args.readings} readings...")
+        prepare_database(args.machines, args.readings, args.seed)
+    install_query_counter()
+
+    from django.db import connection
+    scenarios = [s for s in SCENARIOS if not args.only or s['name'] in args.only]
+    print(f"Driving {len(scenarios)} endpoints: {args.requests} requests each, concurrency {args.concurrency} "
+          f"({connection.vendor})")
+    results = asyncio.run(run_all(scenarios, args.requests, args.concurrency))
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'database': connection.vendor,
+            'machines': args.machines,
+            'readings_per_machine': args.readings,
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'python': platform.python_version(),
+            'cpu_count': os.cpu_count(),
+        },
+        'results': results,
+    }
+    with open(args.out, 'w', encoding='utf-8') as fh:
+        json.dump(report, fh, indent=2)
+    print(f"\nWrote {args.out}")
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,308 @@
+"""Prometheus-style runtime metrics for PraxisGuard.
+
+No external dependency: counters, gauges and histograms keep one small list
+per thread ("shard") and only sum the shards when `/metrics` is scraped, so
+the hot path is a couple of list-slot increments with no locks. A lock is
+taken once per (metric, thread) to register the shard, and once per new
+label set.
+
+Wiring (see api.py):
+  - `MetricsMiddleware` times every request per route template and, through
+    a Django `execute_wrapper` installed on each DB connection, counts the
+    queries and DB time spent inside it;
+  - `ingest_rows`, `agent_*`, `cache_*`, `webhook_*`/`outbox_*`, `n8n_*` and
+    `*trigger*` are updated by the modules that own those paths;
+  - `render()` produces the text exposition format.
+"""
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RUN_BUCKETS = (0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+class _Sharded:
+    """Per-thread list of floats, summed on read."""
+
+    def __init__(self, width: int):
+        self._width = width
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+
+    def _shard(self) -> list:
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = [0.0] * self._width
+            self._local.shard = shard
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def _totals(self) -> list:
+        totals = [0.0] * self._width
+        for shard in list(self._shards):
+            for i, v in enumerate(shard):
+                totals[i] += v
+        return totals
+
+
+class Counter(_Sharded):
+    def __init__(self):
+        super().__init__(1)
+
+    def inc(self, amount: float = 1.0):
+        self._shard()[0] += amount
+
+    def value(self) -> float:
+        return self._totals()[0]
+
+
+class Gauge(Counter):
+    """Up/down gauge; each thread's net change is summed on read."""
+
+    def dec(self, amount: float = 1.0):
+        self._shard()[0] -= amount
+
+
+class Histogram(_Sharded):
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        # one slot per bucket + overflow, then sum and count
+        super().__init__(len(self.buckets) + 3)
+
+    def observe(self, value: float):
+        shard = self._shard()
+        shard[bisect_left(self.buckets, value)] += 1
+        shard[-2] += value
+        shard[-1] += 1
+
+    def snapshot(self) -> tuple:
+        """(cumulative bucket counts incl. +Inf, sum, count)"""
+        totals = self._totals()
+        cumulative = []
+        running = 0.0
+        for v in totals[:len(self.buckets) + 1]:
+            running += v
+            cumulative.append(running)
+        return cumulative, totals[-2], totals[-1]
+
+
+class Family:
+    """A named metric with label sets created on first use."""
+
+    def __init__(self, name: str, kind: str, help_text: str, labels=(), factory=None):
+        self.name = name
+        self.kind = kind
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._factory = factory or {'counter': Counter, 'gauge': Gauge, 'histogram': Histogram}[kind]
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels_(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._factory()
+                    self._children[values] = child
+        return child
+
+    def total(self) -> float:
+        """Sum over all label sets (counters and gauges)."""
+        return sum(child.value() for child in list(self._children.values()))
+
+    def render(self, out: list):
+        out.append(f"# HELP {self.name} {self.help}")
+        out.append(f"# TYPE {self.name} {self.kind}")
+        for values, child in sorted(self._children.items()):
+            pairs = [f'{k}="{_escape(v)}"' for k, v in zip(self.labels, values)]
+            if self.kind == 'histogram':
+                cumulative, total, count = child.snapshot()
+                for bound, c in zip(list(child.buckets) + ['+Inf'], cumulative):
+                    le = 'le="%s"' % bound
+                    out.append(f"{self.name}_bucket{{{','.join(pairs + [le])}}} {_num(c)}")
+                label_str = f"{{{','.join(pairs)}}}" if pairs else ''
+                out.append(f"{self.name}_sum{label_str} {_num(total)}")
+                out.append(f"{self.name}_count{label_str} {_num(count)}")
+            else:
+                label_str = f"{{{','.join(pairs)}}}" if pairs else ''
+                out.append(f"{self.name}{label_str} {_num(child.value())}")
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _num(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+REGISTRY = []
+
+
+def _family(name, kind, help_text, labels=(), factory=None) -> Family:
+    fam = Family(name, kind, help_text, labels, factory)
+    REGISTRY.append(fam)
+    return fam
+
+
+http_request_duration = _family(
+    'praxis_http_request_duration_seconds', 'histogram', 'Request latency by route.', ('method', 'route'))
+http_requests = _family(
+    'praxis_http_requests_total', 'counter', 'Requests by route and status.', ('method', 'route', 'status'))
+http_in_flight = _family(
+    'praxis_http_requests_in_flight', 'gauge', 'Requests currently being served.')
+db_queries = _family(
+    'praxis_db_queries_total', 'counter', 'DB queries issued while serving requests.', ('route',))
+db_time = _family(
+    'praxis_db_query_seconds_total', 'counter', 'DB time spent while serving requests.', ('route',))
+db_queries_per_request = _family(
+    'praxis_db_queries_per_request', 'histogram', 'DB queries per request.', ('route',),
+    factory=lambda: Histogram((0, 1, 2, 5, 10, 25, 50, 100, 500)))
+ingest_rows = _family(
+    'praxis_ingest_rows_total', 'counter', 'Sensor rows written by the bulk ingest path.', ('method',))
+agent_queue_depth = _family(
+    'praxis_agent_queue_depth', 'gauge', 'Agent runs dispatched but not finished.')
+agent_run_duration = _family(
+    'praxis_agent_run_duration_seconds', 'histogram', 'Background agent run duration.', ('outcome',),
+    factory=lambda: Histogram(RUN_BUCKETS))
+cache_requests = _family(
+    'praxis_cache_requests_total', 'counter', 'Cache lookups by cache and result (hit/miss).', ('cache', 'result'))
+webhook_deliveries = _family(
+    'praxis_webhook_deliveries_total', 'counter', 'Outbox webhook attempts by endpoint and result.',
+    ('endpoint', 'result'))
+webhook_duration = _family(
+    'praxis_webhook_request_duration_seconds', 'histogram', 'Webhook POST latency by endpoint.', ('endpoint',))
+outbox_delivery_lag = _family(
+    'praxis_outbox_delivery_lag_seconds', 'histogram', 'Time from outbox event to successful delivery.',
+    ('endpoint',), factory=lambda: Histogram(RUN_BUCKETS))
+pof_triggers = _family(
+    'praxis_pof_triggers_total', 'counter', 'Devices seen at or above the PoF threshold on ingest, by result.',
+    ('result',))
+trigger_detection_lag = _family(
+    'praxis_trigger_detection_lag_seconds', 'histogram', 'Time from a threshold-crossing reading to its alert.')
+n8n_readings = _family(
+    'praxis_n8n_readings_total', 'counter', 'Readings handled by the n8n forwarder by result.', ('result',))
+n8n_queue_depth = _family(
+    'praxis_n8n_queue_depth', 'gauge', 'Readings waiting in the n8n forwarder queue.')
+n8n_batch_size = _family(
+    'praxis_n8n_batch_size', 'histogram', 'Readings per n8n webhook call.',
+    factory=lambda: Histogram((1, 2, 5, 10, 25, 50, 100, 250, 500)))
+n8n_post_duration = _family(
+    'praxis_n8n_post_duration_seconds', 'histogram', 'n8n webhook call latency by outcome.', ('outcome',))
+
+
+def render() -> str:
+    out = []
+    for fam in REGISTRY:
+        fam.render(out)
+    return '\n'.join(out) + '\n'
+
+
+# ============================================
+# Request / DB instrumentation
+# ============================================
+
+# [queries, db seconds] for the request being served; follows sync endpoints into the threadpool.
+_request_db = contextvars.ContextVar('praxis_request_db', default=None)
+
+
+def _db_wrapper(execute, sql, params, many, context):
+    slot = _request_db.get()
+    if slot is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        slot[0] += 1
+        slot[1] += time.perf_counter() - start
+
+
+def attach_execute_wrapper(wrapper, dispatch_uid: str):
+    """Add `wrapper` to every Django DB connection's execute_wrappers, current and future.
+
+    Sync endpoints run on threadpool threads with their own connections, so
+    wrapping only the calling thread's connection would miss their queries.
+    """
+    from django.db import connections
+    from django.db.backends.signals import connection_created
+
+    def _attach(sender, connection, **kwargs):
+        if wrapper not in connection.execute_wrappers:
+            connection.execute_wrappers.append(wrapper)
+
+    connection_created.connect(_attach, weak=False, dispatch_uid=dispatch_uid)
+    for conn in connections.all(initialized_only=True):
+        _attach(None, conn)
+
+
+def install_db_instrumentation():
+    """Attach the query wrapper to every Django DB connection, current and future."""
+    attach_execute_wrapper(_db_wrapper, 'praxis_metrics_db')
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording latency, status and DB usage per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+        slot = [0, 0.0]
+        token = _request_db.set(slot)
+        in_flight = http_in_flight.labels_()
+        in_flight.inc()
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                status[0] = message['status']
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _request_db.reset(token)
+            in_flight.dec()
+            route = getattr(scope.get('route'), 'path', None) or '<unmatched>'
+            method = scope.get('method', '')
+            http_request_duration.labels_(method, route).observe(elapsed)
+            http_requests.labels_(method, route, str(status[0])).inc()
+            db_queries.labels_(route).inc(slot[0])
+            db_time.labels_(route).inc(slot[1])
+            db_queries_per_request.labels_(route).observe(slot[0])
+
+
+def track_agent_run(func):
+    """Wrap a background agent entry point to report queue depth and run duration.
+
+    Call the returned function's `.dispatched()` when the run is queued.
+    """
+    depth = agent_queue_depth.labels_()
+
+    def run(*args, **kwargs):
+        start = time.perf_counter()
+        outcome = 'ok'
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            outcome = 'error'
+            raise
+        finally:
+            depth.dec()
+            agent_run_duration.labels_(outcome).observe(time.perf_counter() - start)
+
+    run.dispatched = depth.inc
+    return run
@@ -1,74 +1,122 @@
 """
 MySQL to PostgreSQL (NeonDB) Migration Script
 
-This script migrates all data from local MySQL database 'agentic' 
-to a PostgreSQL NeonDB instance.
+Streams application tables from the local MySQL database to PostgreSQL:
+
+  - rows are read with an unbuffered (server-side) MySQL cursor in id order,
+    so memory stays flat regardless of table size;
+  - each chunk is loaded with `COPY ... FROM STDIN` into a temp staging table
+    and upserted into the target, in the same transaction that records the
+    chunk in `_mysql_migration_chunks` - an interrupted run resumes after the
+    last committed chunk;
+  - tables are migrated in parallel, one worker (and connection pair) each;
+  - a verification pass re-reads every recorded chunk from PostgreSQL and
+    compares its checksum with the one computed from the MySQL rows.
+
+Configuration is read from the environment (or a .env file):
+
+    MYSQL_HOST, MYSQL_PORT, MYSQL_USER, MYSQL_PASSWORD, MYSQL_DATABASE
+    PGHOST, PGPORT, PGUSER, PGPASSWORD, PGDATABASE, PGSSLMODE
 
 Usage:
-    python migrate_mysql_to_postgres.py
+    python migrate_mysql_to_postgres.py [--chunk-size 50000] [--workers 2]
+                                        [--tables core_db_sensorreading]
+                                        [--restart] [--verify-only] [--no-verify]
 """
 
+import argparse
+import hashlib
+import io
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
 import mysql.connector
 import psycopg2
-from psycopg2 import sql
-from datetime import datetime
+from dotenv import load_dotenv
 
-# ============================================
-# MySQL Configuration (Source)
-# ============================================
-MYSQL_CONFIG = {
-    'host': 'localhost',
-    'port': 3306,
-    'user': 'root',
-    'password': 'Achukuchu@123',
-    'database': 'agentic'
-}
+load_dotenv()
 
 # ============================================
-# PostgreSQL NeonDB Configuration (Target)
-# REPLACE THESE WITH YOUR NEONDB CREDENTIALS
+# Tables to migrate: name -> columns (first column is the integer key)
 # ============================================
-POSTGRES_CONFIG = {
-    'host': 'ep-calm-math-a1vvkyrp-pooler.ap-southeast-1.aws.neon.tech',       # e.g., 'ep-xxx-xxx-123456.us-east-2.aws.neon.tech'
-    'port': 5432,
-    'user': 'neondb_owner',                  # e.g., 'neondb_owner'
-    'password': 'npg_UtnlcBap4h9G',          # Your NeonDB password
-    'database': 'neondb',          # e.g., 'neondb'
-    'sslmode': 'require'                         # NeonDB requires SSL
+TABLES = {
+    'core_db_agentlog': ['id', 'machine_id', 'status', 'risk_score', 'recommendation', 'timestamp'],
+    'core_db_sensorreading': ['id', 'machine_id', 'vibration', 'temperature', 'timestamp'],
 }
 
+CHECKPOINT_TABLE = '_mysql_migration_chunks'
+
+
+def mysql_config():
+    """MySQL (source) connection settings from the environment."""
+    return {
+        'host': os.getenv('MYSQL_HOST', 'localhost'),
+        'port': int(os.getenv('MYSQL_PORT', '3306')),
+        'user': os.getenv('MYSQL_USER', 'root'),
+        'password': os.getenv('MYSQL_PASSWORD', ''),
+        'database': os.getenv('MYSQL_DATABASE', 'agentic'),
+    }
+
+
+def postgres_config():
+    """PostgreSQL (target) connection settings from the environment."""
+    return {
+        'host': os.getenv('PGHOST'),
+        'port': int(os.getenv('PGPORT', '5432')),
+        'user': os.getenv('PGUSER'),
+        'password': os.getenv('PGPASSWORD'),
+        'database': os.getenv('PGDATABASE'),
+        'sslmode': os.getenv('PGSSLMODE', 'require'),
+    }
+
 
 def get_mysql_connection():
     """Create MySQL connection"""
-    print("Connecting to MySQL...")
-    conn = mysql.connector.connect(**MYSQL_CONFIG)
-    print("✓ Connected to MySQL")
-    return conn
+    return mysql.connector.connect(**mysql_config())
 
 
 def get_postgres_connection():
-    """Create PostgreSQL connection"""
-    print("Connecting to PostgreSQL NeonDB...")
-    conn = psycopg2.connect(
-        host=POSTGRES_CONFIG['host'],
-        port=POSTGRES_CONFIG['port'],
-        user=POSTGRES_CONFIG['user'],
-        password=POSTGRES_CONFIG['password'],
-        database=POSTGRES_CONFIG['database'],
-        sslmode=POSTGRES_CONFIG['sslmode']
-    )
-    print("✓ Connected to PostgreSQL NeonDB")
-    return conn
+    """Create PostgreSQL connection (session pinned to UTC so timestamps compare exactly)"""
+    return psycopg2.connect(options='-c timezone=UTC', **postgres_config())
+
+
+# ============================================
+# Row encoding shared by COPY and checksums
+# ============================================
+
+def _copy_field(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, datetime):
+        # MySQL DATETIME is naive UTC (Django USE_TZ); Postgres returns aware values.
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.isoformat() + '+00:00'
+    if isinstance(value, float):
+        return repr(value)
+    text = str(value)
+    return text.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
 
 
+def copy_line(row):
+    """Encode one row in COPY text format; also the canonical form used for checksums."""
+    return '\t'.join(_copy_field(v) for v in row) + '\n'
+
+
+# ============================================
+# Schema and checkpoints
+# ============================================
+
 def create_postgres_tables(pg_conn):
-    """Create tables in PostgreSQL matching MySQL schema"""
+    """Create tables in PostgreSQL matching the Django schema, plus the checkpoint table"""
     cursor = pg_conn.cursor()
-    
-    # Create AgentLog table
+
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS core_db_agentlog (
-            id SERIAL PRIMARY KEY,
+            id BIGSERIAL PRIMARY KEY,
             machine_id VARCHAR(100) NOT NULL,
             status VARCHAR(50) NOT NULL,
             risk_score FLOAT NOT NULL,
@@ -76,230 +124,238 @@ def create_postgres_tables(pg_conn):
             timestamp TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
         );
     """)
-    
-    # Create SensorReading table
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS core_db_sensorreading (
-            id SERIAL PRIMARY KEY,
+            id BIGSERIAL PRIMARY KEY,
             machine_id VARCHAR(100) NOT NULL,
             vibration FLOAT NOT NULL,
             temperature FLOAT NOT NULL,
             timestamp TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
         );
     """)
-    
-    # Create indexes for SensorReading (matching Django model)
     cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_sensorreading_machine_id 
+        CREATE INDEX IF NOT EXISTS idx_sensorreading_machine_id
         ON core_db_sensorreading(machine_id);
     """)
     cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_sensorreading_timestamp 
+        CREATE INDEX IF NOT EXISTS idx_sensorreading_timestamp
         ON core_db_sensorreading(timestamp);
     """)
     cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_sensorreading_machine_timestamp 
+        CREATE INDEX IF NOT EXISTS idx_sensorreading_machine_timestamp
         ON core_db_sensorreading(machine_id, timestamp DESC);
     """)
-    
-    pg_conn.commit()
-    print("✓ PostgreSQL tables created")
-
-
-def migrate_agentlog(mysql_conn, pg_conn):
-    """Migrate AgentLog data"""
-    mysql_cursor = mysql_conn.cursor(dictionary=True)
-    pg_cursor = pg_conn.cursor()
-    
-    # Fetch all data from MySQL
-    mysql_cursor.execute("SELECT * FROM core_db_agentlog")
-    rows = mysql_cursor.fetchall()
-    
-    if not rows:
-        print("  No AgentLog records to migrate")
-        return 0
-    
-    # Insert into PostgreSQL
-    insert_query = """
-        INSERT INTO core_db_agentlog (id, machine_id, status, risk_score, recommendation, timestamp)
-        VALUES (%s, %s, %s, %s, %s, %s)
-        ON CONFLICT (id) DO UPDATE SET
-            machine_id = EXCLUDED.machine_id,
-            status = EXCLUDED.status,
-            risk_score = EXCLUDED.risk_score,
-            recommendation = EXCLUDED.recommendation,
-            timestamp = EXCLUDED.timestamp;
-    """
-    
-    count = 0
-    for row in rows:
-        pg_cursor.execute(insert_query, (
-            row['id'],
-            row['machine_id'],
-            row['status'],
-            row['risk_score'],
-            row['recommendation'],
-            row['timestamp']
-        ))
-        count += 1
-    
-    # Update sequence to continue from max id
-    pg_cursor.execute("""
-        SELECT setval('core_db_agentlog_id_seq', COALESCE((SELECT MAX(id) FROM core_db_agentlog), 1), true);
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {CHECKPOINT_TABLE} (
+            table_name TEXT NOT NULL,
+            chunk_no INTEGER NOT NULL,
+            first_id BIGINT NOT NULL,
+            last_id BIGINT NOT NULL,
+            row_count INTEGER NOT NULL,
+            checksum TEXT NOT NULL,
+            migrated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (table_name, chunk_no)
+        );
     """)
-    
     pg_conn.commit()
-    print(f"  ✓ Migrated {count} AgentLog records")
-    return count
-
-
-def migrate_sensorreading(mysql_conn, pg_conn):
-    """Migrate SensorReading data"""
-    mysql_cursor = mysql_conn.cursor(dictionary=True)
-    pg_cursor = pg_conn.cursor()
-    
-    # Fetch all data from MySQL
-    mysql_cursor.execute("SELECT * FROM core_db_sensorreading")
-    rows = mysql_cursor.fetchall()
-    
-    if not rows:
-        print("  No SensorReading records to migrate")
-        return 0
-    
-    # Insert into PostgreSQL in batches
-    insert_query = """
-        INSERT INTO core_db_sensorreading (id, machine_id, vibration, temperature, timestamp)
-        VALUES (%s, %s, %s, %s, %s)
-        ON CONFLICT (id) DO UPDATE SET
-            machine_id = EXCLUDED.machine_id,
-            vibration = EXCLUDED.vibration,
-            temperature = EXCLUDED.temperature,
-            timestamp = EXCLUDED.timestamp;
-    """
-    
-    count = 0
-    batch_size = 100
-    
-    for i, row in enumerate(rows):
-        pg_cursor.execute(insert_query, (
-            row['id'],
-            row['machine_id'],
-            row['vibration'],
-            row['temperature'],
-            row['timestamp']
-        ))
-        count += 1
-        
-        # Commit in batches
-        if (i + 1) % batch_size == 0:
-            pg_conn.commit()
-            print(f"    Migrated {count} records...")
-    
-    # Update sequence to continue from max id
-    pg_cursor.execute("""
-        SELECT setval('core_db_sensorreading_id_seq', COALESCE((SELECT MAX(id) FROM core_db_sensorreading), 1), true);
-    """)
-    
+
+
+def last_checkpoint(pg_conn, table):
+    """Return (next chunk number, last migrated id) for `table`."""
+    cursor = pg_conn.cursor()
+    cursor.execute(
+        f"SELECT COALESCE(MAX(chunk_no), -1), COALESCE(MAX(last_id), 0) FROM {CHECKPOINT_TABLE} WHERE table_name = %s",
+        (table,)
+    )
+    chunk_no, last_id = cursor.fetchone()
+    return chunk_no + 1, last_id
+
+
+def reset_checkpoints(pg_conn, tables):
+    cursor = pg_conn.cursor()
+    cursor.execute(f"DELETE FROM {CHECKPOINT_TABLE} WHERE table_name = ANY(%s)", (list(tables),))
     pg_conn.commit()
-    print(f"  ✓ Migrated {count} SensorReading records")
-    return count
-
-
-def migrate_django_tables(mysql_conn, pg_conn):
-    """Migrate Django system tables if they exist"""
-    mysql_cursor = mysql_conn.cursor()
-    pg_cursor = pg_conn.cursor()
-    
-    # List of Django system tables to check
-    django_tables = [
-        'django_migrations',
-        'django_content_type',
-        'auth_group',
-        'auth_permission',
-        'auth_group_permissions',
-        'auth_user',
-        'auth_user_groups',
-        'auth_user_user_permissions',
-        'django_admin_log',
-        'django_session'
-    ]
-    
-    # Get list of tables in MySQL
-    mysql_cursor.execute("SHOW TABLES")
-    existing_tables = [row[0] for row in mysql_cursor.fetchall()]
-    
-    print("\n  Available MySQL tables:", existing_tables)
-    
-    # For Django tables, it's better to run migrations on the new DB
-    # rather than copying system tables
-    print("  Note: Django system tables should be recreated via 'python manage.py migrate'")
-    print("        Only application data (AgentLog, SensorReading) is migrated.")
-
-
-def main():
+
+
+# ============================================
+# Migration
+# ============================================
+
+def migrate_table(table, chunk_size, log=print):
+    """Stream `table` from MySQL into PostgreSQL chunk by chunk. Returns (rows, seconds)."""
+    columns = TABLES[table]
+    key = columns[0]
+    col_list = ', '.join(columns)
+    updates = ', '.join(f"{c} = EXCLUDED.{c}" for c in columns[1:])
+
+    mysql_conn = get_mysql_connection()
+    pg_conn = get_postgres_connection()
+    started = time.perf_counter()
+    total = 0
+    try:
+        chunk_no, last_id = last_checkpoint(pg_conn, table)
+        if chunk_no:
+            log(f"  [{table}] resuming after id {last_id} (chunk {chunk_no})")
+
+        pg_cursor = pg_conn.cursor()
+        stage = f"_stage_{table}"
+        pg_cursor.execute(f"CREATE TEMP TABLE {stage} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS")
+        pg_conn.commit()
+
+        # Unbuffered cursor: rows stream from the server as we fetch them.
+        mysql_cursor = mysql_conn.cursor(buffered=False)
+        mysql_cursor.execute(f"SELECT {col_list} FROM {table} WHERE {key} > %s ORDER BY {key}", (last_id,))
+
+        while True:
+            rows = mysql_cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+
+            buf = io.StringIO()
+            digest = hashlib.md5()
+            for row in rows:
+                line = copy_line(row)
+                buf.write(line)
+                digest.update(line.encode('utf-8'))
+            buf.seek(0)
+
+            pg_cursor.copy_expert(f"COPY {stage} ({col_list}) FROM STDIN", buf)
+            pg_cursor.execute(
+                f"INSERT INTO {table} ({col_list}) SELECT {col_list} FROM {stage} "
+                f"ON CONFLICT ({key}) DO UPDATE SET {updates}"
+            )
+            pg_cursor.execute(
+                f"INSERT INTO {CHECKPOINT_TABLE} (table_name, chunk_no, first_id, last_id, row_count, checksum) "
+                f"VALUES (%s, %s, %s, %s, %s, %s)",
+                (table, chunk_no, rows[0][0], rows[-1][0], len(rows), digest.hexdigest())
+            )
+            pg_conn.commit()
+
+            total += len(rows)
+            chunk_no += 1
+            elapsed = time.perf_counter() - started
+            log(f"  [{table}] chunk {chunk_no}: {total} rows ({total / elapsed:,.0f} rows/sec)")
+
+        mysql_cursor.close()
+
+        # Update sequence to continue from max id
+        pg_cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence(%s, %s), COALESCE((SELECT MAX({key}) FROM {table}), 1), true)",
+            (table, key)
+        )
+        pg_conn.commit()
+    finally:
+        mysql_conn.close()
+        pg_conn.close()
+    return total, time.perf_counter() - started
+
+
+def verify_table(table, log=print):
+    """Recompute every recorded chunk's checksum from PostgreSQL. Returns (chunks, mismatched chunk numbers)."""
+    columns = TABLES[table]
+    key = columns[0]
+    col_list = ', '.join(columns)
+
+    pg_conn = get_postgres_connection()
+    bad = []
+    try:
+        meta = pg_conn.cursor()
+        meta.execute(
+            f"SELECT chunk_no, first_id, last_id, row_count, checksum FROM {CHECKPOINT_TABLE} "
+            f"WHERE table_name = %s ORDER BY chunk_no",
+            (table,)
+        )
+        chunks = meta.fetchall()
+        for chunk_no, first_id, last_id, row_count, checksum in chunks:
+            # Named cursor = server-side on Postgres too, so big chunks don't load at once.
+            cursor = pg_conn.cursor(name=f"verify_{table}_{chunk_no}")
+            cursor.itersize = 10000
+            cursor.execute(
+                f"SELECT {col_list} FROM {table} WHERE {key} BETWEEN %s AND %s ORDER BY {key}",
+                (first_id, last_id)
+            )
+            digest = hashlib.md5()
+            count = 0
+            for row in cursor:
+                digest.update(copy_line(row).encode('utf-8'))
+                count += 1
+            cursor.close()
+            if count != row_count or digest.hexdigest() != checksum:
+                bad.append(chunk_no)
+                log(f"  [{table}] chunk {chunk_no} (ids {first_id}-{last_id}) MISMATCH: {count}/{row_count} rows")
+        pg_conn.commit()
+    finally:
+        pg_conn.close()
+    return len(chunks), bad
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Stream MySQL tables into PostgreSQL with COPY.")
+    parser.add_argument('--tables', nargs='+', default=list(TABLES), choices=list(TABLES))
+    parser.add_argument('--chunk-size', type=int, default=50000)
+    parser.add_argument('--workers', type=int, default=len(TABLES), help='tables migrated in parallel')
+    parser.add_argument('--restart', action='store_true', help='ignore checkpoints and migrate from the start')
+    parser.add_argument('--verify-only', action='store_true', help='only run the checksum verification pass')
+    parser.add_argument('--no-verify', action='store_true', help='skip the checksum verification pass')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
     print("=" * 60)
     print("MySQL to PostgreSQL (NeonDB) Migration")
     print("=" * 60)
-    print()
-    
-    # Validate PostgreSQL config
-    if 'YOUR_NEONDB' in POSTGRES_CONFIG['host']:
-        print("ERROR: Please update POSTGRES_CONFIG with your NeonDB credentials!")
-        print("\nEdit the script and replace:")
-        print("  - YOUR_NEONDB_HOST.neon.tech")
-        print("  - YOUR_NEONDB_USER")
-        print("  - YOUR_NEONDB_PASSWORD")
-        print("  - YOUR_NEONDB_DATABASE")
-        return
-    
-    mysql_conn = None
-    pg_conn = None
-    
+
+    missing = [k for k in ('PGHOST', 'PGUSER', 'PGPASSWORD', 'PGDATABASE') if not os.getenv(k)]
+    if missing:
+        print(f"ERROR: set {', '.join(missing)} (environment or .env) before migrating.")
+        return 1
+
     try:
-        # Connect to databases
-        mysql_conn = get_mysql_connection()
         pg_conn = get_postgres_connection()
-        
-        print()
-        print("Creating PostgreSQL tables...")
         create_postgres_tables(pg_conn)
-        
-        print()
-        print("Migrating data...")
-        
-        print("\n[1/2] AgentLog table:")
-        agentlog_count = migrate_agentlog(mysql_conn, pg_conn)
-        
-        print("\n[2/2] SensorReading table:")
-        sensorreading_count = migrate_sensorreading(mysql_conn, pg_conn)
-        
-        print()
-        print("=" * 60)
-        print("Migration Complete!")
-        print("=" * 60)
-        print(f"  AgentLog records:      {agentlog_count}")
-        print(f"  SensorReading records: {sensorreading_count}")
-        print(f"  Total records:         {agentlog_count + sensorreading_count}")
-        print()
-        print("Next steps:")
-        print("  1. Update your Django settings.py to use PostgreSQL")
+        if args.restart:
+            reset_checkpoints(pg_conn, args.tables)
+        pg_conn.close()
+
+        if not args.verify_only:
+            print(f"\nMigrating {', '.join(args.tables)} (chunk size {args.chunk_size}, {args.workers} workers)...")
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+                results = dict(zip(args.tables, pool.map(lambda t: migrate_table(t, args.chunk_size), args.tables)))
+            wall = time.perf_counter() - started
+
+            print()
+            total_rows = 0
+            for table, (rows, seconds) in results.items():
+                rate = rows / seconds if seconds else 0.0
+                print(f"  ✓ {table}: {rows} rows in {seconds:.1f}s ({rate:,.0f} rows/sec)")
+                total_rows += rows
+            print(f"  Total: {total_rows} rows in {wall:.1f}s ({total_rows / wall if wall else 0:,.0f} rows/sec)")
+
+        if not args.no_verify:
+            print("\nVerifying chunk checksums...")
+            failed = False
+            for table in args.tables:
+                chunks, bad = verify_table(table)
+                status = "OK" if not bad else f"{len(bad)} mismatched"
+                print(f"  {table}: {chunks} chunks, {status}")
+                failed = failed or bool(bad)
+            if failed:
+                print("\nVerification FAILED - rerun with --restart for the affected tables.")
+                return 2
+
+        print("\nNext steps:")
+        print("  1. Point Django settings.py at PostgreSQL")
         print("  2. Run 'python manage.py migrate' to create Django system tables")
-        print()
-        
+        return 0
+
     except mysql.connector.Error as e:
         print(f"\nMySQL Error: {e}")
     except psycopg2.Error as e:
         print(f"\nPostgreSQL Error: {e}")
-    except Exception as e:
-        print(f"\nError: {e}")
-    finally:
-        if mysql_conn:
-            mysql_conn.close()
-            print("MySQL connection closed")
-        if pg_conn:
-            pg_conn.close()
-            print("PostgreSQL connection closed")
+    return 1
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
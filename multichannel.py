@@ -0,0 +1,332 @@
+"""Multi-channel device readings for PraxisGuard.
+
+`DeviceReading` stores one row per sample with every channel packed as
+float64 in the order of its `ChannelLayout` (e.g. vibration, temperature,
+flow, pressure, spo2_drift, helium_level, ...). Rows decode in bulk with
+np.frombuffer into an (n x channels) matrix, and PoF, threshold and rollup
+logic run over that matrix for whatever channels a device reports:
+
+    frame = multichannel.load('VEN-0042', start, end)
+    result = multichannel.evaluate(frame)          # PoF + error codes per row
+    hourly = multichannel.rollup(frame, 3600)      # per-bucket min/max/mean
+
+A frame is a dict: machine_id (object array), timestamp (int64 us), channels
+(list of names) and values (float64 matrix, NaN = not reported).
+
+Migrating from SensorReading:
+  1. set PRAXIS_DEVICE_READINGS=1 so ingest.insert_readings also writes
+     DeviceReading rows;
+  2. run `manage.py copy_device_readings` to backfill history (idempotent,
+     rows already present are skipped);
+  3. move readers over to `load` / `latest`.
+
+Requires Django to be set up before import (see api.py).
+"""
+import hashlib
+import os
+import time
+from typing import TYPE_CHECKING
+
+import numpy as np
+from django.db import connection, transaction
+from django.db.models import OuterRef, Subquery
+
+import equipment
+import metrics
+import pdm
+from core_db.models import ChannelLayout, DeviceReading, SensorReading
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+LEGACY_CHANNELS = ['vibration', 'temperature']
+FRAME_COLUMNS = ['machine_id', 'timestamp', 'layout_id', 'values']
+
+_layouts = {}  # layout id -> channel list, and channel tuple -> ChannelLayout
+
+
+def dual_write_enabled() -> bool:
+    return os.getenv('PRAXIS_DEVICE_READINGS', '').lower() in ('1', 'true', 'yes')
+
+
+def layout_for(channels) -> ChannelLayout:
+    """The ChannelLayout for this exact channel order, created on first use."""
+    channels = tuple(channels)
+    layout = _layouts.get(channels)
+    if layout is None:
+        key = hashlib.sha1('\x1f'.join(channels).encode('utf-8')).hexdigest()
+        layout, _ = ChannelLayout.objects.get_or_create(key=key, defaults={'channels': list(channels)})
+        _layouts[channels] = layout
+        _layouts[layout.id] = list(layout.channels)
+    return layout
+
+
+def _layout_channels(layout_ids) -> dict:
+    missing = [i for i in layout_ids if i not in _layouts]
+    for layout in ChannelLayout.objects.filter(id__in=missing):
+        _layouts[layout.id] = list(layout.channels)
+    return {i: _layouts[i] for i in layout_ids}
+
+
+def pack(values: np.ndarray) -> list:
+    """One bytes payload per row of an (n x channels) matrix."""
+    buf = np.ascontiguousarray(values, dtype='<f8')
+    raw = buf.tobytes()
+    width = buf.shape[1] * 8
+    return [raw[i:i + width] for i in range(0, len(raw), width)]
+
+
+# ============================================
+# Writing
+# ============================================
+
+def _timestamps(values) -> list:
+    import pandas as pd
+    ts = pd.DatetimeIndex(pd.to_datetime(values))
+    if ts.tz is None:
+        ts = ts.tz_localize('UTC')
+    return list(ts.tz_convert('UTC').to_pydatetime())
+
+
+def insert(df: 'pd.DataFrame', channels=None, batch_size: int = 5000) -> dict:
+    """Insert a wide frame (machine_id, timestamp, <channel columns>) in one transaction.
+
+    `channels` defaults to every other column. Rows whose (machine_id,
+    timestamp) is already stored are skipped. Returns {'inserted', 'duplicates'}.
+    """
+    if df.empty:
+        return {'inserted': 0, 'duplicates': 0}
+    channels = list(channels or [c for c in df.columns if c not in ('machine_id', 'timestamp')])
+    layout = layout_for(channels)
+    unique = df.drop_duplicates(['machine_id', 'timestamp'])
+    timestamps = _timestamps(unique['timestamp'])
+    machine_ids = unique['machine_id'].astype(str).tolist()
+    payloads = pack(unique[channels].to_numpy(dtype=np.float64))
+
+    existing = set(DeviceReading.objects.filter(
+        machine_id__in=set(machine_ids), timestamp__gte=min(timestamps), timestamp__lte=max(timestamps),
+    ).values_list('machine_id', 'timestamp'))
+    objs = [
+        DeviceReading(machine_id=m, timestamp=ts, layout=layout, values=v)
+        for m, ts, v in zip(machine_ids, timestamps, payloads)
+        if (m, ts) not in existing
+    ]
+    with transaction.atomic():
+        # ignore_conflicts covers a concurrent writer racing the existence check
+        DeviceReading.objects.bulk_create(objs, batch_size=batch_size, ignore_conflicts=True)
+    metrics.ingest_rows.labels_('device_readings').inc(len(objs))
+    return {'inserted': len(objs), 'duplicates': len(df) - len(objs)}
+
+
+def copy_sensor_readings(batch_rows: int = 20000, after_id: int = 0, progress=None) -> int:
+    """Backfill DeviceReading from SensorReading in id order. Returns rows copied.
+
+    Safe to rerun: existing (machine_id, timestamp) rows are left alone.
+    """
+    layout = layout_for(LEGACY_CHANNELS)
+    copied, started = 0, time.perf_counter()
+    while True:
+        rows = list(
+            SensorReading.objects.filter(id__gt=after_id).order_by('id')
+            .values_list('id', 'machine_id', 'timestamp', *LEGACY_CHANNELS)[:batch_rows]
+        )
+        if not rows:
+            return copied
+        payloads = pack(np.array([r[3:] for r in rows], dtype=np.float64))
+        objs = [DeviceReading(machine_id=r[1], timestamp=r[2], layout=layout, values=v) for r, v in zip(rows, payloads)]
+        with transaction.atomic():
+            DeviceReading.objects.bulk_create(objs, batch_size=5000, ignore_conflicts=True)
+        copied += len(rows)
+        after_id = rows[-1][0]
+        if progress:
+            progress(copied, after_id, time.perf_counter() - started)
+
+
+# ============================================
+# Reading
+# ============================================
+
+def decode(rows: list, channels=None) -> dict:
+    """Frame from (machine_id, timestamp, layout_id, values) rows.
+
+    `channels` selects and orders the output columns; by default it is the
+    union of the rows' layouts in first-seen order.
+    """
+    import pandas as pd
+
+    layout_ids = np.fromiter((r[2] for r in rows), dtype=np.int64, count=len(rows))
+    layouts = _layout_channels(list(dict.fromkeys(layout_ids.tolist())))
+    if channels is None:
+        channels = list(dict.fromkeys(c for chans in layouts.values() for c in chans))
+    position = {c: i for i, c in enumerate(channels)}
+
+    values = np.full((len(rows), len(channels)), np.nan)
+    for layout_id, layout_channels in layouts.items():
+        idx = np.flatnonzero(layout_ids == layout_id)
+        block = np.frombuffer(b''.join(rows[i][3] for i in idx), dtype='<f8').reshape(len(idx), len(layout_channels))
+        src = [j for j, c in enumerate(layout_channels) if c in position]
+        dst = [position[layout_channels[j]] for j in src]
+        if src:
+            values[np.ix_(idx, dst)] = block[:, src]
+
+    timestamps = pd.DatetimeIndex([r[1] for r in rows]) if rows else pd.DatetimeIndex([], tz='UTC')
+    return {
+        'machine_id': np.array([r[0] for r in rows], dtype=object),
+        'timestamp': timestamps.tz_convert('UTC').as_unit('us').asi8,
+        'channels': list(channels),
+        'values': values,
+    }
+
+
+def load(machine_id=None, start=None, end=None, channels=None, limit: int = None) -> dict:
+    """Readings (one machine ID or a list) in [start, end], oldest first, as a frame.
+
+    `limit` keeps only the newest `limit` rows, selected in SQL.
+    """
+    qs = DeviceReading.objects.all()
+    if isinstance(machine_id, str):
+        qs = qs.filter(machine_id=machine_id)
+    elif machine_id is not None:
+        qs = qs.filter(machine_id__in=list(machine_id))
+    if start is not None:
+        qs = qs.filter(timestamp__gte=start)
+    if end is not None:
+        qs = qs.filter(timestamp__lte=end)
+    if limit is not None:
+        rows = list(qs.order_by('-timestamp', '-machine_id').values_list(*FRAME_COLUMNS)[:limit])
+        rows.sort(key=lambda r: (r[0], r[1]))
+        return decode(rows, channels)
+    return decode(list(qs.order_by('machine_id', 'timestamp').values_list(*FRAME_COLUMNS)), channels)
+
+
+def latest(machine_ids=None, channels=None) -> dict:
+    """Newest reading of every machine in one query (same strategy as fleet.latest_readings_qs)."""
+    if connection.vendor == 'postgresql':
+        qs = DeviceReading.objects.order_by('machine_id', '-timestamp').distinct('machine_id')
+    else:
+        newest = DeviceReading.objects.filter(machine_id=OuterRef('machine_id')).order_by('-timestamp').values('id')[:1]
+        qs = DeviceReading.objects.filter(id=Subquery(newest)).order_by('machine_id')
+    if machine_ids is not None:
+        qs = qs.filter(machine_id__in=list(machine_ids))
+    return decode(list(qs.values_list(*FRAME_COLUMNS)), channels)
+
+
+# ============================================
+# Vectorized evaluation
+# ============================================
+
+def evaluate(frame: dict, pof_config: dict = None) -> dict:
+    """PoF and threshold error codes for every row of a frame.
+
+    Thresholds come from the equipment rules (any channel they name);
+    PoF from pdm.compute_pof_matrix. Returns {'pof': array, 'codes': [[...], ...]}.
+    """
+    rules = equipment.get_rules()
+    types = [rules.equipment_type(m) for m in frame['machine_id'].tolist()]
+    values = frame['values']
+    readings = {c: np.nan_to_num(values[:, j], nan=-np.inf) for j, c in enumerate(frame['channels'])}
+    return {
+        'pof': pdm.compute_pof_matrix(values, frame['channels'], pof_config),
+        'codes': rules.evaluate(types, readings),
+    }
+
+
+def rollup(frame: dict, bucket_seconds: int) -> dict:
+    """Per (machine, time bucket) count/min/max/mean of every channel, ignoring NaN.
+
+    Returns a dict of aligned arrays: machine_id, bucket (int64 us bucket
+    start), and (groups x channels) matrices count, min, max, mean.
+    """
+    bucket_us = int(bucket_seconds * 1_000_000)
+    machine_ids, values = frame['machine_id'], frame['values']
+    buckets = frame['timestamp'] // bucket_us * bucket_us
+    if not len(buckets):
+        empty = np.empty((0, len(frame['channels'])))
+        return {'machine_id': machine_ids, 'bucket': buckets, 'channels': frame['channels'],
+                'count': empty, 'min': empty, 'max': empty, 'mean': empty}
+
+    order = np.lexsort((buckets, machine_ids.astype(str)))
+    machine_ids, buckets, values = machine_ids[order], buckets[order], values[order]
+    new_group = np.ones(len(buckets), dtype=bool)
+    new_group[1:] = (buckets[1:] != buckets[:-1]) | (machine_ids[1:] != machine_ids[:-1])
+    starts = np.flatnonzero(new_group)
+
+    present = ~np.isnan(values)
+    count = np.add.reduceat(present, starts, axis=0)
+    total = np.add.reduceat(np.where(present, values, 0.0), starts, axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(count > 0, total / count, np.nan)
+    return {
+        'machine_id': machine_ids[starts],
+        'bucket': buckets[starts],
+        'channels': frame['channels'],
+        'count': count,
+        'min': np.fmin.reduceat(values, starts, axis=0),
+        'max': np.fmax.reduceat(values, starts, axis=0),
+        'mean': mean,
+    }
+
+
+# ============================================
+# Benchmark
+# ============================================
+
+BENCH_CHANNELS = [
+    'vibration', 'temperature', 'flow', 'pressure', 'spo2_drift', 'helium_level', 'humidity', 'current',
+    'voltage', 'fan_rpm', 'coolant_temp', 'tube_hours', 'noise_db', 'battery', 'o2_conc', 'leak_rate',
+    'gradient_temp', 'rf_power', 'cpu_temp', 'disk_free',
+]
+BENCH_PREFIX = 'CHBENCH-'
+
+
+def benchmark(devices: int = 50, samples: int = 2000, channels: int = 20, seed: int = 0) -> dict:
+    """Insert, load, evaluate and roll up `devices` x `samples` synthetic readings of `channels` channels.
+
+    Rows are written under the CHBENCH- machine prefix and deleted afterwards.
+    """
+    import pandas as pd
+
+    names = (BENCH_CHANNELS + [f'ch{i:02d}' for i in range(len(BENCH_CHANNELS), channels)])[:channels]
+    rng = np.random.default_rng(seed)
+    n = devices * samples
+    ts = pd.Timestamp('2024-01-01', tz='UTC') + pd.to_timedelta(np.tile(np.arange(samples) * 60, devices), unit='s')
+    df = pd.DataFrame(rng.normal(50, 10, size=(n, channels)), columns=names)
+    df.insert(0, 'machine_id', np.repeat([f'{BENCH_PREFIX}{i:05d}' for i in range(devices)], samples))
+    df.insert(1, 'timestamp', ts)
+    pof_config = {c: {'threshold': 70.0, 'weight': 1.0 / channels} for c in names}
+
+    DeviceReading.objects.filter(machine_id__startswith=BENCH_PREFIX).delete()
+    result = {'devices': devices, 'samples': n, 'channels': channels}
+    try:
+        t = time.perf_counter()
+        for lo in range(0, n, 50000):
+            insert(df.iloc[lo:lo + 50000], names)
+        result['insert_s'] = time.perf_counter() - t
+
+        ids = [f'{BENCH_PREFIX}{i:05d}' for i in range(devices)]
+        t = time.perf_counter()
+        frame = load(ids)
+        result['load_s'] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        evaluated = evaluate(frame, pof_config)
+        result['evaluate_s'] = time.perf_counter() - t
+        result['rows_with_codes'] = sum(1 for codes in evaluated['codes'] if codes)
+
+        t = time.perf_counter()
+        hourly = rollup(frame, 3600)
+        result['rollup_s'] = time.perf_counter() - t
+        result['rollup_groups'] = len(hourly['bucket'])
+
+        t = time.perf_counter()
+        latest(ids)
+        result['latest_s'] = time.perf_counter() - t
+        result['bytes_per_row'] = _bytes_per_row()
+    finally:
+        DeviceReading.objects.filter(machine_id__startswith=BENCH_PREFIX).delete()
+    return result
+
+
+def _bytes_per_row():
+    import archive
+    return archive.raw_bytes_per_row(DeviceReading)
@@ -0,0 +1,303 @@
+"""Transactional outbox and concurrent webhook dispatcher.
+
+`publish()` writes an OutboxEvent inside the caller's transaction, so an
+event exists exactly when the change it announces was committed, and the
+caller returns without waiting on any consumer.
+
+`Dispatcher` delivers events to the registered WebhookEndpoints:
+
+  - fan-out: each new event becomes one WebhookDelivery per interested
+    endpoint (idempotent, unique per event/endpoint);
+  - claiming: due deliveries are claimed with a conditional UPDATE that
+    stamps a claim token, so several dispatchers (or API workers) can run
+    at once; a claim expires after `claim_ttl` if its owner dies;
+  - sending: a thread pool POSTs concurrently through one pooled keep-alive
+    `requests.Session` per endpoint, throttled by a per-endpoint token
+    bucket (`rate_per_sec`, `burst`);
+  - retries: 408/429/5xx and network errors retry with full-jitter
+    exponential backoff (honouring Retry-After); other 4xx, or running out
+    of attempts, marks the delivery dead.
+
+Endpoints are managed in the admin; N8N_WEBHOOK_URL and SLACK_WEBHOOK_URL
+register 'n8n' and 'slack' endpoints on dispatcher start.
+
+Run it with `manage.py dispatch_webhooks`, or inside each API worker with
+PRAXIS_OUTBOX_DISPATCHER=1 (see serving.py).
+
+Requires Django to be set up before import (see api.py).
+"""
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+import metrics
+from core_db.models import OutboxEvent, WebhookDelivery, WebhookEndpoint
+
+logger = logging.getLogger('praxis.outbox')
+
+# Wakes an in-process dispatcher as soon as an event commits
+_wakeup = threading.Event()
+
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+ENV_ENDPOINTS = (('n8n', 'N8N_WEBHOOK_URL', 'json'), ('slack', 'SLACK_WEBHOOK_URL', 'slack'))
+
+
+def publish(event_type: str, payload: dict) -> OutboxEvent:
+    """Record an event in the current transaction; it is delivered after commit."""
+    event = OutboxEvent.objects.create(event_type=event_type, payload=payload)
+    transaction.on_commit(_wakeup.set)
+    return event
+
+
+def ensure_env_endpoints():
+    for name, var, fmt in ENV_ENDPOINTS:
+        url = os.getenv(var)
+        if url:
+            WebhookEndpoint.objects.update_or_create(name=name, defaults={'url': url, 'format': fmt})
+
+
+def render_body(endpoint: WebhookEndpoint, event: OutboxEvent) -> dict:
+    if endpoint.format == 'slack':
+        text = event.payload.get('message') or json.dumps(event.payload, default=str)
+        return {'text': f"[{event.event_type}] {text}"}
+    return {
+        'id': event.id,
+        'type': event.event_type,
+        'created': event.created_at.isoformat(),
+        'data': event.payload,
+    }
+
+
+def backoff(attempts: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempts)]."""
+    return random.uniform(0, min(cap, base * (2 ** attempts)))
+
+
+class TokenBucket:
+    """Per-endpoint rate limit. `take()` returns 0 when a token was taken, else seconds to wait."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = max(rate, 1e-6)
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.stamp = time.monotonic()
+
+    def take(self) -> float:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class Dispatcher:
+    def __init__(self, workers: int = 8, batch: int = 100, timeout: float = 5.0, max_attempts: int = 8,
+                 base_delay: float = 1.0, max_delay: float = 300.0, claim_ttl: float = 60.0,
+                 poll_interval: float = 1.0):
+        self.workers = workers
+        self.batch = batch
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.claim_ttl = claim_ttl
+        self.poll_interval = poll_interval
+        self._sessions = {}  # endpoint id -> requests.Session
+        self._buckets = {}   # endpoint id -> TokenBucket
+        self._next_slot = {}  # endpoint id -> monotonic time of the next free deferral slot
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='webhook')
+        self._stop = threading.Event()
+
+    # ---------- database side (dispatcher thread only) ----------
+
+    def fan_out(self) -> int:
+        """Create deliveries for events not yet fanned out. Returns events processed."""
+        events = list(OutboxEvent.objects.filter(fanned_out=False).order_by('id')[:self.batch])
+        if not events:
+            return 0
+        endpoints = list(WebhookEndpoint.objects.filter(active=True))
+        deliveries = [
+            WebhookDelivery(event=event, endpoint=endpoint)
+            for event in events for endpoint in endpoints if endpoint.wants(event.event_type)
+        ]
+        with transaction.atomic():
+            WebhookDelivery.objects.bulk_create(deliveries, ignore_conflicts=True)
+            OutboxEvent.objects.filter(id__in=[e.id for e in events]).update(fanned_out=True)
+        return len(events)
+
+    def claim(self, limit: int) -> list:
+        """Claim up to `limit` due deliveries for this dispatcher."""
+        now = timezone.now()
+        due = (Q(status='pending', next_attempt_at__lte=now) | Q(status='sending', claimed_until__lt=now))
+        ids = list(WebhookDelivery.objects.filter(due).order_by('next_attempt_at').values_list('id', flat=True)[:limit])
+        if not ids:
+            return []
+        token = uuid.uuid4().hex
+        # The repeated `due` condition makes the claim atomic against other dispatchers
+        WebhookDelivery.objects.filter(due, id__in=ids).update(
+            status='sending', claim=token, claimed_until=now + timedelta(seconds=self.claim_ttl))
+        return list(WebhookDelivery.objects.filter(claim=token, status='sending').select_related('event', 'endpoint'))
+
+    def _defer(self, delivery, seconds: float):
+        WebhookDelivery.objects.filter(id=delivery.id, claim=delivery.claim).update(
+            status='pending', claim='', next_attempt_at=timezone.now() + timedelta(seconds=seconds))
+
+    def _record(self, delivery, outcome: tuple):
+        status_code, error, elapsed, retry_after = outcome
+        endpoint = delivery.endpoint.name
+        metrics.webhook_duration.labels_(endpoint).observe(elapsed)
+        now = timezone.now()
+        mine = WebhookDelivery.objects.filter(id=delivery.id, claim=delivery.claim)
+        attempts = delivery.attempts + 1
+
+        if error is None and 200 <= status_code < 300:
+            mine.update(status='delivered', attempts=attempts, last_status=status_code, last_error='',
+                        delivered_at=now, claim='')
+            metrics.webhook_deliveries.labels_(endpoint, 'delivered').inc()
+            metrics.outbox_delivery_lag.labels_(endpoint).observe((now - delivery.event.created_at).total_seconds())
+            return
+
+        retryable = error is not None or status_code in RETRYABLE_STATUS
+        if retryable and attempts < self.max_attempts:
+            delay = max(retry_after or 0.0, backoff(attempts, self.base_delay, self.max_delay))
+            mine.update(status='pending', attempts=attempts, last_status=status_code, last_error=error or '',
+                        next_attempt_at=now + timedelta(seconds=delay), claim='')
+            metrics.webhook_deliveries.labels_(endpoint, 'retry').inc()
+        else:
+            mine.update(status='dead', attempts=attempts, last_status=status_code, last_error=error or '', claim='')
+            metrics.webhook_deliveries.labels_(endpoint, 'dead').inc()
+            logger.warning("webhook delivery %s to %s failed permanently: %s", delivery.id, endpoint,
+                           error or status_code)
+
+    # ---------- HTTP side (pool threads) ----------
+
+    def _session(self, endpoint):
+        session = self._sessions.get(endpoint.id)
+        if session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.workers)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._sessions[endpoint.id] = session
+        return session
+
+    def _post(self, session, url: str, body: dict, event_id: int) -> tuple:
+        """(status code, error text or None, seconds, retry-after seconds or None)."""
+        start = time.perf_counter()
+        try:
+            resp = session.post(url, json=body, timeout=self.timeout,
+                                headers={'X-Praxis-Event-Id': str(event_id)})
+        except Exception as e:
+            return None, f"{type(e).__name__}: {e}", time.perf_counter() - start, None
+        retry_after = resp.headers.get('Retry-After')
+        try:
+            retry_after = float(retry_after) if retry_after else None
+        except ValueError:
+            retry_after = None
+        return resp.status_code, None, time.perf_counter() - start, retry_after
+
+    # ---------- loop ----------
+
+    def _submit(self, delivery):
+        endpoint = delivery.endpoint
+        bucket = self._buckets.get(endpoint.id)
+        if bucket is None or (bucket.rate, bucket.capacity) != (endpoint.rate_per_sec, max(1, endpoint.burst)):
+            bucket = self._buckets[endpoint.id] = TokenBucket(endpoint.rate_per_sec, endpoint.burst)
+        wait_s = bucket.take()
+        if wait_s:
+            # Stagger throttled deliveries one token apart so they don't all come back at once
+            now = time.monotonic()
+            slot = max(now + wait_s, self._next_slot.get(endpoint.id, 0.0))
+            self._next_slot[endpoint.id] = slot + 1 / bucket.rate
+            metrics.webhook_deliveries.labels_(endpoint.name, 'throttled').inc()
+            self._defer(delivery, slot - now)
+            return None
+        body = render_body(endpoint, delivery.event)
+        return self._pool.submit(self._post, self._session(endpoint), endpoint.url, body, delivery.event_id)
+
+    def run(self, stop: threading.Event = None, once: bool = False):
+        """Dispatch until `stop` is set (or, with `once`, until nothing is due)."""
+        stop = stop or self._stop
+        try:
+            ensure_env_endpoints()
+        except Exception:
+            logger.exception("registering webhook endpoints from the environment failed")
+        in_flight = {}
+        while not stop.is_set():
+            try:
+                close_old_connections()
+                self.fan_out()
+                claimed = self.claim(max(0, self.workers * 2 - len(in_flight)))
+                for delivery in claimed:
+                    future = self._submit(delivery)
+                    if future is not None:
+                        in_flight[future] = delivery
+                if in_flight:
+                    done, _ = wait(in_flight, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self._record(in_flight.pop(future), future.result())
+                elif once and not claimed:
+                    return
+                elif not claimed:
+                    _wakeup.wait(self.poll_interval)
+                    _wakeup.clear()
+            except Exception:
+                # e.g. "database is locked" under ingest load: a dead loop would stop every alert.
+                # Claims left unrecorded expire after claim_ttl and are retried.
+                logger.exception("outbox dispatch iteration failed")
+                close_old_connections()
+                stop.wait(self.poll_interval)
+        # Record what is already on the wire; unsent claims expire and are retried
+        for future in wait(in_flight).done:
+            self._record(in_flight[future], future.result())
+
+    def stop(self):
+        self._stop.set()
+        _wakeup.set()
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+        for session in self._sessions.values():
+            session.close()
+
+
+_background = None
+
+
+def start_background(**kwargs) -> Dispatcher:
+    """Run a dispatcher on a daemon thread in this process (used by API workers)."""
+    global _background
+    if _background is None:
+        _background = Dispatcher(**kwargs)
+        threading.Thread(target=_background.run, name='outbox-dispatcher', daemon=True).start()
+    return _background
+
+
+def stop_background():
+    global _background
+    if _background is not None:
+        _background.stop()
+        _background.close()
+        _background = None
+
+
+def stats() -> dict:
+    from django.db.models import Count
+
+    by_status = dict(WebhookDelivery.objects.values_list('status').annotate(n=Count('id')).order_by())
+    return {'events_pending_fanout': OutboxEvent.objects.filter(fanned_out=False).count(), 'deliveries': by_status}
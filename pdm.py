@@ -3,9 +3,11 @@
 This module provides a simple, explainable PoF estimator for the MVP.
 Replace or extend with a trained model later.
 """
-import pandas as pd
+import numpy as np
 import os
 
+import historystore
+
 
 def compute_pof_from_values(vibration: float, temperature: float, vib_thresh=80.0, temp_thresh=90.0) -> float:
     """Compute a simple PoF (0..1) from latest vibration and temperature readings.
@@ -19,6 +21,63 @@ def compute_pof_from_values(vibration: float, temperature: float, vib_thresh=80.
     return round(float(pof), 3)
 
 
+def compute_pof_array(vibration, temperature, vib_thresh=80.0, temp_thresh=90.0) -> np.ndarray:
+    """Vectorized `compute_pof_from_values` over arrays of readings (thresholds may be arrays too)."""
+    vib = np.asarray(vibration, dtype=np.float64)
+    temp = np.asarray(temperature, dtype=np.float64)
+    vib_thresh = np.asarray(vib_thresh, dtype=np.float64)
+    temp_thresh = np.asarray(temp_thresh, dtype=np.float64)
+    vib_score = np.maximum(0.0, (vib - vib_thresh) / np.maximum(1.0, 200 - vib_thresh))
+    temp_score = np.maximum(0.0, (temp - temp_thresh) / np.maximum(1.0, 200 - temp_thresh))
+    return np.round(np.minimum(1.0, 0.7 * vib_score + 0.3 * temp_score), 3)
+
+
+def workflow_pof(vibration, temperature, error_counts) -> np.ndarray:
+    """Vectorized port of the n8n "Calculate Probability of Failure" node.
+
+    Stepped risks per factor (vibration > 40/50/60, temperature > 70/80/90,
+    error codes > 0/2/4), weighted 0.4/0.3/0.3, +0.15 when vibration and
+    temperature are both high, capped at 0.95 and rounded to 2 places, so the
+    server fires on exactly the readings the workflow's threshold check would.
+    """
+    vib_risk = np.array([0.0, 0.3, 0.5, 0.7])[np.searchsorted([40, 50, 60], np.asarray(vibration, dtype=np.float64))]
+    temp_risk = np.array([0.0, 0.2, 0.4, 0.6])[np.searchsorted([70, 80, 90], np.asarray(temperature, dtype=np.float64))]
+    err_risk = np.array([0.0, 0.2, 0.4, 0.6])[np.searchsorted([0, 2, 4], np.asarray(error_counts, dtype=np.float64))]
+    pof = vib_risk * 0.4 + temp_risk * 0.3 + err_risk * 0.3
+    pof += np.where((vib_risk > 0.5) & (temp_risk > 0.3), 0.15, 0.0)
+    pof = np.minimum(pof, 0.95)
+    # Math.round rounds halves up
+    return np.floor(pof * 100 + 0.5) / 100
+
+
+# Per-channel PoF terms for compute_pof_matrix: exceedance above `threshold`,
+# normalized by (ceiling - threshold), weighted. Channels not listed don't contribute.
+POF_CHANNELS = {
+    'vibration': {'threshold': 80.0, 'weight': 0.7},
+    'temperature': {'threshold': 90.0, 'weight': 0.3},
+}
+POF_CEILING = 200.0
+
+
+def compute_pof_matrix(values, channels, config: dict = None) -> np.ndarray:
+    """Vectorized PoF over an (n, len(channels)) matrix of readings for any channel set.
+
+    Generalizes `compute_pof_array`: the score is the weighted sum of each
+    configured channel's normalized exceedance, capped at 1. NaN (not
+    reported) contributes nothing. With the default config and channels
+    (vibration, temperature) the result equals `compute_pof_array`.
+    """
+    config = POF_CHANNELS if config is None else config
+    values = np.asarray(values, dtype=np.float64).reshape(-1, len(channels))
+    thresh = np.array([config.get(c, {}).get('threshold', np.inf) for c in channels])
+    ceiling = np.array([config.get(c, {}).get('ceiling', POF_CEILING) for c in channels])
+    weight = np.array([config.get(c, {}).get('weight', 0.0) for c in channels])
+    scale = np.maximum(1.0, ceiling - np.where(np.isfinite(thresh), thresh, 0.0))
+    # fmax treats NaN as missing, so unreported channels score 0
+    scores = np.fmax(0.0, (values - thresh) / scale)
+    return np.round(np.minimum(1.0, scores @ weight), 3)
+
+
 def compute_pof_for_machine(machine_id: str, csv_path: str = 'live_sensor_stream.csv', window: int = 5,
                            vib_thresh: float = 80.0, temp_thresh: float = 90.0) -> dict:
     """Read the last `window` rows for `machine_id` from the CSV and return PoF and metadata.
@@ -28,6 +87,8 @@ def compute_pof_for_machine(machine_id: str, csv_path: str = 'live_sensor_stream
     if not os.path.exists(csv_path):
         return {'machine_id': machine_id, 'pof': 0.0, 'latest': None, 'window_count': 0}
 
+    import pandas as pd
+
     df = pd.read_csv(csv_path)
     if df.empty or 'machine_id' not in df.columns:
         return {'machine_id': machine_id, 'pof': 0.0, 'latest': None, 'window_count': 0}
@@ -49,6 +110,36 @@ def compute_pof_for_machine(machine_id: str, csv_path: str = 'live_sensor_stream
     }
 
 
+def pof_window(machine_id: str, start=None, end=None, vib_thresh: float = 80.0, temp_thresh: float = 90.0) -> dict:
+    """PoF for every reading of `machine_id` in [start, end], read from the history store.
+
+    The readings are zero-copy views of the memory-mapped files; only the PoF
+    array is allocated. Returns { 'timestamp' (int64 us), 'vibration',
+    'temperature', 'pof' }.
+    """
+    view = historystore.window(machine_id, start, end)
+    view['pof'] = compute_pof_array(view['vibration'], view['temperature'], vib_thresh, temp_thresh)
+    return view
+
+
+def compute_pof_from_history(machine_id: str, window: int = 5, vib_thresh: float = 80.0,
+                             temp_thresh: float = 90.0) -> dict:
+    """Same result as `compute_pof_for_machine`, from the history store instead of the CSV."""
+    recent = historystore.tail(machine_id, window)
+    if not len(recent['timestamp']):
+        return {'machine_id': machine_id, 'pof': 0.0, 'latest': None, 'window_count': 0}
+
+    vib = float(recent['vibration'][-1])
+    temp = float(recent['temperature'][-1])
+    ts = np.datetime64(int(recent['timestamp'][-1]), 'us')
+    return {
+        'machine_id': machine_id,
+        'pof': compute_pof_from_values(vib, temp, vib_thresh=vib_thresh, temp_thresh=temp_thresh),
+        'latest': {'timestamp': f"{ts}+00:00", 'vibration': vib, 'temperature': temp},
+        'window_count': len(recent['timestamp']),
+    }
+
+
 if __name__ == '__main__':
     # quick smoke test
     print(compute_pof_for_machine('MAC-101'))
@@ -0,0 +1,291 @@
+"""Fleet-wide top-K risk ranking kept up to date incrementally.
+
+Every machine's risk score (PoF of its newest reading) lives in indexed
+max-heaps: one for the whole fleet, one per equipment type, one per location
+and one per (type, location). Updating a machine moves it in O(log N) per
+heap, and `top(k)` reads the K best entries of the right heap in O(K log K)
+by walking it best-first from the root, without touching the rest of the
+fleet.
+
+The index is built once from the latest reading per machine (one query) and
+then follows new readings two ways:
+
+  - `ingest.insert_readings` pushes each batch's newest rows per machine;
+  - before answering, `top` pulls SensorReading rows with an id above the
+    highest id it has seen (at most every PRAXIS_RISK_REFRESH seconds,
+    default 1), which picks up writes made by other processes.
+
+Ids are allocated before commit, so a slow transaction can commit rows below
+an id already seen. Each pull therefore re-reads from the watermark it had
+PRAXIS_RISK_OVERLAP seconds ago (default 5); rows committing later than that
+are only picked up by the next ingest of their machine.
+
+A row older than the machine's current reading never replaces it, so
+re-reading rows is harmless.
+
+Requires Django to be set up before import (see api.py).
+"""
+import heapq
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+import equipment
+import pdm
+from core_db.models import SensorReading
+
+PULL_LIMIT = 50000
+
+
+class IndexedHeap:
+    """Max-heap of (score, key) with O(log n) update and removal by key."""
+
+    __slots__ = ('_heap', '_pos')
+
+    def __init__(self):
+        self._heap = []  # [(score tuple, key)]
+        self._pos = {}   # key -> index in _heap
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __contains__(self, key):
+        return key in self._pos
+
+    def _swap(self, i, j):
+        heap = self._heap
+        heap[i], heap[j] = heap[j], heap[i]
+        self._pos[heap[i][1]] = i
+        self._pos[heap[j][1]] = j
+
+    def _up(self, i):
+        heap = self._heap
+        while i:
+            parent = (i - 1) // 2
+            if heap[parent][0] >= heap[i][0]:
+                break
+            self._swap(i, parent)
+            i = parent
+
+    def _down(self, i):
+        heap, n = self._heap, len(self._heap)
+        while True:
+            best, left = i, 2 * i + 1
+            if left < n and heap[left][0] > heap[best][0]:
+                best = left
+            if left + 1 < n and heap[left + 1][0] > heap[best][0]:
+                best = left + 1
+            if best == i:
+                return
+            self._swap(i, best)
+            i = best
+
+    def set(self, key, score: tuple):
+        i = self._pos.get(key)
+        if i is None:
+            self._heap.append((score, key))
+            self._pos[key] = len(self._heap) - 1
+            self._up(len(self._heap) - 1)
+            return
+        old = self._heap[i][0]
+        self._heap[i] = (score, key)
+        if score > old:
+            self._up(i)
+        else:
+            self._down(i)
+
+    def remove(self, key):
+        i = self._pos.pop(key, None)
+        if i is None:
+            return
+        last = self._heap.pop()
+        if i < len(self._heap):
+            self._heap[i] = last
+            self._pos[last[1]] = i
+            self._up(i)
+            self._down(self._pos[last[1]])
+
+    def top(self, k: int) -> list:
+        """The k highest (score, key) pairs, best first; the heap is not modified."""
+        heap, out = self._heap, []
+        if not heap or k <= 0:
+            return out
+        # Best-first walk: a node can only be next once its parent has been taken.
+        frontier = [(_neg(heap[0][0]), heap[0][1], 0)]
+        while frontier and len(out) < k:
+            _, _, i = heapq.heappop(frontier)
+            out.append(heap[i])
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, (_neg(heap[child][0]), heap[child][1], child))
+        return out
+
+
+def _neg(score: tuple) -> tuple:
+    return tuple(-s for s in score)
+
+
+class RiskIndex:
+    """Per-machine risk scores with filtered top-K queries."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pull_lock = threading.Lock()
+        self._machines = {}  # machine_id -> {'pof', 'vibration', 'temperature', 'timestamp', 'type', 'location'}
+        self._heaps = {}     # (type or None, location or None) -> IndexedHeap
+        self.last_id = 0
+        self.last_pull = 0.0
+        self.overlap = float(os.getenv('PRAXIS_RISK_OVERLAP', '5'))
+        self._watermarks = deque()  # (monotonic time, last_id) after each pull
+
+    def __len__(self):
+        return len(self._machines)
+
+    def _heap_keys(self, equipment_type: str, location: str) -> tuple:
+        t, loc = equipment_type.lower(), location.lower()
+        return (None, None), (t, None), (None, loc), (t, loc)
+
+    def update(self, machine_ids, vibration, temperature, timestamps, pof=None):
+        """Apply readings (aligned sequences). Older readings than the stored one are ignored."""
+        if pof is None:
+            pof = pdm.compute_pof_array(vibration, temperature)
+        rules = equipment.get_rules()
+        with self._lock:
+            for machine_id, vib, temp, ts, score in zip(machine_ids, vibration, temperature, timestamps, pof):
+                entry = self._machines.get(machine_id)
+                if entry is not None and ts < entry['timestamp']:
+                    continue
+                if entry is None:
+                    entry = self._machines[machine_id] = {
+                        'type': rules.equipment_type(machine_id),
+                        'location': equipment.location_for(machine_id),
+                    }
+                entry.update(pof=float(score), vibration=float(vib), temperature=float(temp), timestamp=ts)
+                # Ties: the most recent reading ranks first
+                rank = (entry['pof'], ts.timestamp())
+                for key in self._heap_keys(entry['type'], entry['location']):
+                    heap = self._heaps.get(key)
+                    if heap is None:
+                        heap = self._heaps[key] = IndexedHeap()
+                    heap.set(machine_id, rank)
+
+    def remove(self, machine_id: str):
+        with self._lock:
+            entry = self._machines.pop(machine_id, None)
+            if entry is not None:
+                for key in self._heap_keys(entry['type'], entry['location']):
+                    self._heaps[key].remove(machine_id)
+
+    def top(self, k: int, equipment_type: str = None, location: str = None) -> tuple:
+        """(K riskiest machines as dicts, number of machines matching the filters)."""
+        key = (equipment_type.lower() if equipment_type else None, location.lower() if location else None)
+        with self._lock:
+            heap = self._heaps.get(key)
+            if heap is None:
+                return [], 0
+            out = []
+            for _, machine_id in heap.top(k):
+                entry = self._machines[machine_id]
+                out.append({
+                    'machine_id': machine_id,
+                    'pof': entry['pof'],
+                    'equipmentType': entry['type'],
+                    'location': entry['location'],
+                    'vibration': entry['vibration'],
+                    'temperature': entry['temperature'],
+                    'timestamp': entry['timestamp'].isoformat(),
+                })
+            return out, len(heap)
+
+    # ============================================
+    # Feeding from the database
+    # ============================================
+
+    def load_latest(self):
+        """Seed from the newest reading of every machine (one query)."""
+        import fleet
+
+        # Watermark first: rows landing during the load are pulled again, which is harmless
+        newest_id = SensorReading.objects.order_by('-id').values_list('id', flat=True).first()
+        rows = list(fleet.latest_readings_qs().values_list(*fleet.LATEST_COLUMNS))
+        if rows:
+            machine_ids, vib, temp, ts = zip(*rows)
+            self.update(machine_ids, np.array(vib), np.array(temp), ts)
+        self.last_id = max(self.last_id, newest_id or 0)
+        self.last_pull = time.monotonic()
+        self._watermarks.append((self.last_pull, self.last_id))
+
+    def _overlap_start(self, now: float) -> int:
+        # The newest watermark at least `overlap` seconds old (or the oldest one we have)
+        marks = self._watermarks
+        while len(marks) > 1 and marks[1][0] <= now - self.overlap:
+            marks.popleft()
+        return min(marks[0][1], self.last_id) if marks else self.last_id
+
+    def pull(self) -> int:
+        """Apply SensorReading rows added since the last pull, plus the overlap window. Returns rows read."""
+        now = time.monotonic()
+        after = self._overlap_start(now)
+        total = 0
+        while True:
+            rows = list(
+                SensorReading.objects.filter(id__gt=after).order_by('id')
+                .values_list('id', 'machine_id', 'vibration', 'temperature', 'timestamp')[:PULL_LIMIT]
+            )
+            if not rows:
+                break
+            ids, machine_ids, vib, temp, ts = zip(*rows)
+            self.update(machine_ids, np.array(vib), np.array(temp), ts)
+            after = ids[-1]
+            self.last_id = max(self.last_id, after)
+            total += len(rows)
+            if len(rows) < PULL_LIMIT:
+                break
+        self.last_pull = now
+        self._watermarks.append((now, self.last_id))
+        return total
+
+    def refresh(self, max_age: float):
+        # One puller at a time; concurrent callers answer from the current state
+        if time.monotonic() - self.last_pull >= max_age and self._pull_lock.acquire(blocking=False):
+            try:
+                self.pull()
+            finally:
+                self._pull_lock.release()
+
+
+_index = None
+_build_lock = threading.Lock()
+
+
+def get_index() -> RiskIndex:
+    """The process-wide risk index, built on first use and caught up on every call."""
+    global _index
+    if _index is None:
+        with _build_lock:
+            if _index is None:
+                index = RiskIndex()
+                index.load_latest()
+                _index = index
+    _index.refresh(float(os.getenv('PRAXIS_RISK_REFRESH', '1')))
+    return _index
+
+
+def record_batch(df):
+    """Push an ingested frame's newest reading per machine into the index, if it is built."""
+    if _index is None or df.empty:
+        return
+    newest = df.sort_values('timestamp').drop_duplicates('machine_id', keep='last')
+    _index.update(
+        newest['machine_id'].tolist(),
+        newest['vibration'].to_numpy(),
+        newest['temperature'].to_numpy(),
+        newest['timestamp'].dt.to_pydatetime(),
+    )
+
+
+def top(k: int = 10, equipment_type: str = None, location: str = None) -> tuple:
+    return get_index().top(k, equipment_type, location)
@@ -0,0 +1,308 @@
+"""Maintenance scheduling for PraxisGuard.
+
+Each device and technician gets a `Calendar`: a sorted list of merged,
+non-overlapping busy intervals. Finding the earliest free slot bisects to the
+first relevant interval and only walks the intervals that actually collide
+with the candidate slot, instead of scanning the whole schedule.
+
+`Planner` loads upcoming `MaintenanceSchedule` rows once and answers slot
+queries / bookings in memory, so a batch planning run over thousands of
+devices costs two queries plus one `bulk_create`.
+
+Bookings run in a transaction that first takes the booking lock (a
+transaction-level advisory lock on Postgres, the technician rows elsewhere),
+so concurrent requests can't both see a slot free. `book_slot` also re-checks
+for overlaps after inserting and retries, which covers SQLite, where row
+locks don't exist.
+
+Requires Django to be set up before import (see api.py).
+"""
+import random
+import time
+import uuid
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import timedelta
+from typing import TYPE_CHECKING
+
+from django.db import OperationalError, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+import pdm
+from equipment import equipment_type_for
+from core_db.models import MaintenanceSchedule, SensorReading, Technician
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+BOOKING_LOCK_KEY = 0x50524158  # pg_advisory_xact_lock key shared by every booking
+BOOKING_ATTEMPTS = 3
+
+DEFAULT_DURATION_HOURS = {
+    "MRI Scanner": 4,
+    "CT Scanner": 3,
+    "X-Ray Machine": 2,
+    "Ultrasound": 1,
+    "Ventilator": 2,
+    "Patient Monitor": 1,
+}
+
+
+class Calendar:
+    """Sorted, merged busy intervals [start, end)."""
+
+    __slots__ = ('starts', 'ends')
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+
+    def __len__(self):
+        return len(self.starts)
+
+    def add(self, start, end):
+        """Mark [start, end) busy, merging with any overlapping or touching intervals."""
+        i = bisect_right(self.starts, start)
+        if i > 0 and self.ends[i - 1] >= start:
+            i -= 1
+            start = self.starts[i]
+        j = i
+        while j < len(self.starts) and self.starts[j] <= end:
+            end = max(end, self.ends[j])
+            j += 1
+        self.starts[i:j] = [start]
+        self.ends[i:j] = [end]
+
+    def is_free(self, start, end) -> bool:
+        i = bisect_right(self.starts, start)
+        if i > 0 and self.ends[i - 1] > start:
+            return False
+        return i >= len(self.starts) or self.starts[i] >= end
+
+    def next_free(self, t, duration):
+        """Earliest s >= t such that [s, s + duration) is free."""
+        i = bisect_right(self.starts, t)
+        if i > 0 and self.ends[i - 1] > t:
+            t = self.ends[i - 1]
+        while i < len(self.starts) and self.starts[i] < t + duration:
+            t = max(t, self.ends[i])
+            i += 1
+        return t
+
+
+def _joint_next_free(calendars, t, duration):
+    """Earliest slot free in every calendar; each pass only moves t forward."""
+    while True:
+        moved = False
+        for cal in calendars:
+            nt = cal.next_free(t, duration)
+            if nt != t:
+                t = nt
+                moved = True
+        if not moved:
+            return t
+
+
+class Planner:
+    """In-memory device and technician calendars built from upcoming schedule entries."""
+
+    def __init__(self, technicians=()):
+        self.technicians = list(technicians)
+        self.device_calendars = defaultdict(Calendar)
+        self.technician_calendars = defaultdict(Calendar)
+
+    @classmethod
+    def from_db(cls, since=None) -> 'Planner':
+        since = since or timezone.now()
+        planner = cls(Technician.objects.filter(active=True).order_by('technician_id'))
+        upcoming = MaintenanceSchedule.objects.filter(status='scheduled', end__gt=since).values_list(
+            'device_id', 'technician__technician_id', 'start', 'end'
+        )
+        for device_id, technician_id, start, end in upcoming:
+            planner.device_calendars[device_id].add(start, end)
+            if technician_id:
+                planner.technician_calendars[technician_id].add(start, end)
+        return planner
+
+    def has_upcoming(self, device_id: str) -> bool:
+        cal = self.device_calendars.get(device_id)
+        return bool(cal)
+
+    def earliest_slot(self, device_id: str, equipment_type: str, duration, not_before, technician_id: str = None):
+        """Return (start, technician) for the earliest slot free for the device and a qualified technician.
+
+        With no technicians on file only the device calendar is considered and
+        technician is None. Raises ValueError if nobody can service the type.
+        """
+        device_cal = self.device_calendars[device_id]
+        candidates = [
+            t for t in self.technicians
+            if (technician_id is None or t.technician_id == technician_id) and t.can_service(equipment_type)
+        ]
+        if not self.technicians and technician_id is None:
+            return _joint_next_free([device_cal], not_before, duration), None
+        if not candidates:
+            raise ValueError(f"No technician available for {equipment_type}")
+
+        best = None
+        for tech in candidates:
+            start = _joint_next_free([device_cal, self.technician_calendars[tech.technician_id]], not_before, duration)
+            if best is None or start < best[0]:
+                best = (start, tech)
+        return best
+
+    def book(self, device_id: str, technician, start, end):
+        self.device_calendars[device_id].add(start, end)
+        if technician is not None:
+            self.technician_calendars[technician.technician_id].add(start, end)
+
+
+class SlotConflict(Exception):
+    """A concurrent booking took the slot; retried by `book_slot`."""
+
+
+def _lock_calendars():
+    """Serialize bookings until the surrounding transaction ends."""
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", [BOOKING_LOCK_KEY])
+    else:
+        # Row locks on MySQL; a no-op on SQLite, where the re-check in book_slot applies
+        list(Technician.objects.select_for_update().order_by('pk').values_list('pk', flat=True))
+
+
+def _overlapping(entry: MaintenanceSchedule) -> bool:
+    busy = Q(device_id=entry.device_id)
+    if entry.technician_id is not None:
+        busy |= Q(technician_id=entry.technician_id)
+    return MaintenanceSchedule.objects.filter(
+        busy, status='scheduled', start__lt=entry.end, end__gt=entry.start,
+    ).exclude(pk=entry.pk).exists()
+
+
+def book_slot(device_id: str, equipment_type: str, duration, not_before, technician_id: str = None,
+              maintenance_type: str = 'preventive') -> MaintenanceSchedule:
+    """Book the earliest conflict-free slot at or after `not_before`, safe against concurrent bookings."""
+    for attempt in range(1, BOOKING_ATTEMPTS + 1):
+        try:
+            with transaction.atomic():
+                _lock_calendars()
+                planner = Planner.from_db(since=not_before)
+                start, tech = planner.earliest_slot(device_id, equipment_type, duration, not_before,
+                                                    technician_id=technician_id)
+                entry = MaintenanceSchedule.objects.create(
+                    schedule_id=new_schedule_id(),
+                    device_id=device_id,
+                    equipment_type=equipment_type,
+                    technician=tech,
+                    start=start,
+                    end=start + duration,
+                    maintenance_type=maintenance_type,
+                )
+                if _overlapping(entry):
+                    raise SlotConflict(f"slot at {start.isoformat()} was taken concurrently")
+                return entry
+        except (SlotConflict, OperationalError):
+            # OperationalError: SQLite's "database is locked" when two bookings upgrade to writers at once
+            if attempt == BOOKING_ATTEMPTS:
+                raise
+            time.sleep(random.uniform(0, 0.05 * attempt))
+
+
+def new_schedule_id() -> str:
+    return f"MAINT-{uuid.uuid4().hex[:8].upper()}"
+
+
+def duration_for(equipment_type: str) -> timedelta:
+    return timedelta(hours=DEFAULT_DURATION_HOURS.get(equipment_type, 2))
+
+
+def schedule_to_dict(entry: MaintenanceSchedule) -> dict:
+    return {
+        "scheduleId": entry.schedule_id,
+        "deviceId": entry.device_id,
+        "equipmentType": entry.equipment_type,
+        "technicianId": entry.technician.technician_id if entry.technician else None,
+        "scheduledDate": entry.start.isoformat(),
+        "endDate": entry.end.isoformat(),
+        "type": entry.maintenance_type,
+        "status": entry.status,
+        "estimatedDuration_hours": round((entry.end - entry.start).total_seconds() / 3600, 2),
+    }
+
+
+def rising_pof_devices(min_pof: float = 0.1, window: int = 10, lookback_hours: int = 24) -> 'pd.DataFrame':
+    """Machines whose PoF over their last `window` readings is trending up.
+
+    Reads recent readings for the whole fleet in one query and scores them
+    vectorized. Returns a DataFrame (machine_id, pof, trend) sorted riskiest first.
+    """
+    import pandas as pd
+
+    since = timezone.now() - timedelta(hours=lookback_hours)
+    rows = SensorReading.objects.filter(timestamp__gte=since).order_by('machine_id', 'timestamp').values_list(
+        'machine_id', 'vibration', 'temperature'
+    )
+    df = pd.DataFrame.from_records(list(rows), columns=['machine_id', 'vibration', 'temperature'])
+    if df.empty:
+        return pd.DataFrame(columns=['machine_id', 'pof', 'trend'])
+
+    df = df.groupby('machine_id', sort=False).tail(window)
+    df['pof'] = pdm.compute_pof_array(df['vibration'].to_numpy(), df['temperature'].to_numpy())
+    grouped = df.groupby('machine_id', sort=False)
+    position = grouped.cumcount()
+    size = grouped['pof'].transform('size')
+    df['late'] = position >= size / 2
+
+    halves = df.groupby(['machine_id', 'late'])['pof'].mean().unstack()
+    latest = grouped['pof'].last()
+    trend = halves.get(True) - halves.get(False, halves.get(True))
+    out = pd.DataFrame({'pof': latest, 'trend': trend.fillna(0.0)}).reset_index()
+    out = out[(out['trend'] > 0) & (out['pof'] >= min_pof)]
+    return out.sort_values('pof', ascending=False).reset_index(drop=True)
+
+
+def plan_rising(min_pof: float = 0.1, window: int = 10, lookback_hours: int = 24,
+                not_before=None, dry_run: bool = False) -> list:
+    """Book the earliest conflict-free slot for every device with rising PoF.
+
+    Riskiest devices are booked first; devices that already have an upcoming
+    entry are left alone. Returns the (saved unless `dry_run`) schedule entries.
+    """
+    not_before = not_before or timezone.now()
+    devices = rising_pof_devices(min_pof=min_pof, window=window, lookback_hours=lookback_hours)
+    with transaction.atomic():
+        if not dry_run:
+            _lock_calendars()
+        return _plan(devices, window, not_before, dry_run)
+
+
+def _plan(devices, window: int, not_before, dry_run: bool) -> list:
+    planner = Planner.from_db(since=not_before)
+
+    entries = []
+    for machine_id, pof, trend in devices.itertuples(index=False):
+        if planner.has_upcoming(machine_id):
+            continue
+        equipment_type = equipment_type_for(machine_id)
+        duration = duration_for(equipment_type)
+        try:
+            start, tech = planner.earliest_slot(machine_id, equipment_type, duration, not_before)
+        except ValueError:
+            continue
+        planner.book(machine_id, tech, start, start + duration)
+        entries.append(MaintenanceSchedule(
+            schedule_id=new_schedule_id(),
+            device_id=machine_id,
+            equipment_type=equipment_type,
+            technician=tech,
+            start=start,
+            end=start + duration,
+            maintenance_type='predictive',
+            reason=f"PoF {pof:.3f} rising (+{trend:.3f} over last {window} readings)",
+        ))
+
+    if entries and not dry_run:
+        MaintenanceSchedule.objects.bulk_create(entries)
+    return entries
@@ -0,0 +1,162 @@
+"""Worker-side hooks for the multi-worker production mode (`dev_runner.py --prod`).
+
+The supervisor starts each API worker with PRAXIS_WORKER_ID and
+PRAXIS_HEARTBEAT_FILE set. On startup the worker:
+
+  - warms its per-process caches (equipment rules, hospital network, risk
+    index, pandas) and opens PRAXIS_DB_WARM_CONNECTIONS (default 4) DB
+    connections on distinct threadpool threads, so the first requests don't
+    pay for imports or connects and a dead database shows up at startup;
+  - writes a small JSON heartbeat from the event loop every
+    PRAXIS_HEARTBEAT_INTERVAL seconds (default 1). A stale heartbeat means the
+    loop is stuck, and the supervisor restarts the worker. The heartbeat also
+    carries the worker's load (requests served, in flight, agent queue depth).
+
+With PRAXIS_OUTBOX_DISPATCHER=1 any API process (worker mode or not) also
+runs an outbox dispatcher thread that delivers webhook events (see
+outbox.py); otherwise run `manage.py dispatch_webhooks` alongside. On
+shutdown the n8n forwarder sends what it still has queued (see forwarder.py).
+
+Outside worker mode `lifespan` does nothing else.
+
+Django connections are per thread, and FastAPI sends none of the request
+signals that make CONN_MAX_AGE / CONN_HEALTH_CHECKS work. `DBRoute` does that
+housekeeping around each sync endpoint on the thread serving it, so each
+threadpool thread keeps one persistent, health-checked connection - the
+worker's connection pool, bounded by the threadpool size.
+"""
+import asyncio
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+
+from anyio import to_thread
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+
+import metrics
+
+
+def worker_id():
+    return os.getenv('PRAXIS_WORKER_ID')
+
+
+def _with_db_housekeeping(endpoint):
+    from django.db import close_old_connections
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        close_old_connections()
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return wrapper
+
+
+class DBRoute(APIRoute):
+    """APIRoute that runs Django's request_started/finished connection housekeeping around sync endpoints."""
+
+    def __init__(self, path, endpoint, **kwargs):
+        if not asyncio.iscoroutinefunction(endpoint):
+            endpoint = _with_db_housekeeping(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+
+def warm_up():
+    """Load per-process caches and check the database is reachable."""
+    import pandas  # noqa: F401  (deferred at import time, but every worker needs it)
+    from django.db import connection
+
+    import equipment
+    import hospital_network
+    import riskindex
+
+    equipment.get_rules()
+    hospital_network.get_network()
+    connection.ensure_connection()
+    riskindex.get_index()
+
+
+def _connect(barrier: threading.Barrier):
+    from django.db import connection
+
+    # Each call holds its thread until all have started, so every call lands on a different thread
+    try:
+        barrier.wait(timeout=5)
+    except threading.BrokenBarrierError:
+        pass
+    connection.ensure_connection()
+
+
+async def warm_connections(n: int):
+    """Open a DB connection on `n` distinct threadpool threads."""
+    n = max(1, min(n, int(to_thread.current_default_thread_limiter().total_tokens)))
+    barrier = threading.Barrier(n)
+    await asyncio.gather(*(run_in_threadpool(_connect, barrier) for _ in range(n)))
+
+
+def load_snapshot() -> dict:
+    return {
+        'worker': worker_id(),
+        'pid': os.getpid(),
+        'ts': time.time(),
+        'requests': int(metrics.http_requests.total()),
+        'in_flight': int(metrics.http_in_flight.labels_().value()),
+        'agent_queue': int(metrics.agent_queue_depth.labels_().value()),
+    }
+
+
+def write_heartbeat(path: str):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as fh:
+        json.dump(load_snapshot(), fh)
+    os.replace(tmp, path)
+
+
+async def heartbeat(path: str, interval: float):
+    # Written from the event loop itself so a blocked loop stops the heartbeat.
+    while True:
+        try:
+            write_heartbeat(path)
+        except OSError:
+            pass
+        await asyncio.sleep(interval)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    import forwarder
+
+    dispatcher = os.getenv('PRAXIS_OUTBOX_DISPATCHER') == '1'
+    if dispatcher:
+        import outbox
+
+        outbox.start_background()
+    try:
+        async with worker_lifespan(app):
+            yield
+    finally:
+        if dispatcher:
+            await run_in_threadpool(outbox.stop_background)
+        # Give queued n8n readings a moment to go out
+        await run_in_threadpool(forwarder.shutdown)
+
+
+@asynccontextmanager
+async def worker_lifespan(app):
+    path = os.getenv('PRAXIS_HEARTBEAT_FILE')
+    if worker_id() is None or not path:
+        yield
+        return
+
+    await run_in_threadpool(warm_up)
+    await warm_connections(int(os.getenv('PRAXIS_DB_WARM_CONNECTIONS', '4')))
+    task = asyncio.create_task(heartbeat(path, float(os.getenv('PRAXIS_HEARTBEAT_INTERVAL', '1'))))
+    try:
+        yield
+    finally:
+        task.cancel()
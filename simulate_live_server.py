@@ -1,15 +1,43 @@
+"""Live sensor simulator for PraxisGuard.
+
+    python simulate_live_server.py
+        Original demo: one machine (MAC-101) with HIGH readings every 5 seconds.
+
+    python simulate_live_server.py fleet --machines 2000 --hz 2 [--sink http]
+        Thousands of machines at a fixed rate. Each tick's readings are
+        generated as one vectorized batch and flushed in bulk, either straight
+        to the DB (ingest.insert_readings) or to POST /api/ingest/readings.
+
+    python simulate_live_server.py replay --source live_sensor_stream.csv --speed 60
+    python simulate_live_server.py replay --source db --since 2025-11-29 --speed 600
+        Plays back CSV or DB history at N x speed, re-stamping each row with
+        the time it is emitted (use --keep-timestamps to keep the originals).
+
+Producers and flushers are asyncio tasks joined by a bounded queue: if the
+sink falls behind, the producer blocks and the reported lag grows instead of
+memory.
+"""
+import argparse
+import asyncio
 import os
 import sys
+import time
+
 import django
 import numpy as np
-import time
 
 # Setup Django settings - add hackathon_core to path
 sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'hackathon_core'))
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hackathon_core.settings')
 django.setup()
 
-from core_db.models import SensorReading
+import pandas as pd  # noqa: E402
+from django.db.models import Q  # noqa: E402
+
+from core_db.models import SensorReading  # noqa: E402
+import fleet_generator  # noqa: E402
+import ingest  # noqa: E402
+
 
 def simulate():
     print("LIVE DATA STREAMING... (Ctrl+C to stop)")
@@ -21,16 +49,274 @@ def simulate():
         # Temperature: 95 +/- 5 (threshold in n8n is 70-90)
         vib = np.random.normal(85, 10)
         temp = np.random.normal(95, 5)
-        
-        # Save to database
-        SensorReading.objects.create(
-            machine_id='MAC-101',
-            vibration=vib,
-            temperature=temp
-        )
+
+        # Save to database (through ingest, so PoF triggers fire on the first HIGH reading)
+        ingest.insert_readings(pd.DataFrame({
+            'machine_id': ['MAC-101'],
+            'vibration': [vib],
+            'temperature': [temp],
+            'timestamp': [pd.Timestamp.now(tz='UTC')],
+        }), dedupe=False)
         print(f"[HIGH ALERT] Reading: Vib={vib:.1f}, Temp={temp:.1f} - Saved to DB")
         count += 1
         time.sleep(5)
 
+
+# ============================================
+# Sinks
+# ============================================
+
+class DbSink:
+    """Bulk insert straight into the configured database."""
+
+    async def start(self):
+        pass
+
+    async def write(self, df: pd.DataFrame):
+        await asyncio.to_thread(ingest.insert_readings, df, False)
+
+    async def close(self):
+        pass
+
+
+class HttpSink:
+    """POST batches to the API's bulk ingest endpoint over a keep-alive connection."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.client = None
+
+    async def start(self):
+        import httpx
+        self.client = httpx.AsyncClient(timeout=30)
+
+    async def write(self, df: pd.DataFrame):
+        payload = {
+            'machine_id': df['machine_id'].tolist(),
+            'vibration': df['vibration'].tolist(),
+            'temperature': df['temperature'].tolist(),
+            'timestamp': [t.isoformat() for t in df['timestamp']],
+        }
+        resp = await self.client.post(self.url, json=payload)
+        resp.raise_for_status()
+
+    async def close(self):
+        await self.client.aclose()
+
+
+# ============================================
+# Pipeline
+# ============================================
+
+class Stats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.rows = 0
+        self.batches = 0
+        self.errors = 0
+        self.lag = 0.0
+
+
+async def _flusher(queue: asyncio.Queue, sink, stats: Stats):
+    while True:
+        df = await queue.get()
+        try:
+            if df is None:
+                return
+            await sink.write(df)
+            stats.rows += len(df)
+            stats.batches += 1
+        except Exception as e:
+            stats.errors += 1
+            print(f"[SIM] flush failed: {e}")
+        finally:
+            queue.task_done()
+
+
+async def _reporter(queue: asyncio.Queue, stats: Stats, every: float):
+    while True:
+        await asyncio.sleep(every)
+        elapsed = time.perf_counter() - stats.started
+        print(f"[SIM] {stats.rows:,} rows ({stats.rows / elapsed:,.0f} rows/sec), "
+              f"{stats.batches} batches, queue {queue.qsize()}/{queue.maxsize}, "
+              f"lag {stats.lag:.2f}s, errors {stats.errors}")
+
+
+async def _run(producer, sink, workers: int, queue_size: int, report_every: float):
+    queue = asyncio.Queue(maxsize=queue_size)
+    stats = Stats()
+    await sink.start()
+    flushers = [asyncio.create_task(_flusher(queue, sink, stats)) for _ in range(workers)]
+    reporter = asyncio.create_task(_reporter(queue, stats, report_every))
+    try:
+        await producer(queue, stats)
+    finally:
+        for _ in flushers:
+            await queue.put(None)
+        await asyncio.gather(*flushers)
+        reporter.cancel()
+        await sink.close()
+        elapsed = time.perf_counter() - stats.started
+        print(f"[SIM] done: {stats.rows:,} rows in {elapsed:.1f}s ({stats.rows / elapsed:,.0f} rows/sec), "
+              f"{stats.errors} errors")
+
+
+def fleet_producer(machines: int, hz: float, duration: float, degrade_fraction: float,
+                   ramp_seconds: float, seed: int):
+    """Emit one reading per machine every 1/hz seconds as a single vectorized batch."""
+    ids = np.array(fleet_generator.machine_ids(machines), dtype=object)
+    profiles = np.array([fleet_generator.EQUIPMENT_PROFILES[m.split('-', 1)[0]] for m in ids])
+    rng = np.random.default_rng(seed)
+    base_vib = profiles[:, 0] + rng.normal(0, profiles[:, 1])
+    base_temp = profiles[:, 2] + rng.normal(0, profiles[:, 3])
+    degrading = rng.random(machines) < degrade_fraction
+    drift_vib = np.zeros(machines)
+    drift_temp = np.zeros(machines)
+
+    async def produce(queue: asyncio.Queue, stats: Stats):
+        period = 1.0 / hz
+        loop = asyncio.get_running_loop()
+        t0 = loop.time()
+        tick = 0
+        while duration <= 0 or tick * period < duration:
+            elapsed = tick * period
+            # Degrading machines ramp toward critical over `ramp_seconds`.
+            progress = min(1.0, elapsed / ramp_seconds) if ramp_seconds > 0 else 1.0
+            drift_vib[degrading] = progress * (110 - base_vib[degrading])
+            drift_temp[degrading] = progress * (120 - base_temp[degrading])
+            df = pd.DataFrame({
+                'machine_id': ids,
+                'vibration': base_vib + drift_vib + rng.normal(0, profiles[:, 1] * 0.5),
+                'temperature': base_temp + drift_temp + rng.normal(0, profiles[:, 3] * 0.3),
+                'timestamp': pd.Timestamp.now(tz='UTC'),
+            })
+            await queue.put(df)
+            tick += 1
+            next_at = t0 + tick * period
+            stats.lag = max(0.0, loop.time() - next_at)
+            await asyncio.sleep(max(0.0, next_at - loop.time()))
+
+    return produce
+
+
+def _db_history_page(since, until, after, chunk_rows: int) -> pd.DataFrame:
+    """One page of DB history ordered by (timestamp, id), keyset-paginated after `after`."""
+    qs = SensorReading.objects.order_by('timestamp', 'id')
+    if since:
+        qs = qs.filter(timestamp__gte=pd.Timestamp(since, tz='UTC'))
+    if until:
+        qs = qs.filter(timestamp__lt=pd.Timestamp(until, tz='UTC'))
+    if after is not None:
+        ts, pk = after
+        qs = qs.filter(Q(timestamp__gt=ts) | Q(timestamp=ts, id__gt=pk))
+    rows = list(qs.values_list('id', *ingest.READING_COLUMNS)[:chunk_rows])
+    return pd.DataFrame.from_records(rows, columns=['id'] + ingest.READING_COLUMNS)
+
+
+async def _history_chunks(source: str, since, until, chunk_rows: int):
+    """Yield history frames ordered by timestamp from a CSV path or the DB."""
+    if source == 'db':
+        after = None
+        while True:
+            # ORM calls are sync-only; run each page in a worker thread.
+            page = await asyncio.to_thread(_db_history_page, since, until, after, chunk_rows)
+            if page.empty:
+                return
+            after = (page['timestamp'].iloc[-1].to_pydatetime(), int(page['id'].iloc[-1]))
+            page['timestamp'] = pd.to_datetime(page['timestamp'], utc=True)
+            yield page.drop(columns='id')
+    else:
+        # CSV history is assumed to be in time order (as the simulator writes it).
+        for chunk in pd.read_csv(source, chunksize=chunk_rows):
+            df, _ = ingest.normalize_frame(chunk)
+            yield df
+
+
+def replay_producer(source: str, speed: float, since, until, keep_timestamps: bool,
+                    batch_seconds: float, chunk_rows: int):
+    """Emit history rows at `speed` x their original pace, grouped into `batch_seconds` of wall time."""
+
+    async def produce(queue: asyncio.Queue, stats: Stats):
+        loop = asyncio.get_running_loop()
+        wall0 = loop.time()
+        now0 = pd.Timestamp.now(tz='UTC')
+        ts0 = None
+        async for chunk in _history_chunks(source, since, until, chunk_rows):
+            if chunk.empty:
+                continue
+            if ts0 is None:
+                ts0 = chunk['timestamp'].iloc[0]
+            offsets = (chunk['timestamp'] - ts0).dt.total_seconds().to_numpy() / speed
+            # Group rows that fall into the same wall-clock batch window.
+            slots = np.floor(offsets / batch_seconds).astype(np.int64)
+            bounds = np.flatnonzero(np.diff(slots)) + 1
+            for part in np.split(np.arange(len(chunk)), bounds):
+                if not len(part):
+                    continue
+                due = wall0 + offsets[part[0]]
+                delay = due - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                stats.lag = max(0.0, -delay)
+                batch = chunk.iloc[part].copy()
+                if not keep_timestamps:
+                    batch['timestamp'] = now0 + pd.to_timedelta(offsets[part], unit='s')
+                await queue.put(batch)
+
+    return produce
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="PraxisGuard sensor simulator")
+    sub = parser.add_subparsers(dest='mode')
+
+    def add_sink_args(p):
+        p.add_argument('--sink', choices=['db', 'http'], default='db')
+        p.add_argument('--url', default='http://127.0.0.1:8000/api/ingest/readings')
+        p.add_argument('--workers', type=int, default=2, help='concurrent flushers')
+        p.add_argument('--queue', type=int, default=16, help='max batches waiting to be flushed')
+        p.add_argument('--report-every', type=float, default=5.0)
+
+    p_fleet = sub.add_parser('fleet', help='simulate many machines at a fixed rate')
+    p_fleet.add_argument('--machines', type=int, default=1000)
+    p_fleet.add_argument('--hz', type=float, default=1.0, help='readings per machine per second')
+    p_fleet.add_argument('--duration', type=float, default=0, help='seconds to run (0 = until Ctrl+C)')
+    p_fleet.add_argument('--degrade-fraction', type=float, default=0.05)
+    p_fleet.add_argument('--ramp-seconds', type=float, default=600)
+    p_fleet.add_argument('--seed', type=int, default=0)
+    add_sink_args(p_fleet)
+
+    p_replay = sub.add_parser('replay', help='play back CSV or DB history at N x speed')
+    p_replay.add_argument('--source', default='live_sensor_stream.csv', help="CSV path or 'db'")
+    p_replay.add_argument('--speed', type=float, default=10.0)
+    p_replay.add_argument('--since')
+    p_replay.add_argument('--until')
+    p_replay.add_argument('--keep-timestamps', action='store_true')
+    p_replay.add_argument('--batch-seconds', type=float, default=0.25)
+    p_replay.add_argument('--chunk-rows', type=int, default=50000)
+    add_sink_args(p_replay)
+
+    args = parser.parse_args(argv)
+    if args.mode is None:
+        simulate()
+        return
+
+    sink = HttpSink(args.url) if args.sink == 'http' else DbSink()
+    if args.mode == 'fleet':
+        producer = fleet_producer(args.machines, args.hz, args.duration, args.degrade_fraction,
+                                  args.ramp_seconds, args.seed)
+        print(f"[SIM] {args.machines} machines at {args.hz} Hz -> {args.sink} "
+              f"({args.machines * args.hz:,.0f} rows/sec target)")
+    else:
+        producer = replay_producer(args.source, args.speed, args.since, args.until, args.keep_timestamps,
+                                   args.batch_seconds, args.chunk_rows)
+        print(f"[SIM] replaying {args.source} at {args.speed}x -> {args.sink}")
+
+    try:
+        asyncio.run(_run(producer, sink, args.workers, args.queue, args.report_every))
+    except KeyboardInterrupt:
+        print("[SIM] stopped")
+
+
 if __name__ == "__main__":
-    simulate()
\ No newline at end of file
+    main()
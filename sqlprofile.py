@@ -0,0 +1,172 @@
+"""Per-request SQL profiling with N+1 detection.
+
+Opt-in: set PRAXIS_SQL_PROFILE=1 and api.py adds `SQLProfileMiddleware`.
+Every query issued while a request is served goes through a Django
+`execute_wrapper` that records its count, DB time and a normalized
+fingerprint (literals and IN-lists collapsed). A fingerprint repeated at
+least PRAXIS_SQL_N_PLUS_ONE times (default 5) is reported as a likely N+1.
+
+The summary is returned in an `X-SQL-Profile` header and logged to the
+`praxis.sql` logger (warning when an N+1 is flagged, debug otherwise).
+
+In tests, `assert_max_queries` catches query-count regressions:
+
+    with sqlprofile.assert_max_queries(3):
+        client.get('/api/machines')
+"""
+import contextvars
+import logging
+import os
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+import metrics
+
+logger = logging.getLogger('praxis.sql')
+
+DEFAULT_N_PLUS_ONE = int(os.getenv('PRAXIS_SQL_N_PLUS_ONE', '5'))
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN\s*\((?:\s*(?:\?|%s)\s*,?)+\)', re.IGNORECASE)
+_SPACE = re.compile(r'\s+')
+
+
+def enabled() -> bool:
+    return os.getenv('PRAXIS_SQL_PROFILE', '').lower() in ('1', 'true', 'yes')
+
+
+def fingerprint(sql: str) -> str:
+    """Normalize a statement so executions differing only in values compare equal."""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+class QueryProfile:
+    """Queries recorded during one request or `profile_queries()` block."""
+
+    def __init__(self, n_plus_one_threshold: int = None):
+        self.threshold = n_plus_one_threshold or DEFAULT_N_PLUS_ONE
+        self.count = 0
+        self.seconds = 0.0
+        self.fingerprints = Counter()
+
+    def record(self, sql: str, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+        self.fingerprints[fingerprint(sql)] += 1
+
+    @property
+    def n_plus_one(self) -> list:
+        """(fingerprint, executions) for statements repeated at least `threshold` times."""
+        return [(fp, n) for fp, n in self.fingerprints.most_common() if n >= self.threshold]
+
+    def header(self) -> str:
+        return f"queries={self.count}; time_ms={self.seconds * 1000:.2f}; n_plus_one={len(self.n_plus_one)}"
+
+    def summary(self, top: int = 5) -> str:
+        lines = [f"{self.count} queries in {self.seconds * 1000:.2f} ms"]
+        for fp, n in self.fingerprints.most_common(top):
+            flag = '  <-- N+1' if n >= self.threshold else ''
+            lines.append(f"  {n:>5} x {fp[:200]}{flag}")
+        return '\n'.join(lines)
+
+
+_current = contextvars.ContextVar('praxis_sql_profile', default=None)
+# Process-wide profiles see queries from every thread (e.g. TestClient's portal thread).
+_process_profiles = []
+
+
+def _wrapper(execute, sql, params, many, context):
+    profile = _current.get()
+    if profile is None and not _process_profiles:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - start
+        if profile is not None:
+            profile.record(sql, elapsed)
+        for p in list(_process_profiles):
+            if p is not profile:
+                p.record(sql, elapsed)
+
+
+def install():
+    """Attach the profiling wrapper to every Django DB connection, current and future."""
+    metrics.attach_execute_wrapper(_wrapper, 'praxis_sql_profile')
+
+
+@contextmanager
+def profile_queries(n_plus_one_threshold: int = None, process_wide: bool = False):
+    """Record the queries issued inside the block into a QueryProfile.
+
+    By default only queries from this context (and threadpool work it
+    dispatches) are counted; `process_wide=True` counts queries from every
+    thread, which is what tests driving the app through TestClient need.
+    """
+    install()
+    profile = QueryProfile(n_plus_one_threshold)
+    if process_wide:
+        _process_profiles.append(profile)
+    token = _current.set(profile)
+    try:
+        yield profile
+    finally:
+        _current.reset(token)
+        if process_wide:
+            _process_profiles.remove(profile)
+
+
+@contextmanager
+def assert_max_queries(limit: int, allow_n_plus_one: bool = False, n_plus_one_threshold: int = None):
+    """Fail with the query breakdown if the block issues more than `limit` queries or an N+1.
+
+    Counts queries from all threads, so run it where nothing else is using the DB.
+    """
+    with profile_queries(n_plus_one_threshold, process_wide=True) as profile:
+        yield profile
+    if profile.count > limit:
+        raise AssertionError(f"expected at most {limit} queries, got {profile.summary()}")
+    if profile.n_plus_one and not allow_n_plus_one:
+        raise AssertionError(f"N+1 query pattern detected: {profile.summary()}")
+
+
+class SQLProfileMiddleware:
+    """Pure ASGI middleware profiling the SQL of each HTTP request."""
+
+    def __init__(self, app, n_plus_one_threshold: int = None):
+        self.app = app
+        self.threshold = n_plus_one_threshold
+        install()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        profile = QueryProfile(self.threshold)
+        token = _current.set(profile)
+
+        async def send_wrapper(message):
+            # Sync endpoints have finished all their queries by the time headers go out.
+            if message['type'] == 'http.response.start':
+                headers = list(message.get('headers', []))
+                headers.append((b'x-sql-profile', profile.header().encode('latin-1')))
+                message = {**message, 'headers': headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            path = scope.get('path', '')
+            if profile.n_plus_one:
+                logger.warning("%s %s: possible N+1\n%s", scope.get('method'), path, profile.summary())
+            elif logger.isEnabledFor(logging.DEBUG):
+                logger.debug("%s %s: %s", scope.get('method'), path, profile.summary())
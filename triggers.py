@@ -0,0 +1,152 @@
+"""Push-based PoF threshold triggers, evaluated on ingest.
+
+Instead of n8n polling /api/iot/sensors every few minutes and scoring the
+whole fleet, `ingest.insert_readings` scores each fresh batch here with the
+workflow's own model (`pdm.workflow_pof`) and, the moment a device reaches
+the threshold, publishes one `pof_threshold` outbox event carrying only that
+device's payload - the same shape the "Calculate Probability of Failure"
+node produces, so it can feed "Check if High Failure Risk" directly. The
+outbox dispatcher (see outbox.py) delivers it to the configured webhooks.
+
+Deduplication is per episode and shared across processes through
+RiskTrigger rows: a device alerts when it reaches the threshold after
+having had no reading at or above it for PRAXIS_TRIGGER_REARM seconds
+(default 300). Every further hot reading just extends the episode. The
+alert is claimed with a conditional UPDATE, so concurrent ingesters fire
+it once.
+
+Only readings newer than PRAXIS_TRIGGER_MAX_AGE seconds (default 300) are
+considered, so backfills and replays of old data stay quiet. The threshold
+is PRAXIS_POF_THRESHOLD (default 0.6); PRAXIS_TRIGGERS=0 switches all of
+this off.
+
+Requires Django to be set up before import (see api.py).
+"""
+import os
+from datetime import timedelta
+
+import numpy as np
+from django.db.models import Case, DateTimeField, F, Q, Value, When
+from django.utils import timezone
+
+import equipment
+import metrics
+import outbox
+import pdm
+from core_db.models import RiskTrigger
+
+EVENT_TYPE = 'pof_threshold'
+# Machines per episode-extension UPDATE (a CASE arm each), well under SQLite's parameter limit
+EXTEND_CHUNK = 500
+
+
+def enabled() -> bool:
+    return os.getenv('PRAXIS_TRIGGERS', '1') != '0'
+
+
+def threshold() -> float:
+    return float(os.getenv('PRAXIS_POF_THRESHOLD', '0.6'))
+
+
+def score(df) -> tuple:
+    """(PoF per row, error codes per row) for a readings frame, as the workflow computes them."""
+    rules = equipment.get_rules()
+    types = [rules.equipment_type(m) for m in df['machine_id'].tolist()]
+    codes = rules.evaluate(types, {
+        'vibration': df['vibration'].to_numpy(),
+        'temperature': df['temperature'].to_numpy(),
+    })
+    counts = np.fromiter((len(c) for c in codes), dtype=np.int64, count=len(codes))
+    return pdm.workflow_pof(df['vibration'].to_numpy(), df['temperature'].to_numpy(), counts), codes
+
+
+def build_payload(row, pof: float, codes: list, limit: float) -> dict:
+    rules = equipment.get_rules()
+    return {
+        'deviceId': row['machine_id'],
+        'equipmentType': rules.equipment_type(row['machine_id']),
+        'location': equipment.location_for(row['machine_id']),
+        'probabilityOfFailure': pof,
+        'sensorReadings': {
+            'vibration': round(float(row['vibration']), 2),
+            'temperature': round(float(row['temperature']), 2),
+            'errorCodes': codes,
+        },
+        'timeWindow': '72h',
+        'threshold': limit,
+        'timestamp': row['timestamp'].isoformat(),
+    }
+
+
+def episode_start(times, last_hot, rearm):
+    """The first of `times` (ascending) more than `rearm` after the previous hot reading, or None."""
+    prev = last_hot
+    for ts in times:
+        if prev is None or ts - prev > rearm:
+            return ts
+        prev = max(prev, ts)
+    return None
+
+
+def process_batch(df, now=None) -> list:
+    """Evaluate a batch of readings and publish alerts for new crossings.
+
+    Call inside the transaction that writes the readings. Returns the
+    published OutboxEvents.
+    """
+    import pandas as pd
+
+    if df.empty:
+        return []
+    now = now or timezone.now()
+    max_age = float(os.getenv('PRAXIS_TRIGGER_MAX_AGE', '300'))
+    df = df.assign(timestamp=pd.to_datetime(df['timestamp'], utc=True))
+    fresh = df[df['timestamp'] >= now - timedelta(seconds=max_age)]
+    if fresh.empty:
+        return []
+
+    limit = threshold()
+    pof, codes = score(fresh)
+    hot_mask = pof >= limit
+    if not hot_mask.any():
+        return []
+    hot = fresh.assign(pof=pof, codes=codes)[hot_mask]
+    # Per device: a quiet gap before any hot reading starts an episode, the newest extends it,
+    # the worst one is reported. Microsecond precision: what the DB stores, and
+    # to_pydatetime() warns on dropped nanoseconds.
+    hot_times = hot['timestamp'].dt.floor('us').sort_values().groupby(hot['machine_id'])
+    newest_hot = hot_times.max()
+    worst = hot.sort_values(['pof', 'timestamp']).drop_duplicates('machine_id', keep='last').set_index('machine_id')
+    machine_ids = newest_hot.index.tolist()
+
+    rearm = timedelta(seconds=float(os.getenv('PRAXIS_TRIGGER_REARM', '300')))
+    state = dict(RiskTrigger.objects.filter(machine_id__in=machine_ids).values_list('machine_id', 'last_hot_at'))
+    RiskTrigger.objects.bulk_create(
+        [RiskTrigger(machine_id=m) for m in machine_ids if m not in state], ignore_conflicts=True)
+
+    events = []
+    for machine_id, times in hot_times:
+        started_at = episode_start(times.dt.to_pydatetime(), state.get(machine_id), rearm)
+        if started_at is None:
+            continue  # ongoing episode
+        row = worst.loc[machine_id]
+        # Claim the alert: only one process can move last_hot_at out of a quiet period
+        claimed = RiskTrigger.objects.filter(
+            Q(last_hot_at__isnull=True) | Q(last_hot_at__lt=started_at - rearm), machine_id=machine_id,
+        ).update(last_hot_at=started_at, fired_at=now, pof=float(row['pof']), fire_count=F('fire_count') + 1)
+        if not claimed:
+            continue
+        payload = build_payload(dict(row, machine_id=machine_id), float(row['pof']), row['codes'], limit)
+        events.append(outbox.publish(EVENT_TYPE, payload))
+        metrics.trigger_detection_lag.labels_().observe(max(0.0, (now - row['timestamp']).total_seconds()))
+
+    # Extend each hot device's episode to its own newest hot reading, one statement per chunk
+    for lo in range(0, len(machine_ids), EXTEND_CHUNK):
+        chunk = machine_ids[lo:lo + EXTEND_CHUNK]
+        seen = Case(*[When(machine_id=m, then=Value(newest_hot[m].to_pydatetime())) for m in chunk],
+                    output_field=DateTimeField())
+        RiskTrigger.objects.filter(Q(last_hot_at__isnull=True) | Q(last_hot_at__lt=seen), machine_id__in=chunk) \
+            .update(last_hot_at=seen)
+    metrics.pof_triggers.labels_('fired').inc(len(events))
+    metrics.pof_triggers.labels_('suppressed').inc(len(machine_ids) - len(events))
+    return events
@@ -0,0 +1,217 @@
+"""Gorilla-style compression for sensor time series.
+
+Timestamps (int64 microseconds) are stored as delta-of-deltas with a
+variable-length prefix code, so a steady reporting interval costs one bit per
+sample. Float64 values are XORed with the previous value and only the
+meaningful bits of the XOR are written (Facebook's Gorilla scheme), so
+repeated or slowly changing readings take a few bits each.
+
+A chunk is split into blocks of `BLOCK_SIZE` samples. Every block restarts
+both encoders, and a fixed-width block index records each block's first/last
+timestamp and byte offsets, so `decode_range` only decodes the blocks that
+overlap the requested time range.
+
+Pure Python/NumPy; no Django dependency.
+"""
+import numpy as np
+
+CODEC_VERSION = 1
+BLOCK_SIZE = 128
+
+# (prefix, prefix bits, payload bits) for zigzagged delta-of-deltas; 0 is the single bit '0'.
+_DOD_BUCKETS = ((0b10, 2, 7), (0b110, 3, 12), (0b1110, 4, 20), (0b11110, 5, 32))
+_DOD_ESCAPE = (0b11111, 5, 64)
+# Payload width by number of leading 1 bits in the prefix
+_DOD_PAYLOAD_BITS = tuple(bits for _, _, bits in _DOD_BUCKETS) + (_DOD_ESCAPE[2],)
+
+
+def index_dtype(columns: int) -> np.dtype:
+    return np.dtype([('first_ts', '<i8'), ('last_ts', '<i8'), ('count', '<u4'), ('offsets', '<u4', (columns + 1,))])
+
+
+class BitWriter:
+    __slots__ = ('acc', 'nbits')
+
+    def __init__(self):
+        self.acc = 0
+        self.nbits = 0
+
+    def write(self, value: int, width: int):
+        self.acc = (self.acc << width) | value
+        self.nbits += width
+
+    def to_bytes(self) -> bytes:
+        pad = -self.nbits % 8
+        return (self.acc << pad).to_bytes((self.nbits + pad) // 8, 'big')
+
+
+class BitReader:
+    __slots__ = ('value', 'total', 'pos')
+
+    def __init__(self, data: bytes):
+        self.value = int.from_bytes(data, 'big')
+        self.total = len(data) * 8
+        self.pos = 0
+
+    def read(self, width: int) -> int:
+        self.pos += width
+        return (self.value >> (self.total - self.pos)) & ((1 << width) - 1)
+
+    def bit(self) -> int:
+        self.pos += 1
+        return (self.value >> (self.total - self.pos)) & 1
+
+
+# ============================================
+# Timestamps: delta-of-delta
+# ============================================
+
+def _encode_timestamps(ts: list) -> bytes:
+    w = BitWriter()
+    prev, delta = ts[0], 0
+    for t in ts[1:]:
+        new_delta = t - prev
+        dod = new_delta - delta
+        prev, delta = t, new_delta
+        if dod == 0:
+            w.write(0, 1)
+            continue
+        zz = dod * 2 if dod > 0 else -dod * 2 - 1
+        for prefix, prefix_bits, bits in _DOD_BUCKETS:
+            if zz < 1 << bits:
+                w.write(prefix, prefix_bits)
+                w.write(zz, bits)
+                break
+        else:
+            prefix, prefix_bits, bits = _DOD_ESCAPE
+            w.write(prefix, prefix_bits)
+            w.write(zz, bits)
+    return w.to_bytes()
+
+
+def _decode_timestamps(data: bytes, first: int, count: int) -> list:
+    r = BitReader(data)
+    out = [first]
+    t, delta = first, 0
+    for _ in range(count - 1):
+        if r.bit():
+            ones = 1
+            while ones < 5 and r.bit():
+                ones += 1
+            zz = r.read(_DOD_PAYLOAD_BITS[ones - 1])
+            delta += (zz >> 1) if not zz & 1 else -((zz + 1) >> 1)
+        t += delta
+        out.append(t)
+    return out
+
+
+# ============================================
+# Values: XOR (Gorilla)
+# ============================================
+
+def _encode_values(bits: list) -> bytes:
+    w = BitWriter()
+    prev = bits[0]
+    w.write(prev, 64)
+    prev_lead, prev_trail = -1, 0
+    for v in bits[1:]:
+        x = v ^ prev
+        prev = v
+        if x == 0:
+            w.write(0, 1)
+            continue
+        lead = min(64 - x.bit_length(), 31)
+        trail = (x & -x).bit_length() - 1
+        if prev_lead >= 0 and lead >= prev_lead and trail >= prev_trail:
+            # Fits inside the previous meaningful-bit window
+            w.write(0b10, 2)
+            w.write(x >> prev_trail, 64 - prev_lead - prev_trail)
+        else:
+            sig = 64 - lead - trail
+            w.write(0b11, 2)
+            w.write(lead, 5)
+            w.write(sig & 63, 6)  # 64 is stored as 0
+            w.write(x >> trail, sig)
+            prev_lead, prev_trail = lead, trail
+    return w.to_bytes()
+
+
+def _decode_values(data: bytes, count: int) -> list:
+    r = BitReader(data)
+    prev = r.read(64)
+    out = [prev]
+    lead = trail = 0
+    for _ in range(count - 1):
+        if r.bit():
+            if r.bit():
+                lead = r.read(5)
+                sig = r.read(6) or 64
+                trail = 64 - lead - sig
+            prev ^= r.read(64 - lead - trail) << trail
+        out.append(prev)
+    return out
+
+
+# ============================================
+# Chunks
+# ============================================
+
+def encode_chunk(ts_us, columns: list) -> tuple:
+    """Encode sorted int64 microsecond timestamps plus float columns.
+
+    Returns (block index bytes, timestamp stream, [column streams]).
+    """
+    ts = np.asarray(ts_us, dtype=np.int64)
+    cols = [np.ascontiguousarray(c, dtype='<f8').view('<u8') for c in columns]
+    n = len(ts)
+    blocks = -(-n // BLOCK_SIZE)
+    index = np.zeros(blocks, dtype=index_dtype(len(cols)))
+    ts_parts, col_parts = [], [[] for _ in cols]
+    offsets = [0] * (len(cols) + 1)
+    for b in range(blocks):
+        lo, hi = b * BLOCK_SIZE, min(n, (b + 1) * BLOCK_SIZE)
+        block_ts = ts[lo:hi].tolist()
+        index[b] = (block_ts[0], block_ts[-1], hi - lo, offsets)
+        part = _encode_timestamps(block_ts)
+        ts_parts.append(part)
+        offsets[0] += len(part)
+        for i, c in enumerate(cols):
+            part = _encode_values(c[lo:hi].tolist())
+            col_parts[i].append(part)
+            offsets[i + 1] += len(part)
+    return index.tobytes(), b''.join(ts_parts), [b''.join(p) for p in col_parts]
+
+
+def decode_range(index_bytes: bytes, ts_stream: bytes, col_streams: list, start_us=None, end_us=None) -> tuple:
+    """Decode samples with start_us <= ts <= end_us, touching only overlapping blocks.
+
+    Returns (int64 timestamps, [float64 columns]).
+    """
+    index = np.frombuffer(index_bytes, dtype=index_dtype(len(col_streams)))
+    first = 0 if start_us is None else int(np.searchsorted(index['last_ts'], start_us, 'left'))
+    last = len(index) if end_us is None else int(np.searchsorted(index['first_ts'], end_us, 'right'))
+    streams = [ts_stream] + list(col_streams)
+
+    ts_out, col_out = [], [[] for _ in col_streams]
+    for b in range(first, last):
+        count = int(index['count'][b])
+        bounds = []
+        for s, stream in enumerate(streams):
+            lo = int(index['offsets'][b][s])
+            hi = int(index['offsets'][b + 1][s]) if b + 1 < len(index) else len(stream)
+            bounds.append(stream[lo:hi])
+        ts_out.extend(_decode_timestamps(bounds[0], int(index['first_ts'][b]), count))
+        for i in range(len(col_streams)):
+            col_out[i].extend(_decode_values(bounds[i + 1], count))
+
+    ts_arr = np.array(ts_out, dtype=np.int64)
+    cols = [np.array(c, dtype=np.uint64).view(np.float64) for c in col_out]
+    if start_us is not None or end_us is not None:
+        mask = np.ones(len(ts_arr), dtype=bool)
+        if start_us is not None:
+            mask &= ts_arr >= start_us
+        if end_us is not None:
+            mask &= ts_arr <= end_us
+        ts_arr = ts_arr[mask]
+        cols = [c[mask] for c in cols]
+    return ts_arr, cols